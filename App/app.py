@@ -2,15 +2,16 @@ import tkinter as tk
 import tkinter.messagebox as mb
 from styles import Theme
 from functions import perform_theme_change, change_image_theme, find_longest_value, get_ticker_list, process_backtest, strategy_list
+from price_store import INTERVALS
 from datalist import DataList
+from strategy import POSITIONS
 from strategy_parameters import StrategyParameters
 
 
 IMAGES_THEME_COMBOS = []
 SYMBOLS = sorted(get_ticker_list("SPX Ticker List.csv"))
-POSITIONS = ["Long", "Short"]
 STRATEGIES = strategy_list()
-width = find_longest_value(SYMBOLS + POSITIONS + STRATEGIES)
+width = find_longest_value(SYMBOLS + POSITIONS + INTERVALS + STRATEGIES)
 theme = Theme()
 
 
@@ -159,7 +160,41 @@ info_icon_default = tk.PhotoImage(file="Icons/info-" + ("dark" if theme.get_dark
 info_icon_alternate = tk.PhotoImage(file="Icons/info-" + ("dark" if not theme.get_dark() else "light" + "-theme.png"))
 info_icon_label = tk.Label(position_frame, image=info_icon_default, background=theme.background, foreground=theme.foreground, cursor=theme.cursor)
 info_icon_label.grid(row=0, column=2, sticky="n", padx=5)
-info_icon_label.bind("<Button-1>", lambda event: mb.showinfo(title="Select Position", message="Choose either long or short as your position entries for the back-test."))
+info_icon_label.bind("<Button-1>", lambda event: mb.showinfo(title="Select Position", message="Choose long or short as your position entries for the back-test. Both tests longs and shorts side by side, and Stop And Reverse closes each position by entering the opposite one."))
+IMAGES_THEME_COMBOS.append([info_icon_default, info_icon_alternate, info_icon_label])
+
+
+# Create Space
+space_frame = tk.Frame(content_frame, background=theme.background)
+space_frame.pack(pady=10)
+
+
+# Interval Frame
+interval_frame = tk.Frame(content_frame, background=theme.background)
+interval_frame.pack()
+
+
+# Interval Label
+interval_label = tk.Label(interval_frame, text="Interval:", background=theme.background, foreground=theme.foreground, font=("tkDefaultFont", 16))
+interval_label.grid(row=0, column=0, sticky="n")
+
+
+# Datalist Frame
+interval_datalist_frame = tk.Frame(interval_frame, background=theme.background)
+interval_datalist_frame.grid(row=0, column=1, sticky="n")
+
+
+# Interval Datalist
+interval_datalist = DataList(interval_datalist_frame, INTERVALS, theme, width, arrow_icon_default)
+IMAGES_THEME_COMBOS.append([arrow_icon_default, arrow_icon_alternate, interval_datalist.return_arrow_label()])
+
+
+# Info Icon
+info_icon_default = tk.PhotoImage(file="Icons/info-" + ("dark" if theme.get_dark() else "light") + "-theme.png")
+info_icon_alternate = tk.PhotoImage(file="Icons/info-" + ("dark" if not theme.get_dark() else "light" + "-theme.png"))
+info_icon_label = tk.Label(interval_frame, image=info_icon_default, background=theme.background, foreground=theme.foreground, cursor=theme.cursor)
+info_icon_label.grid(row=0, column=2, sticky="n", padx=5)
+info_icon_label.bind("<Button-1>", lambda event: mb.showinfo(title="Select Interval", message="Choose the length of the price bars. Leave it empty for daily bars. Intraday bars only go back 7 days for 1m, 60 days for most others and 730 days for 1h, then build up as you keep using them."))
 IMAGES_THEME_COMBOS.append([info_icon_default, info_icon_alternate, info_icon_label])
 
 
@@ -242,14 +277,34 @@ button.bind(
         symbol_datalist.get_selected(),
         position_datalist.get_selected(),
         strategy_datalist.get_selected(),
+        interval=interval_datalist.get_selected(),
         higher_value=parameters.get_higher_value(),
         lower_value=parameters.get_lower_value(),
-        theme=theme
+        theme=theme,
+        profile=profile_variable.get()
     )
 )
 button.pack()
 
 
+# Profile Checkbox - shows how long each stage of the back-test took with its results.
+profile_variable = tk.BooleanVar(value=False)
+profile_checkbutton = tk.Checkbutton(
+    content_frame,
+    text="Show stage timings",
+    variable=profile_variable,
+    background=theme.background,
+    foreground=theme.foreground,
+    selectcolor=theme.background,
+    activebackground=theme.foreground,
+    activeforeground=theme.background,
+    highlightthickness=0,
+    font=("tkDefaultFont", 12),
+    cursor=theme.cursor
+)
+profile_checkbutton.pack()
+
+
 #####       Back-Test Results Frame End        #####
 
 
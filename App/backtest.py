@@ -0,0 +1,154 @@
+import argparse
+import os
+import sys
+import time
+import pandas as pd
+from exceptions import BacktestError
+from price_store import INTERVALS, PriceStore
+from profiling import CAPTURE_MODES, StageProfiler, has_pyinstrument
+from registry import check_parameters, create_strategy, strategy_names
+from strategy import POSITIONS, Strategy
+from trade_log import TradeLog
+
+
+# Run back-tests without the GUI, from Python or the command line. Nothing here imports tkinter.
+# Run with: python backtest.py "MA Crossover" AAPL MSFT --position Long --lower 20 --higher 50
+
+
+class BacktestResult:
+    """ A finished back-test of one ticker: the strategy with its profit, wins, losses and metrics, and its trades. """
+
+
+    def __init__(self, strategy: Strategy, trade_log: TradeLog) -> None:
+        self.__strategy = strategy
+        self.__trade_log = trade_log
+
+
+    def get_strategy(self) -> Strategy:
+        return self.__strategy
+
+
+    def get_trade_log(self) -> TradeLog:
+        return self.__trade_log
+
+
+    def get_profit(self) -> float:
+        return self.__strategy.get_profit()
+
+
+    def get_metrics(self) -> dict[str, float]:
+        return self.__strategy.get_metrics()
+
+
+    def get_side_results(self) -> dict[str, dict]:
+        """ The results of the longs and of the shorts of a Both or Stop And Reverse back-test, keyed by position type. """
+
+        return self.__strategy.get_side_results()
+
+
+    def get_profiler(self) -> StageProfiler:
+        """ The profiler the back-test's stages were recorded with, or None when it was not profiled. """
+
+        return self.__strategy.get_profiler()
+
+
+    def to_row(self) -> dict:
+        """ The result as a row of the batch results table. """
+
+        s = self.__strategy
+        row = {
+            "Ticker": s.get_ticker(),
+            "Strategy": s.get_strategy(),
+            "Position": s.get_position_type(),
+            "Profit": round(s.get_profit(), 2),
+            "Wins": s.get_wins(),
+            "Losses": s.get_losses(),
+            "Win %": round(s.calculate_win_percentage(), 2),
+            "Trades": s.get_wins() + s.get_losses()
+        }
+        row.update({name: round(value, 4) for name, value in s.get_metrics().items()})
+        return row
+
+
+
+def run_backtest(strategy_name: str, ticker: str, position: str, lower_value: int=None, higher_value: int=None, record_trades: bool=True, price_store: PriceStore=None, stop_loss: float=0.0, trailing_stop: float=0.0, interval: str="1d", profiler: StageProfiler=None) -> BacktestResult:
+    """ Back-test one ticker. Raises UnknownStrategy, InvalidParameters, InvalidPosition or PriceDataUnavailable when it cannot be run.
+
+    The stops are fractions of the price, e.g. 0.05 for 5%, and 0 when unused. Intraday intervals are back-tested
+    in chunks from memory-mapped prices. When a profiler is given, it records the loading, indicator and trade stages. """
+
+    check_parameters(strategy_name, lower_value, higher_value)
+    s = create_strategy(strategy_name, ticker, position, lower_value, higher_value)
+    if price_store is not None:
+        s.set_price_store(price_store)
+    s.set_stop_loss(stop_loss)
+    s.set_trailing_stop(trailing_stop)
+    s.set_interval(interval)
+
+    s.set_profiler(profiler)
+
+    trade_log = TradeLog() if record_trades else None
+    s.set_trade_log(trade_log)
+    with s.profile_capture():
+        s.run_stages()
+    return BacktestResult(s, trade_log)
+
+
+def main(argv: list[str]=None) -> int:
+    parser = argparse.ArgumentParser(description="Back-test a strategy on one or more tickers without the GUI.")
+    parser.add_argument("strategy", choices=strategy_names())
+    parser.add_argument("tickers", nargs="+")
+    parser.add_argument("--position", choices=POSITIONS, default="Long", help="Both tests longs and shorts side by side, Stop And Reverse always holds one of them (default: %(default)s).")
+    parser.add_argument("--lower", type=int, default=None, help="Lower parameter value (short MA, oversold level).")
+    parser.add_argument("--higher", type=int, default=None, help="Higher parameter value (long MA, overbought level).")
+    parser.add_argument("--interval", choices=INTERVALS, default="1d", help="Bar length, e.g. 5m or 1h for intraday bars (default: 1d).")
+    parser.add_argument("--stop-loss", type=float, default=0.0, help="Stop-loss as a fraction of the entry price, e.g. 0.05.")
+    parser.add_argument("--trailing-stop", type=float, default=0.0, help="Trailing stop as a fraction of the best price since entry, e.g. 0.1.")
+    parser.add_argument("--output", default=None, help="CSV file to save the results table to.")
+    parser.add_argument("--trades", default=None, help="File to save every trade to: .csv, .parquet, or .sqlite to append to a results store.")
+    parser.add_argument("--offline", action="store_true", help="Only use saved price data.")
+    parser.add_argument("--profile", action="store_true", help="Print the wall time, CPU time, bars and peak memory of each stage of every back-test.")
+    parser.add_argument("--capture", choices=CAPTURE_MODES, default=None, help="Also record every call of each back-test, saving a profile per ticker.")
+    parser.add_argument("--capture-dir", default=".", help="Folder to save the captured profiles to (default: the current folder).")
+    args = parser.parse_args(argv)
+    if args.capture == "pyinstrument" and not has_pyinstrument():
+        parser.error("--capture pyinstrument needs pyinstrument to be installed (pip install pyinstrument)")
+
+    price_store = PriceStore(offline=True) if args.offline else None
+    start = time.perf_counter()
+    rows = []
+    trade_log = TradeLog()
+    failed = 0
+    for ticker in args.tickers:
+        profiler = StageProfiler(capture=args.capture) if args.profile or args.capture is not None else None
+        try:
+            result = run_backtest(args.strategy, ticker, args.position, args.lower, args.higher, args.trades is not None, price_store, args.stop_loss, args.trailing_stop, args.interval, profiler)
+        except BacktestError as error:
+            print(f"{ticker}: {error}", file=sys.stderr)
+            failed += 1
+            continue
+
+        rows.append(result.to_row())
+        if args.trades is not None:
+            trade_log.extend(result.get_trade_log())
+        metrics = result.get_metrics()
+        print(f"{ticker}: profit {rows[-1]['Profit']}, win % {rows[-1]['Win %']}, trades {rows[-1]['Trades']}, max drawdown {metrics['Max Drawdown %']:.2f}%, Sharpe {metrics['Sharpe']:.2f}")
+        for position, side in result.get_side_results().items():
+            print(f"  {position + 's':<7} profit {side['Profit']:.2f}, win % {side['Win %']:.2f}, trades {side['Trades']}, max drawdown {side['Max Drawdown %']:.2f}%, Sharpe {side['Sharpe']:.2f}")
+        if args.profile:
+            print("\n".join("  " + line for line in profiler.summary().split("\n")))
+        if args.capture is not None:
+            path = os.path.join(args.capture_dir, ticker + "_" + args.strategy.replace(" ", "_") + (".prof" if args.capture == "cprofile" else ".html"))
+            profiler.save_capture(path)
+            print(f"  Saved the {args.capture} profile to {path}")
+
+    if args.output is not None and len(rows) != 0:
+        pd.DataFrame(rows).to_csv(args.output, index=False)
+    if args.trades is not None:
+        trade_log.write(args.trades)
+    print(f"Finished {len(args.tickers)} tickers in {time.perf_counter() - start:.1f}s.")
+    return 1 if failed != 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,117 @@
+import argparse
+import csv
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterator
+import pandas as pd
+from backtest import run_backtest
+from exceptions import PriceDataUnavailable
+from metrics import METRIC_NAMES
+from price_store import PriceStore
+from registry import strategy_names
+from shared_prices import build_shared_prices
+from strategy import POSITIONS
+from trade_log import TradeLog
+
+
+RESULT_COLUMNS = ["Ticker", "Strategy", "Position", "Profit", "Wins", "Losses", "Win %", "Trades"] + METRIC_NAMES + ["Error"]
+
+# The price store the worker processes of a batch read from, given to each worker once as it starts.
+_price_store = None
+
+
+def read_universe(filename: str) -> list[str]:
+    """ Read the tickers in a universe file, one ticker per line. """
+
+    with open(filename, "r") as file:
+        return [line.strip() for line in file if line.strip() != ""]
+
+
+def backtest_ticker(strategy_name: str, ticker: str, position: str, lower_value: int=None, higher_value: int=None, record_trades: bool=False, price_store: PriceStore=None) -> tuple[dict, TradeLog]:
+    """ Back-test one ticker without any message boxes and return its row of the results table, with its trades when they are recorded.
+
+    The prices come from the price store, else the one the worker was given, else the default store. """
+
+    result = {"Ticker": ticker, "Strategy": strategy_name, "Position": position, "Profit": 0.0, "Wins": 0, "Losses": 0, "Win %": 0.0, "Trades": 0, "Error": ""}
+    result.update({name: 0.0 for name in METRIC_NAMES})
+    try:
+        backtest_result = run_backtest(strategy_name, ticker, position, lower_value, higher_value, record_trades, price_store if price_store is not None else _price_store)
+    except PriceDataUnavailable:
+        result["Error"] = "No price data"
+        return result, TradeLog() if record_trades else None
+    except Exception as error:
+        result["Error"] = str(error)
+        return result, TradeLog() if record_trades else None
+
+    result.update(backtest_result.to_row())
+    return result, backtest_result.get_trade_log()
+
+
+def _use_price_store(price_store: PriceStore) -> None:
+    global _price_store
+    _price_store = price_store
+
+
+def run_batch(strategy_name: str, position: str, tickers: list[str], lower_value: int=None, higher_value: int=None, max_workers: int=None, trade_log: TradeLog=None, price_store: PriceStore=None, mp_context=None) -> Iterator[dict]:
+    """ Back-test every ticker over a pool of processes, yielding each row of the results table as soon as it is done.
+
+    When a trade log is given, the trades of every ticker are collected into it. A price store is sent to each worker
+    once as it starts. With SharedPrices that is only its directory, and every worker maps the same files. The workers
+    are started with the multiprocessing context given, else the platform's default. """
+
+    record_trades = trade_log is not None
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context, initializer=_use_price_store, initargs=(price_store,)) as executor:
+        futures = [executor.submit(backtest_ticker, strategy_name, ticker, position, lower_value, higher_value, record_trades) for ticker in tickers]
+        for future in as_completed(futures):
+            result, ticker_trades = future.result()
+            if record_trades:
+                trade_log.extend(ticker_trades)
+            yield result
+
+
+def collect_results(results: Iterator[dict]) -> pd.DataFrame:
+    """ Gather streamed results into one table, most profitable ticker first. """
+
+    table = pd.DataFrame(list(results), columns=RESULT_COLUMNS)
+    return table.sort_values("Profit", ascending=False, ignore_index=True)
+
+
+def main(argv: list[str]=None) -> None:
+    parser = argparse.ArgumentParser(description="Back-test a strategy over every ticker in a universe file.")
+    parser.add_argument("strategy", choices=strategy_names(), help='Strategy name, e.g. "MA Crossover".')
+    parser.add_argument("position", choices=POSITIONS)
+    parser.add_argument("--lower", type=int, help="Lower parameter value (short MA, oversold level).")
+    parser.add_argument("--higher", type=int, help="Higher parameter value (long MA, overbought level).")
+    parser.add_argument("--universe", default="SPX Ticker List.csv", help="File with one ticker per line.")
+    parser.add_argument("--output", default="Batch Results.csv", help="CSV file the results are streamed into.")
+    parser.add_argument("--trades", default=None, help="File to save every trade to: .csv, .parquet, or .sqlite to append to a results store.")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes (default: CPU count).")
+    parser.add_argument("--shared-prices", default=None, help="Directory to gather the universe's prices into first, as memory-mapped files every worker shares.")
+    args = parser.parse_args(argv)
+
+    tickers = read_universe(args.universe)
+    start = time.perf_counter()
+    price_store = None
+    if args.shared_prices is not None:
+        price_store = build_shared_prices(args.shared_prices, tickers)
+        print(f"Shared the prices of {len(price_store)} tickers in {time.perf_counter() - start:.1f}s.")
+    results = []
+    trade_log = TradeLog() if args.trades is not None else None
+    with open(args.output, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=RESULT_COLUMNS)
+        writer.writeheader()
+        for count, result in enumerate(run_batch(args.strategy, args.position, tickers, args.lower, args.higher, args.workers, trade_log, price_store), start=1):
+            writer.writerow(result)
+            results.append(result)
+            file.flush()
+            print(f"[{count}/{len(tickers)}] {result['Ticker']}: {result['Error'] or 'Profit ' + str(result['Profit'])}")
+
+    # Rewrite the streamed file in ranked order now that every ticker is in.
+    collect_results(results).to_csv(args.output, index=False)
+    if trade_log is not None:
+        trade_log.write(args.trades)
+    print(f"Finished {len(tickers)} tickers in {time.perf_counter() - start:.1f}s. Results saved to {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,190 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+import numpy as np
+import pandas as pd
+from price_store import PriceStore
+from registry import create_strategy
+from synthetic import GENERATORS
+
+
+# Times setup_data, test_long and test_short of every strategy on seeded synthetic prices, so it runs offline and
+# every run tests the same bars. The results can be saved as a baseline that later runs are compared against.
+# Run with: python benchmark_suite.py [--save-baseline]
+
+
+# The parameters each strategy is benchmarked with.
+PARAMETERS = {"MA Crossover": (20, 50), "RSI Overbought Oversold": (30, 70), "Bollinger Bands": (None, None), "MACD": (12, 26), "Channel Breakout": (10, 20)}
+
+# The stages of a back-test that are timed.
+STAGES = ("setup_data", "test_long", "test_short")
+
+# The bars of each history. Synthetic daily bars run back from 2023, so pandas dates allow up to about 90,000 of them.
+LENGTHS = (1_000, 10_000, 50_000)
+
+BASELINE_FILE = "Benchmark Baseline.json"
+
+# A stage is flagged when it is this much slower, or holds this much more memory, than in the baseline.
+TOLERANCE = 0.25
+
+
+def write_histories(price_store: PriceStore, lengths: list[int], seed: int=0) -> list[tuple[str, str, int]]:
+    """ Save a synthetic history for every generator and length into the price store. Returns the (ticker, generator, bars) of each. """
+
+    histories = []
+    for generator_name, generator in GENERATORS.items():
+        for bars in lengths:
+            ticker = f"{generator_name.upper()}{bars}"
+            data = generator(bars, seed)
+            price_store.save(ticker, "1d", data.drop(columns="Regime", errors="ignore"))
+            histories.append((ticker, generator_name, bars))
+    return histories
+
+
+def create_benchmarked_strategy(strategy_name: str, ticker: str, price_store: PriceStore):
+    """ A strategy reading from the price store that calculates its indicators on every run and keeps no trade log. """
+
+    s = create_strategy(strategy_name, ticker, "Long", *PARAMETERS[strategy_name])
+    s.set_price_store(price_store)
+    s.set_indicator_cache(None)
+    s.set_trade_log(None)
+    return s
+
+
+def time_stage(strategy, stage: str, data: pd.DataFrame, repeat: int) -> float:
+    """ Best wall time of a stage in seconds. Copying the data is not timed. """
+
+    best = float("inf")
+    for _ in range(repeat):
+        copy = data.copy() if stage != "setup_data" else None
+        start = time.perf_counter()
+        if stage == "setup_data":
+            strategy.setup_data()
+        else:
+            getattr(strategy, stage)(copy)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def stage_peak_memory(strategy, stage: str, data: pd.DataFrame) -> int:
+    """ The most memory a stage held at once in bytes, as seen by tracemalloc. It is measured on a run of its own, as tracing slows the stage down. """
+
+    copy = data.copy() if stage != "setup_data" else None
+    tracemalloc.start()
+    if stage == "setup_data":
+        strategy.setup_data()
+    else:
+        getattr(strategy, stage)(copy)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def run_suite(lengths: list[int]=LENGTHS, repeat: int=5, seed: int=0) -> dict[str, dict]:
+    """ Benchmark every stage of every strategy on every synthetic history. Results are keyed by generator/bars/strategy/stage. """
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        price_store = PriceStore(directory, offline=True)
+        for ticker, generator_name, bars in write_histories(price_store, lengths, seed):
+            for strategy_name in PARAMETERS:
+                s = create_benchmarked_strategy(strategy_name, ticker, price_store)
+                data = s.setup_data()
+                for stage in STAGES:
+                    seconds = time_stage(s, stage, data, repeat)
+                    results[f"{generator_name}/{bars}/{strategy_name}/{stage}"] = {
+                        "bars": bars,
+                        "seconds": seconds,
+                        "bars_per_second": bars / seconds if seconds > 0 else float("inf"),
+                        "peak_bytes": stage_peak_memory(s, stage, data)
+                    }
+    return results
+
+
+def environment() -> dict[str, str]:
+    """ The versions the results were measured with, as timings only compare on the same machine and libraries. """
+
+    return {"python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__, "platform": platform.platform(), "processor": platform.processor() or platform.machine()}
+
+
+def save_baseline(path: str, results: dict[str, dict]) -> None:
+    with open(path, "w") as file:
+        json.dump({"environment": environment(), "results": results}, file, indent=2)
+    return
+
+
+def load_baseline(path: str) -> dict:
+    """ Read a saved baseline, or None if there is none. """
+
+    if not os.path.exists(path):
+        return None
+    with open(path) as file:
+        return json.load(file)
+
+
+def find_regressions(results: dict[str, dict], baseline: dict[str, dict], tolerance: float=TOLERANCE) -> list[str]:
+    """ Describe every stage that is slower or holds more memory than in the baseline by more than the tolerance. Stages not in the baseline are skipped. """
+
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        before = baseline[key]
+        if result["seconds"] > before["seconds"] * (1 + tolerance):
+            regressions.append(f"{key}: {before['bars_per_second']:,.0f} -> {result['bars_per_second']:,.0f} bars/s ({result['seconds'] / before['seconds'] - 1:+.0%} time)")
+        if result["peak_bytes"] > before["peak_bytes"] * (1 + tolerance):
+            regressions.append(f"{key}: {before['peak_bytes'] / 2 ** 20:.1f} -> {result['peak_bytes'] / 2 ** 20:.1f} MiB peak ({result['peak_bytes'] / before['peak_bytes'] - 1:+.0%} memory)")
+    return regressions
+
+
+def print_results(results: dict[str, dict], baseline: dict[str, dict]=None) -> None:
+    for key, result in results.items():
+        line = f"  {key:<52} {result['bars_per_second']:>13,.0f} bars/s {result['peak_bytes'] / 2 ** 20:8.1f} MiB"
+        if baseline is not None and key in baseline:
+            line += f"  {result['seconds'] / baseline[key]['seconds'] - 1:+6.0%} time"
+        print(line)
+    return
+
+
+def main(argv: list[str]=None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark every strategy on seeded synthetic prices and compare against a saved baseline.")
+    parser.add_argument("--lengths", type=int, nargs="+", default=list(LENGTHS), help="Bars of each synthetic history (default: %(default)s).")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs of each stage, of which the fastest is kept (default: %(default)s).")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic prices (default: %(default)s).")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="JSON file of the baseline results (default: %(default)s).")
+    parser.add_argument("--save-baseline", action="store_true", help="Save the results as the new baseline instead of comparing against it.")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="Fraction slower or larger a stage may be before it is flagged (default: %(default)s).")
+    args = parser.parse_args(argv)
+
+    warnings.simplefilter("ignore", FutureWarning)
+    results = run_suite(args.lengths, args.repeat, args.seed)
+    baseline = load_baseline(args.baseline) if not args.save_baseline else None
+
+    print_results(results, baseline["results"] if baseline is not None else None)
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"Saved the baseline to {args.baseline}")
+        return
+    if baseline is None:
+        print(f"No baseline at {args.baseline} to compare against. Save one with --save-baseline.")
+        return
+
+    if baseline["environment"] != environment():
+        print(f"The baseline was measured on {baseline['environment']}, so the timings may not compare.")
+    regressions = find_regressions(results, baseline["results"], args.tolerance)
+    if len(regressions) != 0:
+        print(f"{len(regressions)} regressions beyond {args.tolerance:.0%}:")
+        for regression in regressions:
+            print("  " + regression)
+        sys.exit(1)
+    print(f"No regressions beyond {args.tolerance:.0%}.")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
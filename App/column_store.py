@@ -0,0 +1,232 @@
+import io
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+
+
+# Price history kept as a directory of column files: one .npy file per column, the bar times in nanoseconds since
+# the epoch (UTC), and a JSON file describing them. The files are memory-mapped, so only the bars read are loaded.
+
+META_FILE = "meta.json"
+DATES_FILE = "dates.npy"
+
+# Float columns are stored as float32 when they read back the same, which Yahoo's intraday prices always do. Prices
+# quoted to at most this many decimals are stored as float32 too, and rounded back to those decimals when read.
+PRICE_COLUMNS = ("Open", "High", "Low", "Close")
+PRICE_DECIMALS = 4
+
+
+def float32_safe(name: str, values: np.ndarray) -> bool:
+    """ Check whether a column can be stored as float32 and read back unchanged. """
+
+    if values.dtype != np.float64:
+        return False
+    narrowed = values.astype(np.float32).astype(np.float64)
+    if np.array_equal(narrowed, values, equal_nan=True):
+        return True
+    return name in PRICE_COLUMNS and np.array_equal(np.round(values, PRICE_DECIMALS), values, equal_nan=True) and np.array_equal(np.round(narrowed, PRICE_DECIMALS), values, equal_nan=True)
+
+
+def column_file(directory: str, name: str) -> str:
+    return os.path.join(directory, name.replace(" ", "_") + ".npy")
+
+
+def write_prices(directory: str, data: pd.DataFrame) -> None:
+    """ Save price history with a date index as column files, replacing any saved before.
+
+    The files are written to a new directory that is then moved into place, so readers never see half a save. """
+
+    staging = directory + ".saving"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    index = pd.DatetimeIndex(data.index)
+    np.save(os.path.join(staging, DATES_FILE), index.asi8)
+    dtypes = {}
+    rounded = []
+    for name in data.columns:
+        values = data[name].to_numpy()
+        if float32_safe(name, values):
+            narrowed = values.astype(np.float32)
+            if not np.array_equal(narrowed.astype(np.float64), values, equal_nan=True):
+                rounded.append(name)
+            values = narrowed
+        np.save(column_file(staging, name), values)
+        dtypes[name] = str(values.dtype)
+
+    meta = {"columns": list(data.columns), "dtypes": dtypes, "rounded": rounded, "timezone": str(index.tz) if index.tz is not None else None, "index_name": index.name, "bars": len(index)}
+    with open(os.path.join(staging, META_FILE), "w") as file:
+        json.dump(meta, file)
+    replace_directory(staging, directory)
+    return
+
+
+def append_prices(directory: str, data: pd.DataFrame) -> bool:
+    """ Add newer bars to saved column files without reading the bars already saved. Returns False, changing nothing,
+    when they cannot be appended and the whole history must be saved again instead.
+
+    Saved bars from the first new bar's time onwards are replaced by the new ones. Each column's data is written in
+    place after the bars kept and its header updated to the new length. The bar count in the JSON file is replaced
+    last, and readers only map that many bars, so a reader opening the files part way through sees the old bars. """
+
+    meta = read_meta(directory)
+    index = pd.DatetimeIndex(data.index)
+    if list(data.columns) != meta["columns"] or (str(index.tz) if index.tz is not None else None) != meta["timezone"] or len(index) == 0:
+        return False
+    keep = int(np.searchsorted(np.load(os.path.join(directory, DATES_FILE), mmap_mode="r")[:meta["bars"]], index.asi8[0]))
+    bars = keep + len(index)
+    if bars < meta["bars"]:
+        return False # Truncating the files would pull them out from under readers that map them.
+
+    columns = {os.path.join(directory, DATES_FILE): index.asi8}
+    rounded = set(meta.get("rounded", []))
+    for name in data.columns:
+        values = data[name].to_numpy()
+        if meta["dtypes"][name] == "float32":
+            if not float32_safe(name, values):
+                return False
+            narrowed = values.astype(np.float32)
+            if name not in rounded and not np.array_equal(narrowed.astype(np.float64), values, equal_nan=True):
+                return False
+            values = narrowed
+        elif str(values.dtype) != meta["dtypes"][name]:
+            return False
+        columns[column_file(directory, name)] = values
+
+    headers = {}
+    for path, values in columns.items():
+        headers[path] = npy_header(path, values.dtype, bars)
+        if headers[path] is None:
+            return False
+    for path, values in columns.items():
+        with open(path, "r+b") as file:
+            file.write(headers[path])
+            file.seek(len(headers[path]) + keep * values.dtype.itemsize)
+            file.write(np.ascontiguousarray(values).tobytes())
+
+    meta["bars"] = bars
+    with open(os.path.join(directory, META_FILE + ".saving"), "w") as file:
+        json.dump(meta, file)
+    os.replace(os.path.join(directory, META_FILE + ".saving"), os.path.join(directory, META_FILE))
+    return True
+
+
+def npy_header(path: str, dtype: np.dtype, bars: int) -> bytes:
+    """ The header of a saved column resized to the number of bars, or None when it would not fit in the old header's space. """
+
+    with open(path, "rb") as file:
+        version = np.lib.format.read_magic(file)
+        read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+        shape, fortran_order, saved_dtype = read_header(file)
+        size = file.tell()
+    if saved_dtype != dtype or fortran_order or len(shape) != 1:
+        return None
+
+    header = io.BytesIO()
+    write_header = np.lib.format.write_array_header_1_0 if version == (1, 0) else np.lib.format.write_array_header_2_0
+    write_header(header, {"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": (bars,)})
+    return header.getvalue() if len(header.getvalue()) == size else None
+
+
+def read_meta(directory: str) -> dict:
+    with open(os.path.join(directory, META_FILE)) as file:
+        return json.load(file)
+
+
+def replace_directory(staging: str, directory: str) -> None:
+    """ Move a finished directory of files into place over the one it replaces. """
+
+    # The old files may still be mapped by a reader, which keeps them readable until it lets go of them.
+    if os.path.exists(directory):
+        retired = directory + ".old"
+        shutil.rmtree(retired, ignore_errors=True)
+        os.replace(directory, retired)
+        shutil.rmtree(retired, ignore_errors=True)
+    os.replace(staging, directory)
+    return
+
+
+def has_prices(directory: str) -> bool:
+    return os.path.exists(os.path.join(directory, META_FILE))
+
+
+
+class MappedDates:
+    """ The bar times of memory-mapped prices. Indexing converts only the bars asked for to timestamps. """
+
+
+    def __init__(self, nanoseconds: np.ndarray, timezone: str=None, name: str=None) -> None:
+        self.__nanoseconds = nanoseconds
+        self.__timezone = timezone
+        self.__name = name
+
+
+    def __getitem__(self, bars):
+        values = self.__nanoseconds[bars]
+        if np.ndim(values) == 0:
+            timestamp = pd.Timestamp(int(values), unit="ns")
+            return timestamp.tz_localize("UTC").tz_convert(self.__timezone) if self.__timezone is not None else timestamp
+        dates = pd.DatetimeIndex(np.asarray(values).view("datetime64[ns]"), name=self.__name)
+        return dates.tz_localize("UTC").tz_convert(self.__timezone) if self.__timezone is not None else dates
+
+
+    def __len__(self) -> int:
+        return len(self.__nanoseconds)
+
+
+
+class MappedPrices:
+    """ Price history read from column files without loading it. Columns are memory-mapped arrays as stored, while
+    values and frame read just the bars asked for back into the float64 values that were saved. """
+
+
+    def __init__(self, directory: str) -> None:
+        meta = read_meta(directory)
+        bars = meta["bars"] # The files may already hold bars that are still being appended.
+        self.__directory = directory
+        self.__names = meta["columns"]
+        self.__rounded = set(meta.get("rounded", []))
+        self.__columns = {name: np.load(column_file(directory, name), mmap_mode="r")[:bars] for name in self.__names}
+        self.__dates = MappedDates(np.load(os.path.join(directory, DATES_FILE), mmap_mode="r")[:bars], meta["timezone"], meta["index_name"])
+
+
+    def __len__(self) -> int:
+        return len(self.__dates)
+
+
+    def column(self, name: str) -> np.ndarray:
+        """ The memory-mapped values of a column, in the type they were stored as. """
+
+        return self.__columns[name]
+
+
+    def values(self, name: str, start: int=0, stop: int=None) -> np.ndarray:
+        """ A copy of the bars from start to stop of a column, as they were saved. """
+
+        values = self.__columns[name][start:stop]
+        if values.dtype != np.float32:
+            return np.array(values)
+        if name in self.__rounded:
+            return np.round(values.astype(np.float64), PRICE_DECIMALS)
+        return values.astype(np.float64)
+
+
+    def frame(self, start: int=0, stop: int=None) -> pd.DataFrame:
+        """ The bars from start to stop as a DataFrame, like the one the price history was saved from. """
+
+        stop = stop if stop is not None else len(self)
+        return pd.DataFrame({name: self.values(name, start, stop) for name in self.__names}, index=self.__dates[start:stop])
+
+
+    def get_dates(self) -> MappedDates:
+        return self.__dates
+
+
+    def get_columns(self) -> list[str]:
+        return self.__names
+
+
+    def get_directory(self) -> str:
+        return self.__directory
\ No newline at end of file
@@ -1,13 +1,21 @@
 import tkinter as tk
+from search_index import SearchIndex
 from styles import Theme
 
+
+DEBOUNCE_DELAY = 100 # Milliseconds after the last key press before the listbox is filtered.
+
+
 class DataList:
     """ Simulates a datalist in HTML. Requires a Frame and some data in the type list. """
 
 
     def __init__(self, datalist_frame: tk.Frame, data: list, theme: Theme=Theme(), width=None, arrow: tk.PhotoImage=None, *args, **kwargs) -> None:
         self.__all_data = data
+        self.__index = SearchIndex(data)
         self.__new_data = []
+        self.__shown_data = []
+        self.__pending_search = None
         self.__theme = theme
 
         entry_frame = tk.Frame(datalist_frame, background=theme.background, highlightbackground=theme.foreground, highlightthickness=1)
@@ -17,10 +25,10 @@ class DataList:
         self.__arrow_label.grid(row=0, column=1)
 
         self.__entry = tk.Entry(entry_frame, relief="flat", background=theme.background, foreground=theme.foreground, insertbackground=theme.foreground, width=width, font=("tkDefaultFont", 14))
-        self.__entry.bind("<KeyRelease>", lambda event: self.show_new_data())
+        self.__entry.bind("<KeyRelease>", lambda event: self.schedule_search())
         self.__entry.grid(row=0, column=0)
 
-        self.__listbox = tk.Listbox(datalist_frame, relief="flat", background=theme.background, foreground=theme.foreground, highlightbackground=theme.border, highlightthickness=1, width=width, font=("tkDefaultFont", 14))
+        self.__listbox = tk.Listbox(datalist_frame, relief="flat", background=theme.background, foreground=theme.foreground, highlightbackground=theme.border, highlightthickness=1, selectbackground=theme.foreground, selectforeground=theme.background, width=width, font=("tkDefaultFont", 14))
         self.__listbox.bind("<<ListboxSelect>>", lambda event: self.insert_selected_data())
         self.__listbox.pack(fill="x")
 
@@ -28,12 +36,18 @@ class DataList:
 
 
     def get_new_list(self) -> None:
-        """ Once a character is entered, insert the new data into the listbox. """
+        """ Once a character is entered, find the data containing it from the search index. """
 
-        self.__new_data = []
-        for data in self.__all_data:
-            if self.__entry.get().lower() in str(data).lower():
-                self.__new_data.append(data)
+        self.__new_data = self.__index.search(self.__entry.get())
+        return
+
+
+    def schedule_search(self) -> None:
+        """ Filter the listbox once typing pauses, rather than on every key press. """
+
+        if self.__pending_search is not None:
+            self.__entry.after_cancel(self.__pending_search)
+        self.__pending_search = self.__entry.after(DEBOUNCE_DELAY, self.show_new_data)
         return
 
 
@@ -62,16 +76,32 @@ class DataList:
     def show_new_data(self) -> None:
         """ If there are any characters in the entry, display the listbox. If not, then hide the listbox. """
 
+        self.__pending_search = None
         if len(self.__entry.get()) != 0:
             self.get_new_list()
-            self.__listbox.config(listvariable=tk.Variable(value=self.__new_data))
+            self.update_listbox()
             self.__listbox.pack(fill="x")
-            for x in range(self.__listbox.size()):
-                self.__listbox.itemconfig(x, selectbackground=self.__theme.foreground, selectforeground=self.__theme.background)
         else:
             self.__listbox.pack_forget()
         return
 
 
+    def update_listbox(self) -> None:
+        """ Change only the rows that differ: the rows the new data shares at the start with the shown rows are kept. """
+
+        kept = 0
+        for shown, new in zip(self.__shown_data, self.__new_data):
+            if shown != new:
+                break
+            kept += 1
+
+        if kept < len(self.__shown_data):
+            self.__listbox.delete(kept, "end")
+        if kept < len(self.__new_data):
+            self.__listbox.insert("end", *self.__new_data[kept:])
+        self.__shown_data = self.__new_data
+        return
+
+
     def get_listbox(self) -> tk.Listbox:
         return self.__listbox
\ No newline at end of file
@@ -0,0 +1,331 @@
+import importlib.util
+import numpy as np
+
+
+# Signals are boolean masks over the bars of a price series. A signal on bar i is
+# filled at the open of bar i + 1, so signals on the final bar can never be traded.
+
+# The kernels the position state machine can be run with. "numba" needs numba to be installed.
+KERNELS = ("python", "numpy", "numba")
+
+# The state machine compiled by numba, the first time it is used.
+_compiled_kernel = None
+
+
+class TradeList:
+    """ The trades found by pairing entry and exit signals for one position type.
+
+    Bars are stored as the signal bars, the trades are filled at the open of the following bar. A trade closed by a stop
+    during a bar is stored with the bar before as its exit bar, so it is still closed on the bar after its exit bar.
+    A trade that was still open after the last bar is kept separately in open_bar and open_price. """
+
+
+    def __init__(self, position: str, entry_bars: np.ndarray, exit_bars: np.ndarray, entry_prices: np.ndarray, exit_prices: np.ndarray, open_bar: int=-1, open_price: float=0.0) -> None:
+        self.position = position
+        self.entry_bars = entry_bars
+        self.exit_bars = exit_bars
+        self.entry_prices = entry_prices
+        self.exit_prices = exit_prices
+        self.profits = exit_prices - entry_prices if position == "Long" else entry_prices - exit_prices
+        self.open_bar = open_bar
+        self.open_price = open_price
+
+
+    def __len__(self) -> int:
+        return len(self.entry_bars)
+
+
+    def has_open_position(self) -> bool:
+        """ Check whether a trade was left open at the end of the data. """
+
+        return self.open_bar != -1
+
+
+
+def previous(values: np.ndarray) -> np.ndarray:
+    """ Shift the values forward by one bar so each bar sees the value of the bar before it. The first bar gets NaN. """
+
+    values = np.asarray(values, dtype=np.float64)
+    shifted = np.empty_like(values)
+    shifted[:1] = np.nan
+    shifted[1:] = values[:-1]
+    return shifted
+
+
+def crossed_above(values: np.ndarray, level) -> np.ndarray:
+    """ Bars where the values move from below the level to above it. The level may be a number or an array. """
+
+    values = np.asarray(values, dtype=np.float64)
+    level = np.broadcast_to(np.asarray(level, dtype=np.float64), values.shape)
+    return (previous(values) < previous(level)) & (values > level)
+
+
+def crossed_below(values: np.ndarray, level) -> np.ndarray:
+    """ Bars where the values move from above the level to below it. The level may be a number or an array. """
+
+    values = np.asarray(values, dtype=np.float64)
+    level = np.broadcast_to(np.asarray(level, dtype=np.float64), values.shape)
+    return (previous(values) > previous(level)) & (values < level)
+
+
+def reverse_signals(signals: dict[str, tuple[np.ndarray, np.ndarray]]) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+    """ Turn long and short signals into stop and reverse signals: each side exits on the other side's entries.
+
+    A bar with both entry signals says nothing about which way to go, so neither is taken on it. """
+
+    long_entries, short_entries = signals["Long"][0], signals["Short"][0]
+    both = long_entries & short_entries
+    long_entries, short_entries = long_entries & ~both, short_entries & ~both
+    return {"Long": (long_entries, short_entries), "Short": (short_entries, long_entries)}
+
+
+def pair_signals(entries: np.ndarray, exits: np.ndarray) -> tuple[np.ndarray, np.ndarray, int]:
+    """ Pair entry and exit signals into trades.
+
+    An entry only opens a trade when no trade is open and an exit only closes an open trade,
+    exactly like the position_open flag in a bar by bar loop. Returns the entry bars and exit bars
+    of the closed trades and the entry bar of a trade left open at the end (-1 if there is none). """
+
+    entries = np.array(entries, dtype=bool)
+    exits = np.array(exits, dtype=bool)
+    if len(entries) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), -1
+
+    # There is no next bar to fill a signal on the last bar.
+    entries[-1] = False
+    exits[-1] = False
+
+    if np.any(entries & exits):
+        return _pair_signals_sequentially(entries, exits)
+
+    # With no bar carrying both signals the position after each bar is set by the latest signal seen.
+    bars = np.arange(len(entries))
+    last_signal = np.maximum.accumulate(np.where(entries | exits, bars, -1))
+    holding = (last_signal >= 0) & entries[np.maximum(last_signal, 0)]
+    changes = np.diff(holding.astype(np.int8), prepend=np.int8(0))
+
+    entry_bars = np.flatnonzero(changes == 1)
+    exit_bars = np.flatnonzero(changes == -1)
+    if len(entry_bars) > len(exit_bars):
+        return entry_bars[:-1], exit_bars, int(entry_bars[-1])
+    return entry_bars, exit_bars, -1
+
+
+def _pair_signals_sequentially(entries: np.ndarray, exits: np.ndarray) -> tuple[np.ndarray, np.ndarray, int]:
+    """ Pair signals one trade at a time. Needed when a bar holds both an entry and an exit, as the signal acted on then depends on the open position. """
+
+    entry_signals = np.flatnonzero(entries)
+    exit_signals = np.flatnonzero(exits)
+    entry_bars = []
+    exit_bars = []
+    bar = 0
+
+    while True:
+        index = np.searchsorted(entry_signals, bar)
+        if index == len(entry_signals):
+            break
+        entry_bars.append(entry_signals[index])
+
+        index = np.searchsorted(exit_signals, entry_bars[-1], side="right")
+        if index == len(exit_signals):
+            break
+        exit_bars.append(exit_signals[index])
+        bar = exit_bars[-1] + 1
+
+    open_bar = -1
+    if len(entry_bars) > len(exit_bars):
+        open_bar = int(entry_bars.pop())
+    return np.array(entry_bars, dtype=np.int64), np.array(exit_bars, dtype=np.int64), open_bar
+
+
+def position_kernel(opens: np.ndarray, highs: np.ndarray, lows: np.ndarray, entries: np.ndarray, exits: np.ndarray, sign: int, stop_loss: float, trailing_stop: float, entry_bars: np.ndarray, exit_bars: np.ndarray, exit_prices: np.ndarray) -> tuple[int, int]:
+    """ Run the open and close state machine bar by bar, writing each closed trade into the output arrays.
+
+    The stops are fractions of the price, 0 when unused. The stop-loss is set from the fill price and the trailing stop
+    from the best high (long) or low (short) since the fill. A stop is checked from the fill bar on, before that bar's
+    signals, and fills at the stop price or at the open if the price gapped through it. Only numbers and arrays are used,
+    so numba can compile it as it is. Returns the number of closed trades and the entry bar of a trade left open (-1 if there is none). """
+
+    bars = len(opens)
+    count = 0
+    holding = False
+    entry_bar = -1
+    fill = 0.0
+    extreme = 0.0
+
+    for bar in range(bars):
+        if holding and (stop_loss > 0 or trailing_stop > 0):
+            if sign > 0:
+                level = -np.inf
+                if stop_loss > 0:
+                    level = fill * (1 - stop_loss)
+                if trailing_stop > 0:
+                    level = max(level, extreme * (1 - trailing_stop))
+                stopped = lows[bar] <= level
+                price = min(opens[bar], level)
+                extreme = max(extreme, highs[bar])
+            else:
+                level = np.inf
+                if stop_loss > 0:
+                    level = fill * (1 + stop_loss)
+                if trailing_stop > 0:
+                    level = min(level, extreme * (1 + trailing_stop))
+                stopped = highs[bar] >= level
+                price = max(opens[bar], level)
+                extreme = min(extreme, lows[bar])
+
+            if stopped:
+                entry_bars[count] = entry_bar
+                exit_bars[count] = bar - 1
+                exit_prices[count] = price
+                count += 1
+                holding = False
+
+        # There is no next bar to fill a signal on the last bar.
+        if bar == bars - 1:
+            break
+
+        if holding:
+            if exits[bar]:
+                entry_bars[count] = entry_bar
+                exit_bars[count] = bar
+                exit_prices[count] = opens[bar + 1]
+                count += 1
+                holding = False
+        elif entries[bar]:
+            holding = True
+            entry_bar = bar
+            fill = opens[bar + 1]
+            extreme = fill
+
+    return count, entry_bar if holding else -1
+
+
+def has_numba() -> bool:
+    """ Check whether numba is installed, without importing it. """
+
+    return importlib.util.find_spec("numba") is not None
+
+
+def default_kernel() -> str:
+    """ The fastest kernel available: numba when it is installed, otherwise NumPy. """
+
+    return "numba" if has_numba() else "numpy"
+
+
+def compiled_kernel():
+    """ The state machine compiled by numba. It is compiled on the first call and cached on disk between runs. """
+
+    global _compiled_kernel
+    if _compiled_kernel is None:
+        import numba
+        _compiled_kernel = numba.njit(cache=True, nogil=True)(position_kernel)
+    return _compiled_kernel
+
+
+def _stopped_positions(opens: np.ndarray, highs: np.ndarray, lows: np.ndarray, entries: np.ndarray, exits: np.ndarray, sign: int, stop_loss: float, trailing_stop: float) -> tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """ The NumPy version of the state machine with stops. It loops over the trades rather than the bars, finding where each trade is stopped with array operations. """
+
+    bars = len(opens)
+    entry_signals = np.flatnonzero(entries[:-1])
+    exit_signals = np.flatnonzero(exits[:-1])
+    entry_bars = []
+    exit_bars = []
+    exit_prices = []
+    bar = 0
+
+    while True:
+        index = np.searchsorted(entry_signals, bar)
+        if index == len(entry_signals):
+            return np.array(entry_bars, dtype=np.int64), np.array(exit_bars, dtype=np.int64), np.array(exit_prices, dtype=np.float64), -1
+        entry_bar = int(entry_signals[index])
+        fill = opens[entry_bar + 1]
+
+        # The stops are checked from the fill bar up to the exit signal bar, as the exit fills at the open after it.
+        index = np.searchsorted(exit_signals, entry_bar, side="right")
+        exit_bar = int(exit_signals[index]) if index != len(exit_signals) else -1
+        last = exit_bar if exit_bar != -1 else bars - 1
+        checked = slice(entry_bar + 1, last + 1)
+
+        if sign > 0:
+            level = np.full(last - entry_bar, fill * (1 - stop_loss) if stop_loss > 0 else -np.inf)
+            if trailing_stop > 0:
+                best = np.maximum.accumulate(np.concatenate(([fill], highs[checked])))[:-1]
+                level = np.maximum(level, best * (1 - trailing_stop))
+            stopped = lows[checked] <= level
+        else:
+            level = np.full(last - entry_bar, fill * (1 + stop_loss) if stop_loss > 0 else np.inf)
+            if trailing_stop > 0:
+                best = np.minimum.accumulate(np.concatenate(([fill], lows[checked])))[:-1]
+                level = np.minimum(level, best * (1 + trailing_stop))
+            stopped = highs[checked] >= level
+
+        if np.any(stopped):
+            offset = int(np.argmax(stopped))
+            stop_bar = entry_bar + 1 + offset
+            entry_bars.append(entry_bar)
+            exit_bars.append(stop_bar - 1)
+            exit_prices.append(min(opens[stop_bar], level[offset]) if sign > 0 else max(opens[stop_bar], level[offset]))
+            bar = stop_bar
+        elif exit_bar != -1:
+            entry_bars.append(entry_bar)
+            exit_bars.append(exit_bar)
+            exit_prices.append(opens[exit_bar + 1])
+            bar = exit_bar + 1
+        else:
+            return np.array(entry_bars, dtype=np.int64), np.array(exit_bars, dtype=np.int64), np.array(exit_prices, dtype=np.float64), entry_bar
+
+
+def run_positions(opens: np.ndarray, entries: np.ndarray, exits: np.ndarray, position: str, highs: np.ndarray=None, lows: np.ndarray=None, stop_loss: float=0.0, trailing_stop: float=0.0, kernel: str=None) -> tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """ Run the position state machine with one of the KERNELS, defaulting to the fastest available.
+
+    The highs and lows are only needed for the stops. Returns the entry bars, exit bars and exit prices of the
+    closed trades and the entry bar of a trade left open at the end (-1 if there is none). """
+
+    kernel = kernel if kernel is not None else default_kernel()
+    if kernel not in KERNELS:
+        raise ValueError("Unknown kernel: " + str(kernel))
+    opens = np.asarray(opens, dtype=np.float64)
+    entries = np.asarray(entries, dtype=bool)
+    exits = np.asarray(exits, dtype=bool)
+    sign = 1 if position == "Long" else -1
+    stopped = stop_loss > 0 or trailing_stop > 0
+    if stopped and (highs is None or lows is None):
+        raise ValueError("The highs and lows are needed for stops.")
+    if len(opens) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64), -1
+
+    if kernel == "numpy":
+        if not stopped:
+            entry_bars, exit_bars, open_bar = pair_signals(entries, exits)
+            return entry_bars, exit_bars, opens[exit_bars + 1], open_bar
+        return _stopped_positions(opens, np.asarray(highs, dtype=np.float64), np.asarray(lows, dtype=np.float64), entries, exits, sign, stop_loss, trailing_stop)
+
+    highs = np.asarray(highs, dtype=np.float64) if highs is not None else opens
+    lows = np.asarray(lows, dtype=np.float64) if lows is not None else opens
+    # There can be no more trades than entry signals.
+    size = int(np.count_nonzero(entries))
+    entry_bars = np.empty(size, dtype=np.int64)
+    exit_bars = np.empty(size, dtype=np.int64)
+    exit_prices = np.empty(size, dtype=np.float64)
+    run = compiled_kernel() if kernel == "numba" else position_kernel
+    count, open_bar = run(opens, highs, lows, entries, exits, sign, float(stop_loss), float(trailing_stop), entry_bars, exit_bars, exit_prices)
+    return entry_bars[:count], exit_bars[:count], exit_prices[:count], int(open_bar)
+
+
+def build_trades(opens: np.ndarray, entries: np.ndarray, exits: np.ndarray, position: str, decimals: int=None, highs: np.ndarray=None, lows: np.ndarray=None, stop_loss: float=0.0, trailing_stop: float=0.0, kernel: str=None) -> TradeList:
+    """ Run the position state machine and price the trades, rounding the prices when decimals is given.
+
+    Trades open at the open of the bar after the entry signal and close at the open after the exit signal, or at the stop price when a stop is hit. """
+
+    opens = np.asarray(opens, dtype=np.float64)
+    entry_bars, exit_bars, exit_prices, open_bar = run_positions(opens, entries, exits, position, highs, lows, stop_loss, trailing_stop, kernel)
+
+    entry_prices = opens[entry_bars + 1]
+    open_price = opens[open_bar + 1] if open_bar != -1 else 0.0
+    if decimals is not None:
+        entry_prices = np.round(entry_prices, decimals)
+        exit_prices = np.round(exit_prices, decimals)
+        open_price = np.round(open_price, decimals)
+
+    return TradeList(position, entry_bars, exit_bars, entry_prices, exit_prices, open_bar, float(open_price))
\ No newline at end of file
@@ -0,0 +1,207 @@
+import json
+import queue
+import sys
+import time
+from collections import deque
+
+
+# Event levels, lowest first. An event log only passes on events at or above its level.
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+OFF = 100
+
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR"}
+
+
+class Event:
+    """ Something that happened during a back-test, such as a closed trade or a finished run, with its details as fields. """
+
+
+    def __init__(self, level: int, kind: str, fields: dict) -> None:
+        self.time = time.time()
+        self.level = level
+        self.kind = kind
+        self.fields = fields
+
+
+    def to_dict(self) -> dict:
+        return {"time": self.time, "level": LEVEL_NAMES.get(self.level, str(self.level)), "kind": self.kind, **self.fields}
+
+
+    def __repr__(self) -> str:
+        return "Event(" + LEVEL_NAMES.get(self.level, str(self.level)) + ", " + self.kind + ", " + str(self.fields) + ")"
+
+
+
+class NullSink:
+    """ Throws every event away. """
+
+
+    def write(self, event: Event) -> None:
+        return
+
+
+    def close(self) -> None:
+        return
+
+
+
+class RingBufferSink:
+    """ Keeps the most recent events in memory, dropping the oldest once capacity is reached. """
+
+
+    def __init__(self, capacity: int=10_000) -> None:
+        self.__events = deque(maxlen=capacity)
+
+
+    def write(self, event: Event) -> None:
+        self.__events.append(event)
+        return
+
+
+    def get_events(self, kind: str=None) -> list[Event]:
+        """ The kept events, oldest first, optionally only those of one kind. """
+
+        return [event for event in self.__events if kind is None or event.kind == kind]
+
+
+    def clear(self) -> None:
+        self.__events.clear()
+        return
+
+
+    def close(self) -> None:
+        return
+
+
+    def __len__(self) -> int:
+        return len(self.__events)
+
+
+
+class QueueSink:
+    """ Puts each event on a queue, for another thread to pick up. """
+
+
+    def __init__(self, events: queue.Queue) -> None:
+        self.__events = events
+
+
+    def write(self, event: Event) -> None:
+        self.__events.put(event)
+        return
+
+
+    def close(self) -> None:
+        return
+
+
+
+class FileSink:
+    """ Writes each event as a line of JSON to a file, or to an open stream such as sys.stdout. """
+
+
+    def __init__(self, target=sys.stdout) -> None:
+        self.__owns_file = isinstance(target, str)
+        self.__file = open(target, "a", encoding="utf-8") if self.__owns_file else target
+
+
+    def write(self, event: Event) -> None:
+        self.__file.write(json.dumps(event.to_dict(), default=str) + "\n")
+        return
+
+
+    def close(self) -> None:
+        if self.__owns_file: self.__file.close()
+        else: self.__file.flush()
+        return
+
+
+
+class EventLog:
+    """ Passes events at or above a level on to its sinks.
+
+    Check is_enabled before building an event inside a loop: with no sinks, or a level above the event's,
+    it is False and nothing else needs to be done. """
+
+
+    def __init__(self, level: int=INFO, sinks: list=None) -> None:
+        self.__sinks = list(sinks) if sinks is not None else []
+        self.set_level(level)
+
+
+    def is_enabled(self, level: int) -> bool:
+        return level >= self.__threshold
+
+
+    def log(self, level: int, kind: str, **fields) -> None:
+        if level < self.__threshold:
+            return
+        event = Event(level, kind, fields)
+        for sink in self.__sinks:
+            sink.write(event)
+        return
+
+
+    def debug(self, kind: str, **fields) -> None:
+        self.log(DEBUG, kind, **fields)
+        return
+
+
+    def info(self, kind: str, **fields) -> None:
+        self.log(INFO, kind, **fields)
+        return
+
+
+    def warning(self, kind: str, **fields) -> None:
+        self.log(WARNING, kind, **fields)
+        return
+
+
+    def error(self, kind: str, **fields) -> None:
+        self.log(ERROR, kind, **fields)
+        return
+
+
+    def add_sink(self, sink) -> None:
+        self.__sinks.append(sink)
+        self.__update_threshold()
+        return
+
+
+    def remove_sink(self, sink) -> None:
+        self.__sinks.remove(sink)
+        self.__update_threshold()
+        return
+
+
+    def close(self) -> None:
+        for sink in self.__sinks:
+            sink.close()
+        return
+
+
+    def get_sinks(self) -> list:
+        return self.__sinks
+
+
+    def get_level(self) -> int:
+        return self.__level
+
+
+    def set_level(self, level: int) -> None:
+        self.__level = level
+        self.__update_threshold()
+        return
+
+
+    def __update_threshold(self) -> None:
+        # With nowhere to send events every level is off, so callers skip building them.
+        self.__threshold = self.__level if len(self.__sinks) != 0 else OFF
+
+
+
+# Strategies log here unless given their own event log. It has no sinks, so it is off until one is added.
+default_event_log = EventLog()
\ No newline at end of file
@@ -0,0 +1,32 @@
+class BacktestError(Exception):
+    """ The base of every error a back-test raises on purpose. """
+
+
+
+class PriceDataUnavailable(BacktestError):
+    """ Raised when there is no price history for the ticker, online or saved. """
+
+
+
+class BacktestCancelled(BacktestError):
+    """ Raised inside a back-test that was cancelled through its cancel event. """
+
+
+
+class UnknownStrategy(BacktestError, ValueError):
+    """ Raised when no registered strategy has the name asked for. """
+
+
+
+class InvalidPosition(BacktestError, ValueError):
+    """ Raised when the position type is not one the strategy can test. """
+
+
+
+class InvalidParameters(BacktestError, ValueError):
+    """ Raised when a strategy's parameters are out of bounds or out of order. """
+
+
+
+class InvalidPlugin(BacktestError):
+    """ Raised when a plugin does not declare its strategies as StrategySpecs the registry can use. """
\ No newline at end of file
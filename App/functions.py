@@ -1,7 +1,18 @@
+import os
 import tkinter as tk
 import tkinter.messagebox as mb
 from styles import Theme
-from strategy import *
+from exceptions import BacktestError, InvalidPosition, PriceDataUnavailable
+from price_store import INTERVALS
+from profiling import StageProfiler
+from registry import create_strategy, get_strategy_spec, strategy_names
+from runner import BacktestRunner
+from strategy import POSITIONS, Strategy
+from trade_log import FILE_TYPES
+
+
+POLL_INTERVAL = 50 # Milliseconds between checks on a running back-test.
+TICKER_SETS = {} # The tickers of each ticker list file read, for checking a ticker is valid.
 
 
 def get_ticker_list(filename: str) -> list[str]:
@@ -16,8 +27,16 @@ def get_ticker_list(filename: str) -> list[str]:
     return ticker_list
 
 
+def get_ticker_set(filename: str) -> frozenset[str]:
+    """ The tickers within the CSV file as a set, read from the file the first time only. """
+
+    if filename not in TICKER_SETS:
+        TICKER_SETS[filename] = frozenset(get_ticker_list(filename))
+    return TICKER_SETS[filename]
+
+
 def strategy_list() -> list[str]:
-    return ["MA Crossover", "RSI Overbought Oversold", "Bollinger Bands"]
+    return strategy_names()
 
 
 def validate_positive_integer(num: int):
@@ -26,41 +45,131 @@ def validate_positive_integer(num: int):
     return num > 0
 
 
-def check_higher_lower_values_valid(lower_value: int, higher_value: int) -> bool:
-    """ Check that the smaller number is smaller than the larger number. """
-    return lower_value < higher_value
-
-
-def process_backtest(backtest_results_container: tk.Frame, ticker: str, position: str, strategy_name: str, theme: Theme, **kwargs) -> None:
-    """ Carry out the backtest. Any strategy parameters are passed as keyword arguments. """
+def process_backtest(backtest_results_container: tk.Frame, ticker: str, position: str, strategy_name: str, theme: Theme, interval: str="1d", profile: bool=False, **kwargs) -> None:
+    """ Carry out the backtest. Any strategy parameters are passed as keyword arguments. No interval chosen means daily bars.
+    When profiling, the time and memory of each stage are shown with the results. """
     
     if ticker == "" or position == "" or strategy_name == "":
         mb.showwarning(title="Empty Inputs", message="Please fill in all the inputs.")
         return
 
-    elif position != "Long" and position != "Short": return mb.showwarning(title="Invalid Position Chosen", message='Position must be "Long" or "Short".')
-    elif ticker not in get_ticker_list("SPX Ticker List.csv"): return mb.showwarning(title="Invalid Ticker", message="Please choose a valid ticker.")
+    elif position not in POSITIONS: return mb.showwarning(title="Invalid Position Chosen", message="Position must be one of " + ", ".join(POSITIONS) + ".")
+    elif ticker not in get_ticker_set("SPX Ticker List.csv"): return mb.showwarning(title="Invalid Ticker", message="Please choose a valid ticker.")
     elif strategy_name not in strategy_list(): return mb.showwarning(title="Invalid Strategy", message="Please choose a valid strategy.")
 
-    if strategy_name == "MA Crossover":
-        if not check_higher_lower_values_valid(kwargs["lower_value"], kwargs["higher_value"]):
-            mb.showwarning(title="Invalid Parameters", message="Your parameters are invalid. Please check them before submitting.")
+    interval = interval if interval != "" else "1d"
+    if interval not in INTERVALS: return mb.showwarning(title="Invalid Interval", message="Please choose a valid interval.")
+
+    if not get_strategy_spec(strategy_name).validate(kwargs.get("lower_value"), kwargs.get("higher_value")):
+        mb.showwarning(title="Invalid Parameters", message="Your parameters are invalid. Please check them before submitting.")
+        return
+
+    if getattr(backtest_results_container, "runner", None) is not None and backtest_results_container.runner.is_running():
+        mb.showwarning(title="Back-Test Running", message="A back-test is already running. Cancel it or wait for it to finish.")
+        return
+
+    s = create_strategy(strategy_name, ticker, position, kwargs.get("lower_value"), kwargs.get("higher_value"))
+    s.set_interval(interval)
+    if profile:
+        s.set_profiler(StageProfiler())
+    runner = BacktestRunner(s)
+    backtest_results_container.runner = runner
+
+    backtest_results_container.winfo_children()[0].destroy()
+
+    progress_frame = tk.Frame(backtest_results_container, background=theme.background)
+    progress_frame.pack(pady=10)
+
+    progress_label = tk.Label(progress_frame, text="Starting back-test...", background=theme.background, foreground=theme.foreground, font=("tkDefaultFont", 14))
+    progress_label.pack()
+
+    cancel_button_frame = tk.Frame(progress_frame, background=theme.background, highlightbackground=theme.foreground, highlightthickness=1)
+    cancel_button_frame.pack(pady=10)
+    cancel_button = tk.Button(
+        cancel_button_frame,
+        text="Cancel",
+        background=theme.background,
+        foreground=theme.foreground,
+        relief="flat",
+        font=("tkDefaultFont", 12),
+        activebackground=theme.foreground,
+        activeforeground=theme.background,
+        cursor=theme.cursor,
+        command=lambda: [runner.cancel(), progress_label.config(text="Cancelling...")]
+    )
+    cancel_button.pack()
+
+    runner.start()
+    backtest_results_container.after(POLL_INTERVAL, lambda: poll_backtest(backtest_results_container, runner, progress_label, theme))
+    return
+
+
+def poll_backtest(backtest_results_container: tk.Frame, runner: BacktestRunner, progress_label: tk.Label, theme: Theme) -> None:
+    """ Show the progress of a running back-test and display its results once it ends. Reschedules itself until then. """
+
+    for event in runner.get_events():
+        if event.kind == "Back-Test Progress":
+            progress_label.config(text=describe_progress(event.fields))
+
+        elif event.kind == "Back-Test Complete":
+            s = runner.get_strategy()
+            # Tk only lays out new widgets once it is idle, so that is done inside the stage to time all of it.
+            # The stage ends before the timings are shown, so they include it.
+            with s.profile_stage("Showing results"):
+                display_backtest_results(backtest_results_container, s, theme)
+                backtest_results_container.update_idletasks()
+            if s.get_profiler() is not None:
+                display_stage_timings(backtest_results_container.winfo_children()[0], s.get_profiler(), theme)
+            mb.showinfo(title="Back-Test Complete", message="The back-test has been completed. " + describe_trade_log(event.fields["trade_log"]))
             return
 
-        s = MovingAverageCrossoverStrategy(ticker, position, kwargs["lower_value"], kwargs["higher_value"])
-        s.process_backtest()
+        elif event.kind == "Back-Test Cancelled":
+            backtest_results_container.winfo_children()[0].destroy()
+            tk.Frame(backtest_results_container, background=theme.background).pack()
+            return
 
-    elif strategy_name == "RSI Overbought Oversold":
-        if not check_higher_lower_values_valid(kwargs["lower_value"], kwargs["higher_value"]):
-            mb.showwarning(title="Invalid Parameters", message="Your parameters are invalid. Please check them before submitting.")
+        elif event.kind == "Back-Test Failed":
+            backtest_results_container.winfo_children()[0].destroy()
+            tk.Frame(backtest_results_container, background=theme.background).pack()
+            show_backtest_error(event.fields["error"])
             return
 
-        s = RSI_OverboughtOversoldStrategy(ticker, position, kwargs["lower_value"], kwargs["higher_value"])
-        s.process_backtest()
+    backtest_results_container.after(POLL_INTERVAL, lambda: poll_backtest(backtest_results_container, runner, progress_label, theme))
+    return
+
+
+def show_backtest_error(error: Exception) -> None:
+    """ Tell the user why a back-test failed with a message box suited to the error. """
+
+    if isinstance(error, PriceDataUnavailable):
+        mb.showwarning(title="Price Data Unavailable", message=str(error) + ". There is no saved price data for this ticker, so please check your network connection and try again.")
+    elif isinstance(error, InvalidPosition):
+        mb.showerror(title="Position Type Not Known", message="There seems to be a problem with the specified position. Please restart the app.")
+    elif isinstance(error, BacktestError):
+        mb.showwarning(title="Back-Test Failed", message=str(error))
+    else:
+        mb.showerror(title="Back-Test Failed", message="The back-test could not be completed: " + str(error))
+    return
+
+
+def describe_trade_log(path: str) -> str:
+    """ A sentence telling the user where the trades were logged, naming the type of file. """
+
+    file_type = FILE_TYPES.get(os.path.splitext(path)[1].lower(), "file")
+    return "All trades have been logged to the " + file_type + " " + os.path.basename(path) + "."
+
+
+def describe_progress(fields: dict) -> str:
+    """ A line of text describing a back-test progress event. """
 
-    elif strategy_name == "Bollinger Bands":
-        s = BollingerBandsStrategy(ticker, position)
-        s.process_backtest()
+    text = fields["stage"] + " for " + fields["ticker"]
+    if "bars" in fields: text += " - " + str(fields["bars"]) + " bars"
+    if "trades" in fields: text += ", " + str(fields["trades"]) + " trades"
+    return text + "..."
+
+
+def display_backtest_results(backtest_results_container: tk.Frame, s: Strategy, theme: Theme) -> None:
+    """ Replace the contents of the results container with the profit and win rate of a finished back-test. """
 
     backtest_results_container.winfo_children()[0].destroy()
 
@@ -75,10 +184,32 @@ def process_backtest(backtest_results_container: tk.Frame, ticker: str, position
 
     winning_percetange_label = tk.Label(results_frame, text=("Winning %: " + str(round(s.calculate_win_percentage(), 2))), background=theme.background, foreground=theme.foreground, font=("tkDefaultFont", 16))
     winning_percetange_label.pack()
+
+    metrics = s.get_metrics()
+    risk_label = tk.Label(results_frame, text=("Max Drawdown: " + str(round(metrics["Max Drawdown %"], 2)) + "%   Sharpe: " + str(round(metrics["Sharpe"], 2))), background=theme.background, foreground=theme.foreground, font=("tkDefaultFont", 12))
+    risk_label.pack()
+
+    # Both and Stop And Reverse back-tests also show the longs and the shorts side by side.
+    side_results = s.get_side_results()
+    if len(side_results) != 0:
+        sides_frame = tk.Frame(results_frame, background=theme.background)
+        sides_frame.pack(pady=5)
+        for column, (position, result) in enumerate(side_results.items()):
+            side_text = position + "s\nP/L: $" + str(round(result["Profit"], 2)) + "\nWinning %: " + str(round(result["Win %"], 2)) + "\nTrades: " + str(result["Trades"]) + "\nSharpe: " + str(round(result["Sharpe"], 2))
+            side_label = tk.Label(sides_frame, text=side_text, background=theme.background, foreground=theme.foreground, font=("tkDefaultFont", 12))
+            side_label.grid(row=0, column=column, padx=15)
         
     return
 
 
+def display_stage_timings(results_frame: tk.Frame, profiler: StageProfiler, theme: Theme) -> None:
+    """ Add the wall time, CPU time, bars and peak memory of each stage of a profiled back-test below its results. """
+
+    timings_label = tk.Label(results_frame, text=profiler.summary(), justify="left", background=theme.background, foreground=theme.foreground, font=("TkFixedFont", 10))
+    timings_label.pack(pady=5)
+    return
+
+
 def find_longest_value(data: list[str]) -> int:
     """ Find the value with the longest length in a list. """
 
@@ -136,4 +267,13 @@ def perform_theme_change(app: tk.Tk, theme: Theme) -> None:
 
         if "activeforeground" in widget.keys():
             widget.configure(activeforeground=theme.background)
+
+        if "selectbackground" in widget.keys():
+            widget.configure(selectbackground=theme.foreground)
+
+        if "selectforeground" in widget.keys():
+            widget.configure(selectforeground=theme.background)
+
+        if "selectcolor" in widget.keys():
+            widget.configure(selectcolor=theme.background)
     return
\ No newline at end of file
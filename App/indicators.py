@@ -0,0 +1,131 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+
+def moving_average(close: pd.Series, window: int) -> np.ndarray:
+    return close.rolling(window).mean().to_numpy()
+
+
+def rolling_std(close: pd.Series, window: int) -> np.ndarray:
+    return close.rolling(window).std().to_numpy()
+
+
+def exponential_moving_average(values: pd.Series, span: int) -> np.ndarray:
+    """ The recursive EMA with a smoothing factor of 2 / (span + 1), NaN until span values have been seen. """
+
+    return values.ewm(span=span, adjust=False, min_periods=span).mean().to_numpy()
+
+
+def rolling_max(values: pd.Series, window: int) -> np.ndarray:
+    return values.rolling(window).max().to_numpy()
+
+
+def rolling_min(values: pd.Series, window: int) -> np.ndarray:
+    return values.rolling(window).min().to_numpy()
+
+
+def relative_strength_index(close: pd.Series, window: int=14) -> np.ndarray:
+    """ The RSI from simple rolling averages of the up and down moves, aligned with the close prices. A dates x tickers frame gives one column per ticker. """
+
+    # Gather all differences between close prices. The first bar has none, so its window is not full until a bar later.
+    change = close.diff()
+
+    up_days = change.clip(lower=0) # Set all the down days to 0 to get all the up days.
+    down_days = change.clip(upper=0) # Set all the up days to 0 to get the down days.
+
+    avg_up = up_days.rolling(window).mean() # Get the average of the up days.
+    avg_down = down_days.rolling(window).mean().abs() # Get the average of the down days (get only the numerical value, not the signage).
+
+    rsi = (100 * avg_up) / (avg_up + avg_down)
+    return rsi.to_numpy()
+
+
+def data_version(data: pd.DataFrame) -> tuple:
+    """ Identify a version of the price data, which changes when bars are added or the history is adjusted. """
+
+    if len(data) == 0:
+        return (0,)
+    close = data['Close']
+    return (len(data), data.index[0], data.index[-1], float(close.iloc[0]), float(close.iloc[-1]))
+
+
+
+class IndicatorCache:
+    """ Keeps calculated indicators so repeated runs and parameter sweeps reuse them.
+
+    Entries are keyed by (ticker, data version, indicator name, window) and the least recently used
+    entries are dropped once the arrays take up more than max_bytes. Cached arrays are read-only. """
+
+
+    def __init__(self, max_bytes: int=256 * 1024 * 1024) -> None:
+        self.__max_bytes = max_bytes
+        self.__entries = OrderedDict()
+        self.__size = 0
+        self.__lock = threading.Lock()
+
+
+    def get(self, key: tuple, calculate) -> np.ndarray:
+        """ Return the indicator stored under the key, calculating and storing it when it is missing. """
+
+        with self.__lock:
+            if key in self.__entries:
+                self.__entries.move_to_end(key)
+                return self.__entries[key]
+
+        values = np.asarray(calculate())
+        values.flags.writeable = False
+        self.put(key, values)
+        return values
+
+
+    def put(self, key: tuple, values: np.ndarray) -> None:
+        with self.__lock:
+            if key in self.__entries:
+                self.__size -= self.__entries.pop(key).nbytes
+            if values.nbytes > self.__max_bytes:
+                return
+
+            self.__entries[key] = values
+            self.__size += values.nbytes
+            while self.__size > self.__max_bytes:
+                self.__size -= self.__entries.popitem(last=False)[1].nbytes
+        return
+
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__entries.clear()
+            self.__size = 0
+        return
+
+
+    def __contains__(self, key: tuple) -> bool:
+        return key in self.__entries
+
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+
+    def get_size(self) -> int:
+        """ The number of bytes held by the cached arrays. """
+
+        return self.__size
+
+
+    def get_max_bytes(self) -> int:
+        return self.__max_bytes
+
+
+    def set_max_bytes(self, max_bytes: int) -> None:
+        self.__max_bytes = max_bytes
+        with self.__lock:
+            while self.__size > self.__max_bytes:
+                self.__size -= self.__entries.popitem(last=False)[1].nbytes
+        return
+
+
+
+default_cache = IndicatorCache()
\ No newline at end of file
@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+from engine import TradeList
+
+
+# The names the metrics are reported under, as used in the batch results table.
+METRIC_NAMES = ["Max Drawdown %", "Sharpe", "Sortino", "CAGR %", "Exposure %", "Profit Factor", "Average Trade"]
+
+# The bars in a year of 252 trading days of each interval, as Yahoo Finance splits the 6.5 hour session, for annualising the ratios.
+BARS_PER_YEAR = {"1m": 98_280, "2m": 49_140, "5m": 19_656, "15m": 6_552, "30m": 3_276, "60m": 1_764, "90m": 1_260, "1h": 1_764, "1d": 252, "5d": 50, "1wk": 52, "1mo": 12, "3mo": 4}
+
+
+def bars_per_year(interval: str) -> int:
+    return BARS_PER_YEAR.get(interval, 252)
+
+
+def held_bars(length: int, trades: TradeList) -> tuple[np.ndarray, np.ndarray]:
+    """ Which bars a position is held at the close of, and the entry price of the position held on each bar.
+
+    A trade is held from the bar it is filled on (the bar after its entry signal) up to, not including, the bar it is closed on. """
+
+    entry_fills = trades.entry_bars + 1
+    exit_fills = trades.exit_bars + 1
+    entry_prices = trades.entry_prices
+    if trades.has_open_position():
+        entry_fills = np.append(entry_fills, trades.open_bar + 1)
+        entry_prices = np.append(entry_prices, trades.open_price)
+
+    changes = np.zeros(length + 1, dtype=np.int64)
+    np.add.at(changes, entry_fills, 1)
+    np.add.at(changes, exit_fills, -1)
+    held = np.cumsum(changes[:length]) > 0
+
+    prices = np.zeros(length)
+    prices[entry_fills] = entry_prices
+    filled = np.zeros(length, dtype=bool)
+    filled[entry_fills] = True
+    latest_entry = np.maximum.accumulate(np.where(filled, np.arange(length), 0))
+    return held, prices[latest_entry]
+
+
+def equity_curve(closes: np.ndarray, trades: TradeList, capital: float=None) -> np.ndarray:
+    """ The value of the account at each close: the capital, plus the profit of closed trades, plus the open trade marked to the close.
+
+    The strategies trade one share, so the capital defaults to the price of a share at the first close. """
+
+    closes = np.asarray(closes, dtype=np.float64)
+    capital = capital if capital is not None else closes[0]
+    sign = 1 if trades.position == "Long" else -1
+
+    realised = np.zeros(len(closes) + 1)
+    np.add.at(realised, trades.exit_bars + 1, trades.profits)
+    held, entry_prices = held_bars(len(closes), trades)
+    unrealised = np.where(held, sign * (closes - entry_prices), 0.0)
+    return capital + np.cumsum(realised[:len(closes)]) + unrealised
+
+
+def max_drawdown(equity: np.ndarray) -> float:
+    """ The largest fall from a peak of the equity curve, as a negative percentage of the peak. """
+
+    if len(equity) == 0:
+        return 0.0
+    return float(np.min(equity / np.maximum.accumulate(equity) - 1) * 100)
+
+
+def sharpe_ratio(returns: np.ndarray, periods_per_year: int=252) -> float:
+    """ The annualised mean of the returns over their standard deviation, with no risk-free rate. """
+
+    deviation = np.std(returns, ddof=1) if len(returns) > 1 else 0.0
+    if deviation == 0:
+        return 0.0
+    return float(np.mean(returns) / deviation * np.sqrt(periods_per_year))
+
+
+def sortino_ratio(returns: np.ndarray, periods_per_year: int=252) -> float:
+    """ Like the Sharpe ratio, but only the losing returns count as risk. """
+
+    downside = np.sqrt(np.mean(np.minimum(returns, 0.0) ** 2)) if len(returns) != 0 else 0.0
+    if downside == 0:
+        return 0.0
+    return float(np.mean(returns) / downside * np.sqrt(periods_per_year))
+
+
+def compound_annual_growth(equity: np.ndarray, years: float) -> float:
+    """ The yearly growth rate that takes the first equity to the last over the years, as a percentage. """
+
+    if len(equity) == 0 or years <= 0 or equity[0] <= 0 or equity[-1] <= 0:
+        return 0.0
+    return float(((equity[-1] / equity[0]) ** (1 / years) - 1) * 100)
+
+
+def profit_factor(profits: np.ndarray) -> float:
+    """ The total of the winning trades over the total of the losing trades. """
+
+    gains = profits[profits > 0].sum()
+    losses = -profits[profits < 0].sum()
+    if losses == 0:
+        return float("inf") if gains > 0 else 0.0
+    return float(gains / losses)
+
+
+def calculate_metrics(data: pd.DataFrame, trades: TradeList | list[TradeList], capital: float=None, periods_per_year: int=252) -> dict[str, float]:
+    """ Every metric of a back-test, keyed by the names in METRIC_NAMES. The data may be a DataFrame or a dict of arrays.
+
+    The trades may be a list of TradeLists traded side by side from the same capital, such as the longs and shorts of
+    one back-test. The years for the CAGR come from the dates when the data has a date index, otherwise from periods_per_year. """
+
+    closes = np.asarray(data['Close'], dtype=np.float64)
+    if len(closes) == 0:
+        return {name: 0.0 for name in METRIC_NAMES}
+
+    trade_lists = trades if isinstance(trades, list) else [trades]
+    capital = capital if capital is not None else closes[0]
+    equity = equity_curve(closes, trade_lists[0], capital)
+    for other in trade_lists[1:]:
+        equity = equity + equity_curve(closes, other, 0.0)
+    # Returns are the daily profit over the starting capital. One share is traded whatever the equity, so they do not compound.
+    returns = np.diff(equity) / capital
+    held = np.logical_or.reduce([held_bars(len(closes), trade_list)[0] for trade_list in trade_lists])
+    profits = np.concatenate([trade_list.profits for trade_list in trade_lists])
+
+    index = getattr(data, "index", None)
+    if isinstance(index, pd.DatetimeIndex) and len(index) > 1:
+        years = (index[-1] - index[0]).days / 365.25
+    else:
+        years = len(closes) / periods_per_year
+
+    return {
+        "Max Drawdown %": max_drawdown(equity),
+        "Sharpe": sharpe_ratio(returns, periods_per_year),
+        "Sortino": sortino_ratio(returns, periods_per_year),
+        "CAGR %": compound_annual_growth(equity, years),
+        "Exposure %": float(np.mean(held) * 100),
+        "Profit Factor": profit_factor(profits),
+        "Average Trade": float(np.mean(profits)) if len(profits) != 0 else 0.0
+    }
\ No newline at end of file
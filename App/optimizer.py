@@ -0,0 +1,122 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from registry import create_strategy, get_strategy_spec, strategy_names
+
+
+# The price columns and indicators shared by every worker process of a sweep.
+_columns = None
+
+
+def parse_range(text: str) -> list[int]:
+    """ Read a range written as start:stop or start:stop:step (stop included), or a single value. """
+
+    parts = [int(part) for part in text.split(":")]
+    if len(parts) == 1:
+        return parts
+    step = parts[2] if len(parts) == 3 else 1
+    return list(range(parts[0], parts[1] + 1, step))
+
+
+def valid_pairs(strategy_name: str, lower_values: list[int], higher_values: list[int]) -> list[tuple[int, int]]:
+    """ All the parameter pairs the strategy accepts, e.g. where the lower value is below the higher value. """
+
+    spec = get_strategy_spec(strategy_name)
+    return [(lower, higher) for lower in lower_values for higher in higher_values if spec.validate(lower, higher)]
+
+
+def prepare_columns(strategy_name: str, ticker: str, position: str, data: pd.DataFrame, pairs: list[tuple[int, int]]) -> dict[str, np.ndarray]:
+    """ Calculate every indicator the pairs need once. Indicators shared by many pairs, or left by earlier runs, come from the indicator cache. """
+
+    columns = {"Open": data['Open'].to_numpy(), "Close": data['Close'].to_numpy()}
+    for lower, higher in pairs:
+        columns.update(create_strategy(strategy_name, ticker, position, lower, higher).compute_indicators(data))
+    return columns
+
+
+def evaluate_pairs(strategy_name: str, ticker: str, position: str, pairs: list[tuple[int, int]], columns: dict[str, np.ndarray]=None) -> list[dict]:
+    """ Back-test each parameter pair on the shared columns. """
+
+    columns = columns if columns is not None else _columns
+    results = []
+    for lower, higher in pairs:
+        s = create_strategy(strategy_name, ticker, position, lower, higher)
+        s.tally_trades(columns, s.find_trades(columns, position))
+        results.append({
+            "Lower": lower,
+            "Higher": higher,
+            "Profit": round(s.get_profit(), 2),
+            "Wins": s.get_wins(),
+            "Losses": s.get_losses(),
+            "Win %": round(s.calculate_win_percentage(), 2),
+            "Trades": s.get_wins() + s.get_losses()
+        })
+    return results
+
+
+def _share_columns(columns: dict[str, np.ndarray]) -> None:
+    global _columns
+    _columns = columns
+
+
+def optimise(strategy_name: str, ticker: str, position: str, lower_values: list[int], higher_values: list[int], max_workers: int=None, price_store=None) -> pd.DataFrame:
+    """ Back-test every valid pair of lower and higher values on one ticker and rank them by profit.
+
+    The price history is read once and the indicators are calculated once before the pairs are spread over a pool of processes. """
+
+    pairs = valid_pairs(strategy_name, lower_values, higher_values)
+    if len(pairs) == 0:
+        raise ValueError("No valid parameter pairs: the values must be within the strategy's bounds and every lower value below a higher value.")
+
+    s = create_strategy(strategy_name, ticker, position, *pairs[0])
+    if price_store is not None:
+        s.set_price_store(price_store)
+    data = s.get_price_store().get(ticker)
+    if data.empty:
+        raise ValueError("No price data for " + ticker)
+
+    columns = prepare_columns(strategy_name, ticker, position, data, pairs)
+
+    if max_workers == 1:
+        results = evaluate_pairs(strategy_name, ticker, position, pairs, columns)
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_share_columns, initargs=(columns,)) as executor:
+            chunk_count = (max_workers or os.cpu_count()) * 4
+            chunks = [pairs[start::chunk_count] for start in range(chunk_count) if len(pairs[start::chunk_count]) != 0]
+            futures = [executor.submit(evaluate_pairs, strategy_name, ticker, position, chunk) for chunk in chunks]
+            results = [result for future in futures for result in future.result()]
+
+    return pd.DataFrame(results).sort_values(["Profit", "Win %"], ascending=False, ignore_index=True)
+
+
+def profit_grid(results: pd.DataFrame) -> pd.DataFrame:
+    """ Lay the ranked results out as a grid of profits with the lower values as rows and the higher values as columns. """
+
+    return results.pivot(index="Lower", columns="Higher", values="Profit")
+
+
+def main(argv: list[str]=None) -> None:
+    parser = argparse.ArgumentParser(description="Find the best parameters for a strategy on one ticker.")
+    parser.add_argument("strategy", choices=strategy_names(), help='Strategy name, e.g. "MA Crossover".')
+    parser.add_argument("ticker")
+    parser.add_argument("position", choices=["Long", "Short"])
+    parser.add_argument("--lower", type=parse_range, required=True, help="Lower values as start:stop[:step], e.g. 5:55.")
+    parser.add_argument("--higher", type=parse_range, required=True, help="Higher values as start:stop[:step], e.g. 50:250.")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes (default: CPU count).")
+    parser.add_argument("--output", default=None, help="CSV file to save the ranked results to.")
+    parser.add_argument("--top", type=int, default=10, help="Number of the best pairs to print.")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    results = optimise(args.strategy, args.ticker, args.position, args.lower, args.higher, args.workers)
+    print(results.head(args.top).to_string(index=False))
+    print(f"Evaluated {len(results)} pairs in {time.perf_counter() - start:.1f}s.")
+    if args.output is not None:
+        results.to_csv(args.output, index=False)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+from engine import previous
+from indicators import rolling_max, rolling_min
+from registry import Parameter, StrategySpec
+from strategy import Strategy
+from streaming import IndicatorStream, Previous, RollingMax, RollingMin
+
+
+class ChannelBreakoutStrategy(Strategy):
+    """ Back-Test a Channel Breakout (Donchian channel) strategy.
+
+    A long is entered when the close breaks above the highest high of the entry channel and closed when it
+    breaks below the lowest low of the shorter exit channel.
+
+    A short is entered when the close breaks below the lowest low of the entry channel and closed when it
+    breaks above the highest high of the exit channel.
+
+    The exit and entry channel lengths must be passed in as integers. """
+
+    # Calculation:
+    # Channel High = The highest high of the previous N bars (not including the current bar).
+    # Channel Low = The lowest low of the previous N bars (not including the current bar).
+
+
+    def __init__(self, ticker: str, position: str, exit_channel: int, entry_channel: int) -> None:
+        super().__init__(ticker, position)
+        self.set_strategy("Channel Breakout")
+
+        self.__exit_channel = exit_channel
+        self.__entry_channel = entry_channel
+
+
+    def compute_indicators(self, data: pd.DataFrame) -> dict[str, np.ndarray]:
+        indicators = {}
+        for window in (self.__exit_channel, self.__entry_channel):
+            indicators[str(window) + " Channel High"] = self.cached_indicator(data, "Channel High", window, lambda: previous(rolling_max(data['High'], window)))
+            indicators[str(window) + " Channel Low"] = self.cached_indicator(data, "Channel Low", window, lambda: previous(rolling_min(data['Low'], window)))
+        return indicators
+
+
+    def create_indicator_stream(self) -> IndicatorStream:
+        states = {}
+        sources = {}
+        for window in (self.__exit_channel, self.__entry_channel):
+            states[str(window) + " Channel High"] = Previous(RollingMax(window))
+            states[str(window) + " Channel Low"] = Previous(RollingMin(window))
+            sources[str(window) + " Channel High"] = "High"
+            sources[str(window) + " Channel Low"] = "Low"
+        return IndicatorStream(states, sources)
+
+
+    def generate_long_signals(self, data: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+        close = np.asarray(data['Close'])
+        entry_high = np.asarray(data[str(self.__entry_channel) + ' Channel High'])
+        exit_low = np.asarray(data[str(self.__exit_channel) + ' Channel Low'])
+        return close > entry_high, close < exit_low
+
+
+    def generate_short_signals(self, data: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+        close = np.asarray(data['Close'])
+        entry_low = np.asarray(data[str(self.__entry_channel) + ' Channel Low'])
+        exit_high = np.asarray(data[str(self.__exit_channel) + ' Channel High'])
+        return close < entry_low, close > exit_high
+
+
+
+STRATEGIES = [StrategySpec(
+    "Channel Breakout",
+    ChannelBreakoutStrategy,
+    [Parameter("exit_channel", "Exit Channel", 1, 500, 10), Parameter("entry_channel", "Entry Channel", 2, 500, 20)],
+    ordered=True,
+    description="Long on a close above the highest high of the entry channel, short on a close below its lowest low."
+)]
\ No newline at end of file
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+from engine import crossed_above, crossed_below
+from indicators import exponential_moving_average
+from registry import Parameter, StrategySpec
+from strategy import Strategy
+from streaming import IndicatorStream, MovingAverageConvergenceDivergence
+
+
+class MACDStrategy(Strategy):
+    """ Back-Test a MACD strategy.
+
+    A long is entered when the MACD line crosses up through its signal line and closed when it crosses back down.
+
+    A short is entered when the MACD line crosses down through its signal line and closed when it crosses back up.
+
+    The fast and slow EMA lengths must be passed in as integers. The signal line is a 9 period EMA of the MACD line. """
+
+    # Calculation:
+    # MACD = Fast EMA of the close - Slow EMA of the close
+    # Signal = 9 Period EMA of the MACD
+
+
+    def __init__(self, ticker: str, position: str, fast_EMA: int, slow_EMA: int, signal_EMA: int=9) -> None:
+        super().__init__(ticker, position)
+        self.set_strategy("MACD")
+
+        self.__fast_EMA = fast_EMA
+        self.__slow_EMA = slow_EMA
+        self.__signal_EMA = signal_EMA
+
+
+    def compute_indicators(self, data: pd.DataFrame) -> dict[str, np.ndarray]:
+        fast = self.cached_indicator(data, "EMA", self.__fast_EMA, lambda: exponential_moving_average(data['Close'], self.__fast_EMA))
+        slow = self.cached_indicator(data, "EMA", self.__slow_EMA, lambda: exponential_moving_average(data['Close'], self.__slow_EMA))
+        macd = fast - slow
+        name = "MACD Signal " + str(self.__fast_EMA) + "/" + str(self.__slow_EMA)
+        signal = self.cached_indicator(data, name, self.__signal_EMA, lambda: exponential_moving_average(pd.DataFrame(macd), self.__signal_EMA).reshape(macd.shape))
+        return {self.__macd_column(): macd, self.__signal_column(): signal}
+
+
+    def __macd_column(self) -> str:
+        """ The MACD line's column, named after its lengths so the columns of several parameter pairs can sit side by side. """
+
+        return "MACD " + str(self.__fast_EMA) + "/" + str(self.__slow_EMA) + "/" + str(self.__signal_EMA)
+
+
+    def __signal_column(self) -> str:
+        return "MACD Signal " + str(self.__fast_EMA) + "/" + str(self.__slow_EMA) + "/" + str(self.__signal_EMA)
+
+
+    def create_indicator_stream(self) -> IndicatorStream:
+        return IndicatorStream({(self.__macd_column(), self.__signal_column()): MovingAverageConvergenceDivergence(self.__fast_EMA, self.__slow_EMA, self.__signal_EMA)})
+
+
+    def generate_long_signals(self, data: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+        macd = np.asarray(data[self.__macd_column()])
+        return crossed_above(macd, data[self.__signal_column()]), crossed_below(macd, data[self.__signal_column()])
+
+
+    def generate_short_signals(self, data: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+        macd = np.asarray(data[self.__macd_column()])
+        return crossed_below(macd, data[self.__signal_column()]), crossed_above(macd, data[self.__signal_column()])
+
+
+    def generate_signals(self, data: pd.DataFrame) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+        macd = np.asarray(data[self.__macd_column()])
+        above, below = crossed_above(macd, data[self.__signal_column()]), crossed_below(macd, data[self.__signal_column()])
+        return {"Long": (above, below), "Short": (below, above)}
+
+
+
+STRATEGIES = [StrategySpec(
+    "MACD",
+    MACDStrategy,
+    [Parameter("fast_EMA", "Fast EMA", 1, 500, 12), Parameter("slow_EMA", "Slow EMA", 2, 500, 26)],
+    ordered=True,
+    description="Long when the MACD line crosses above its signal line, short when it crosses below."
+)]
\ No newline at end of file
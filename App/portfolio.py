@@ -0,0 +1,237 @@
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from batch import read_universe
+from exceptions import InvalidPosition
+from price_store import PriceStore
+from registry import create_strategy, strategy_names
+
+
+PORTFOLIO_TRADE_COLUMNS = ["Ticker", "Date Open", "Date Close", "Position", "Shares", "Entry Price", "Exit Price", "Trade Profit"]
+
+# The position types a portfolio can be back-tested with. Both and Stop And Reverse would hold a long and a short of one ticker.
+PORTFOLIO_POSITIONS = ["Long", "Short"]
+
+
+class PortfolioResult:
+    """ The outcome of a portfolio back-test: the equity at each close and the trades that were taken. """
+
+
+    def __init__(self, equity_curve: pd.Series, trades: pd.DataFrame, initial_capital: float, open_positions: int) -> None:
+        self.__equity_curve = equity_curve
+        self.__trades = trades
+        self.__initial_capital = initial_capital
+        self.__open_positions = open_positions
+
+
+    def get_equity_curve(self) -> pd.Series:
+        return self.__equity_curve
+
+
+    def get_trades(self) -> pd.DataFrame:
+        return self.__trades
+
+
+    def get_initial_capital(self) -> float:
+        return self.__initial_capital
+
+
+    def get_final_equity(self) -> float:
+        return float(self.__equity_curve.iloc[-1]) if len(self.__equity_curve) != 0 else self.__initial_capital
+
+
+    def get_total_return(self) -> float:
+        """ The gain in equity over the back-test as a percentage of the starting capital. """
+
+        return (self.get_final_equity() / self.__initial_capital - 1) * 100
+
+
+    def get_open_positions(self) -> int:
+        """ The number of positions still open after the last bar. They are valued at the last close. """
+
+        return self.__open_positions
+
+
+
+def align_prices(prices: dict[str, pd.DataFrame], column: str) -> pd.DataFrame:
+    """ One column of every ticker's prices on a shared date axis, as a dates x tickers frame. Dates a ticker has no bar on are NaN. """
+
+    return pd.concat({ticker: data[column] for ticker, data in prices.items()}, axis=1).sort_index()
+
+
+def next_bars(valid: np.ndarray) -> np.ndarray:
+    """ For each date and ticker, the row of the ticker's next bar after that date, or the number of dates when it has none. """
+
+    rows = np.where(valid, np.arange(len(valid))[:, np.newaxis], len(valid))
+    following = np.full(valid.shape, len(valid))
+    following[:-1] = np.minimum.accumulate(rows[::-1], axis=0)[::-1][1:]
+    return following
+
+
+def pair_signal_matrices(entries: np.ndarray, exits: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """ The dates x tickers matrices of the signals that open and close trades, one date at a time with every ticker handled at once.
+
+    A ticker with no trade open takes an entry and one with a trade open takes an exit, the same as pair_signals. """
+
+    opened = np.zeros(entries.shape, dtype=bool)
+    closed = np.zeros(exits.shape, dtype=bool)
+    holding = np.zeros(entries.shape[1], dtype=bool)
+    for bar in range(len(entries)):
+        opened[bar] = entries[bar] & ~holding
+        closed[bar] = exits[bar] & holding
+        holding ^= opened[bar] | closed[bar]
+    return opened, closed
+
+
+def signal_fills(strategy_name: str, prices: dict[str, pd.DataFrame], dates: pd.Index, position: str, lower_value: int=None, higher_value: int=None) -> tuple[np.ndarray, np.ndarray]:
+    """ Boolean dates x tickers matrices of the bars each ticker's trades would be opened and closed on.
+
+    The strategy's indicators and signals are calculated on dates x tickers frames of the aligned prices, so each
+    rolling window runs down every ticker's column at once. The signals are paired the same way as a single-ticker
+    back-test, then moved to the open of the ticker's next bar. A ticker missing a date that others have starts its
+    indicator windows again after it, where a single-ticker back-test would run them across the gap. """
+
+    panel = {column: align_prices(prices, column).reindex(dates) for column in ('Open', 'High', 'Low', 'Close')}
+    s = create_strategy(strategy_name, "Portfolio", position, lower_value, higher_value)
+    s.set_indicator_cache(None) # The cache is keyed by ticker, so it cannot hold a frame of many.
+    columns = {name: frame.to_numpy() for name, frame in panel.items()}
+    columns.update(s.compute_indicators(panel))
+    if position == "Long": entries, exits = s.generate_long_signals(columns)
+    else: entries, exits = s.generate_short_signals(columns)
+
+    # Signals on the last bar of a ticker have no bar to fill on, as with a single ticker.
+    following = next_bars(~np.isnan(columns['Open']))
+    fillable = following < len(dates)
+    opened, closed = pair_signal_matrices(np.asarray(entries) & fillable, np.asarray(exits) & fillable)
+
+    entry_fills = np.zeros((len(dates), len(prices)), dtype=bool)
+    exit_fills = np.zeros((len(dates), len(prices)), dtype=bool)
+    rows, tickers = np.nonzero(opened)
+    entry_fills[following[rows, tickers], tickers] = True
+    rows, tickers = np.nonzero(closed)
+    exit_fills[following[rows, tickers], tickers] = True
+    return entry_fills, exit_fills
+
+
+def simulate(opens: np.ndarray, closes: np.ndarray, entry_fills: np.ndarray, exit_fills: np.ndarray, position: str, initial_capital: float, max_positions: int) -> tuple[np.ndarray, list[tuple], np.ndarray]:
+    """ Trade the fills on a shared pool of capital, one date at a time with every ticker handled at once.
+
+    Exits are filled first so their cash can pay for the day's entries. A new position is given an equal share
+    (1 / max_positions) of the last close's equity, or an equal part of the cash left when that runs short, as whole
+    shares. Entries beyond the free position slots, or that cannot buy a single share, are skipped in ticker order.
+    Short positions hold their sale value as cash set aside. Returns the equity curve, the closed trades as
+    (columns, entry bars, exit bar, shares, entry prices, exit prices, profits) and the columns still held. """
+
+    bars, count = opens.shape
+    sign = 1 if position == "Long" else -1
+    marks = np.nan_to_num(pd.DataFrame(closes).ffill().to_numpy())
+
+    cash = float(initial_capital)
+    shares = np.zeros(count)
+    entry_prices = np.zeros(count)
+    entry_bars = np.zeros(count, dtype=np.int64)
+    holding = np.zeros(count, dtype=bool)
+    equity = np.empty(bars)
+    closed = []
+    last_equity = cash
+
+    for bar in range(bars):
+        exiting = np.flatnonzero(exit_fills[bar] & holding)
+        if len(exiting) != 0:
+            exit_prices = opens[bar, exiting]
+            profits = sign * (exit_prices - entry_prices[exiting]) * shares[exiting]
+            cash += float(np.sum(shares[exiting] * entry_prices[exiting]) + np.sum(profits))
+            closed.append((exiting, entry_bars[exiting], np.full(len(exiting), bar), shares[exiting], entry_prices[exiting], exit_prices, profits))
+            holding[exiting] = False
+            shares[exiting] = 0
+
+        entering = np.flatnonzero(entry_fills[bar] & ~holding)[:max_positions - int(np.count_nonzero(holding))]
+        if len(entering) != 0:
+            fill_prices = opens[bar, entering]
+            budget = min(last_equity / max_positions, cash / len(entering))
+            bought = np.floor(budget / fill_prices)
+            funded = bought > 0
+            entering, fill_prices, bought = entering[funded], fill_prices[funded], bought[funded]
+
+            cash -= float(np.sum(bought * fill_prices))
+            shares[entering] = bought
+            entry_prices[entering] = fill_prices
+            entry_bars[entering] = bar
+            holding[entering] = True
+
+        equity[bar] = cash + np.sum(shares * (entry_prices + sign * (marks[bar] - entry_prices)))
+        last_equity = equity[bar]
+
+    return equity, closed, np.flatnonzero(holding)
+
+
+def backtest_portfolio(strategy_name: str, prices: dict[str, pd.DataFrame], position: str, lower_value: int=None, higher_value: int=None, initial_capital: float=100_000, max_positions: int=10) -> PortfolioResult:
+    """ Run a strategy over many tickers at once, sharing one pool of capital between their positions. Raises InvalidPosition for a position type other than Long or Short. """
+
+    if position not in PORTFOLIO_POSITIONS:
+        raise InvalidPosition("Portfolio back-tests take Long or Short positions, not " + str(position))
+
+    prices = {ticker: data for ticker, data in prices.items() if not data.empty}
+    if len(prices) == 0:
+        raise ValueError("No price data for any ticker.")
+
+    opens = align_prices(prices, 'Open')
+    dates = opens.index
+    closes = align_prices(prices, 'Close').reindex(dates)
+    entry_fills, exit_fills = signal_fills(strategy_name, prices, dates, position, lower_value, higher_value)
+
+    equity, closed, still_open = simulate(opens.to_numpy(), closes.to_numpy(), entry_fills, exit_fills, position, initial_capital, max_positions)
+
+    tickers = np.array(list(prices), dtype=object)
+    if len(closed) != 0:
+        columns, entry_bars, exit_bars, shares, entry_prices, exit_prices, profits = (np.concatenate(parts) for parts in zip(*closed))
+        trades = pd.DataFrame({
+            "Ticker": tickers[columns],
+            "Date Open": dates[entry_bars],
+            "Date Close": dates[exit_bars],
+            "Position": position,
+            "Shares": shares,
+            "Entry Price": entry_prices,
+            "Exit Price": exit_prices,
+            "Trade Profit": profits
+        }, columns=PORTFOLIO_TRADE_COLUMNS)
+    else:
+        trades = pd.DataFrame(columns=PORTFOLIO_TRADE_COLUMNS)
+
+    return PortfolioResult(pd.Series(equity, index=dates, name="Equity"), trades, initial_capital, len(still_open))
+
+
+def run_portfolio(strategy_name: str, tickers: list[str], position: str, lower_value: int=None, higher_value: int=None, initial_capital: float=100_000, max_positions: int=10, price_store: PriceStore=None) -> PortfolioResult:
+    """ Read the price history of every ticker from the price store and back-test them as one portfolio. """
+
+    price_store = price_store if price_store is not None else create_strategy(strategy_name, tickers[0], position, lower_value, higher_value).get_price_store()
+    prices = {ticker: price_store.get(ticker) for ticker in tickers}
+    return backtest_portfolio(strategy_name, prices, position, lower_value, higher_value, initial_capital, max_positions)
+
+
+def main(argv: list[str]=None) -> None:
+    parser = argparse.ArgumentParser(description="Back-test a strategy over a universe of tickers sharing one pool of capital.")
+    parser.add_argument("strategy", choices=strategy_names(), help='Strategy name, e.g. "MA Crossover".')
+    parser.add_argument("position", choices=PORTFOLIO_POSITIONS)
+    parser.add_argument("--lower", type=int, default=None, help="Lower strategy parameter, e.g. the short moving average.")
+    parser.add_argument("--higher", type=int, default=None, help="Higher strategy parameter, e.g. the long moving average.")
+    parser.add_argument("--universe", default="SPX Ticker List.csv", help="File with one ticker per line.")
+    parser.add_argument("--capital", type=float, default=100_000, help="Starting capital.")
+    parser.add_argument("--max-positions", type=int, default=10, help="Most positions held at once.")
+    parser.add_argument("--output", default="portfolio_equity.csv", help="CSV file to save the equity curve to.")
+    parser.add_argument("--trades", default=None, help="CSV file to save the portfolio's trades to.")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    result = run_portfolio(args.strategy, read_universe(args.universe), args.position, args.lower, args.higher, args.capital, args.max_positions)
+    result.get_equity_curve().to_csv(args.output)
+    if args.trades is not None:
+        result.get_trades().to_csv(args.trades, index=False)
+
+    print(f"Final equity {result.get_final_equity():,.2f} ({result.get_total_return():.2f}%) from {len(result.get_trades())} trades, {result.get_open_positions()} still open.")
+    print(f"Finished in {time.perf_counter() - start:.1f}s. Equity curve saved to {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
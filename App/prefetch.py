@@ -0,0 +1,169 @@
+import argparse
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterator
+import pandas as pd
+from batch import read_universe
+from column_store import MappedPrices, has_prices
+from price_store import INTERVALS, PriceStore, default_store, is_intraday
+
+
+# Downloads the price history of a whole universe into the price store before it is back-tested, over a pool of
+# threads as the time goes on waiting for the data source. Requests are rate limited and failed ones retried.
+# Run with: python prefetch.py [--universe "SPX Ticker List.csv"]
+
+PREFETCH_COLUMNS = ["Ticker", "Status", "Bars", "Attempts", "Seconds", "Error"]
+
+
+class RateLimiter:
+    """ Lets requests through at a steady rate, with up to burst of them at once after a pause. Safe to share between threads.
+
+    Each request takes a token, and tokens come back at rate per second. A request with none left reserves the next
+    one and sleeps until it comes, so waiting requests go in the order they arrived. """
+
+
+    def __init__(self, rate: float, burst: int=1) -> None:
+        self.__rate = rate
+        self.__burst = burst
+        self.__tokens = float(burst)
+        self.__updated = time.monotonic()
+        self.__lock = threading.Lock()
+
+
+    def acquire(self) -> None:
+        """ Wait until a request may be made. """
+
+        with self.__lock:
+            now = time.monotonic()
+            self.__tokens = min(self.__burst, self.__tokens + (now - self.__updated) * self.__rate) - 1
+            self.__updated = now
+            wait = -self.__tokens / self.__rate if self.__tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return
+
+
+    def get_rate(self) -> float:
+        return self.__rate
+
+
+    def get_burst(self) -> int:
+        return self.__burst
+
+
+
+class RetryingFetcher:
+    """ Wraps a fetcher, waiting for the rate limiter before each request and retrying failed ones.
+
+    The waits between tries double from backoff seconds up to max_backoff, each cut by a random amount of up to a half
+    so that threads which failed together do not all retry together. The last error is raised once the retries run out. """
+
+
+    def __init__(self, fetcher, rate_limiter: RateLimiter=None, retries: int=3, backoff: float=1.0, max_backoff: float=30.0) -> None:
+        self.__fetcher = fetcher
+        self.__rate_limiter = rate_limiter
+        self.__retries = retries
+        self.__backoff = backoff
+        self.__max_backoff = max_backoff
+        self.__attempts = 0
+
+
+    def fetch(self, ticker: str, start: pd.Timestamp=None, interval: str="1d") -> pd.DataFrame:
+        for retry in range(self.__retries + 1):
+            if self.__rate_limiter is not None:
+                self.__rate_limiter.acquire()
+            self.__attempts += 1
+            try:
+                return self.__fetcher.fetch(ticker, start=start, interval=interval)
+            except Exception:
+                if retry == self.__retries:
+                    raise
+            time.sleep(min(self.__max_backoff, self.__backoff * 2 ** retry) * random.uniform(0.5, 1.0))
+
+
+    def get_attempts(self) -> int:
+        """ The number of requests made through this fetcher. """
+
+        return self.__attempts
+
+
+
+def prefetch_ticker(ticker: str, price_store: PriceStore, interval: str, fetcher: RetryingFetcher) -> dict:
+    """ Bring one ticker's price history up to date and return its row of the report. A cache that is not stale is left as it is. """
+
+    start = time.perf_counter()
+    result = {"Ticker": ticker, "Status": "Cached", "Bars": 0, "Attempts": 0, "Seconds": 0.0, "Error": ""}
+    # Intraday history is only counted, not read, and new bars are appended to it.
+    intraday = is_intraday(interval)
+    if intraday:
+        cached = None
+        result["Bars"] = len(MappedPrices(price_store.path(ticker, interval))) if has_prices(price_store.path(ticker, interval)) else 0
+    else:
+        cached = price_store.load(ticker, interval)
+        result["Bars"] = len(cached)
+
+    if price_store.get_offline() or (result["Bars"] != 0 and not price_store.is_stale(ticker, interval)):
+        result["Status"] = "Cached" if result["Bars"] != 0 else "No Data"
+        return result
+
+    try:
+        bars = price_store.update_mapped(ticker, interval, fetcher) if intraday else len(price_store.download(ticker, interval, cached, fetcher))
+    except Exception as error:
+        result["Status"] = "Failed"
+        result["Error"] = type(error).__name__ + (": " + str(error) if str(error) != "" else "")
+    else:
+        result["Status"] = "Updated" if bars != 0 else "No Data"
+        result["Bars"] = bars
+
+    result["Attempts"] = fetcher.get_attempts()
+    result["Seconds"] = time.perf_counter() - start
+    return result
+
+
+def prefetch(tickers: list[str], price_store: PriceStore=None, interval: str="1d", max_workers: int=8, rate: float=None, burst: int=1, retries: int=3, backoff: float=1.0) -> Iterator[dict]:
+    """ Download every ticker's price history into the price store over a pool of threads, yielding each row of the report as soon as it is done.
+
+    Requests to the store's fetcher are limited to rate per second across all the threads, with no limit when rate
+    is None. A ticker that still fails after its retries is reported as Failed with its error, and the others carry on. """
+
+    price_store = price_store if price_store is not None else default_store
+    rate_limiter = RateLimiter(rate, burst) if rate is not None else None
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(prefetch_ticker, ticker, price_store, interval, RetryingFetcher(price_store.get_fetcher(), rate_limiter, retries, backoff)) for ticker in tickers]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def main(argv: list[str]=None) -> None:
+    parser = argparse.ArgumentParser(description="Download the price history of every ticker in a universe file into the price store.")
+    parser.add_argument("--universe", default="SPX Ticker List.csv", help="File with one ticker per line.")
+    parser.add_argument("--interval", default="1d", choices=INTERVALS, help="Bar interval (default: %(default)s).")
+    parser.add_argument("--workers", type=int, default=8, help="Number of download threads (default: %(default)s).")
+    parser.add_argument("--rate", type=float, default=2.0, help="Most requests per second across all threads (default: %(default)s).")
+    parser.add_argument("--burst", type=int, default=4, help="Most requests let through at once after a pause (default: %(default)s).")
+    parser.add_argument("--retries", type=int, default=3, help="Retries of a failed request (default: %(default)s).")
+    parser.add_argument("--backoff", type=float, default=1.0, help="Seconds before the first retry, doubling after each (default: %(default)s).")
+    parser.add_argument("--output", default=None, help="CSV file to save the report to.")
+    args = parser.parse_args(argv)
+
+    tickers = read_universe(args.universe)
+    start = time.perf_counter()
+    results = []
+    for count, result in enumerate(prefetch(tickers, interval=args.interval, max_workers=args.workers, rate=args.rate, burst=args.burst, retries=args.retries, backoff=args.backoff), start=1):
+        results.append(result)
+        print(f"[{count}/{len(tickers)}] {result['Ticker']}: {result['Status']}" + (f" after {result['Attempts']} attempts, {result['Error']}" if result["Status"] == "Failed" else ""))
+
+    report = pd.DataFrame(results, columns=PREFETCH_COLUMNS)
+    if args.output is not None:
+        report.to_csv(args.output, index=False)
+    counts = report["Status"].value_counts()
+    print(f"Prefetched {len(tickers)} tickers in {time.perf_counter() - start:.1f}s: " + ", ".join(f"{count} {status.lower()}" for status, count in counts.items()) + ".")
+    if counts.get("Failed", 0) != 0:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
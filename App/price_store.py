@@ -0,0 +1,267 @@
+import os
+import time
+from datetime import timedelta
+import pandas as pd
+from column_store import MappedPrices, append_prices, has_prices, write_prices
+
+
+# How far back Yahoo Finance serves each intraday interval. Longer histories are built up in the store over time.
+INTRADAY_HISTORY = {
+    "1m": timedelta(days=7),
+    "2m": timedelta(days=60),
+    "5m": timedelta(days=60),
+    "15m": timedelta(days=60),
+    "30m": timedelta(days=60),
+    "60m": timedelta(days=730),
+    "90m": timedelta(days=60),
+    "1h": timedelta(days=730)
+}
+
+INTERVALS = list(INTRADAY_HISTORY) + ["1d", "5d", "1wk", "1mo", "3mo"]
+
+
+def is_intraday(interval: str) -> bool:
+    return interval in INTRADAY_HISTORY
+
+
+
+class YahooFetcher:
+    """ Downloads price history from Yahoo Finance. Any object with the same fetch method can be used in its place. """
+
+
+    def fetch(self, ticker: str, start: pd.Timestamp=None, interval: str="1d") -> pd.DataFrame:
+        """ Download the bars from the start date onwards, or the full history if there is no start date.
+
+        Intraday bars are only served for a limited time back, so an intraday start is moved up to the oldest bar available. """
+
+        import yfinance as yf # Imported here as it is slow to import and only needed when prices are downloaded.
+        if is_intraday(interval):
+            if start is None:
+                return yf.Ticker(ticker).history(period=str(INTRADAY_HISTORY[interval].days) + "d", interval=interval)
+            # A day short of the limit, as Yahoo rejects a start right on it.
+            start = max(start, pd.Timestamp.now(tz=start.tz) - INTRADAY_HISTORY[interval] + timedelta(days=1))
+        if start is None:
+            return yf.Ticker(ticker).history(period="max", interval=interval)
+        return yf.Ticker(ticker).history(start=start, interval=interval)
+
+
+
+class PriceStore:
+    """ A local cache of price history in front of a fetcher, keeping one Parquet file per ticker and interval.
+    Intraday intervals are kept as memory-mapped column files instead, see column_store.py.
+
+    A cached file is served as it is until it is older than max_age (None never refreshes). A refresh only downloads
+    the bars from the last cached date onwards. In offline mode the fetcher is never used. The error of each ticker's
+    last failed download is kept until it next downloads. """
+
+
+    def __init__(self, directory: str="Price Data", fetcher=None, max_age: timedelta=timedelta(hours=12), offline: bool=False) -> None:
+        self.__directory = directory
+        self.__fetcher = fetcher if fetcher is not None else YahooFetcher()
+        self.__max_age = max_age
+        self.__offline = offline
+        self.__errors = {}
+
+
+    def get(self, ticker: str, interval: str="1d") -> pd.DataFrame:
+        """ Return the price history of the ticker. An empty DataFrame means the data is not available. """
+
+        cached = self.load(ticker, interval)
+        if self.__offline or (not cached.empty and not self.is_stale(ticker, interval)):
+            return cached
+        return self.refresh(ticker, interval, cached)
+
+
+    def get_mapped(self, ticker: str, interval: str) -> MappedPrices:
+        """ Return the intraday price history of the ticker as memory-mapped columns, refreshing it first when needed. None means the data is not available. """
+
+        if not is_intraday(interval):
+            raise ValueError("Only intraday prices are memory-mapped, not " + interval)
+        path = self.path(ticker, interval)
+        if not self.__offline and (not has_prices(path) or self.is_stale(ticker, interval)):
+            try:
+                self.update_mapped(ticker, interval)
+            except (OSError, ValueError):
+                pass # The stored bars are kept if the download fails or the stored files can't be read. Anything else is a bug.
+        return MappedPrices(path) if has_prices(path) else None
+
+
+    def update_mapped(self, ticker: str, interval: str, fetcher=None) -> int:
+        """ Download the intraday bars after the last stored one and append them to the column files. Returns the number of bars stored.
+
+        Only the stored bar times are read, so the history is never loaded as a whole, unless a split or dividend
+        means it must be downloaded again or the new bars cannot be appended to the files as they are. A failed
+        download raises its error, like download. """
+
+        fetcher = fetcher if fetcher is not None else self.__fetcher
+        path = self.path(ticker, interval)
+        stored = MappedPrices(path) if has_prices(path) else None
+
+        # The last stored bar is downloaded again as it may have been saved before the bar closed.
+        start = stored.get_dates()[len(stored) - 1] if stored is not None and len(stored) != 0 else None
+        new = self.fetch(ticker, start, interval, fetcher)
+        if new.empty:
+            if stored is not None:
+                self.mark_checked(ticker, interval)
+            return len(stored) if stored is not None else 0
+
+        if start is not None and self.has_adjustments(new.iloc[1:]):
+            new = self.fetch(ticker, None, interval, fetcher)
+        elif start is not None and append_prices(path, new):
+            return len(MappedPrices(path))
+        elif start is not None:
+            cached = stored.frame()
+            new = pd.concat([cached[~cached.index.isin(new.index)], new]).sort_index()
+        self.save(ticker, interval, new)
+        return len(new)
+
+
+    def refresh(self, ticker: str, interval: str="1d", cached: pd.DataFrame=None) -> pd.DataFrame:
+        """ Download the bars missing from the cache and save the result. The cache is kept if the download fails. """
+
+        if cached is None:
+            cached = self.load(ticker, interval)
+        try:
+            return self.download(ticker, interval, cached)
+        except Exception:
+            return cached
+
+
+    def download(self, ticker: str, interval: str="1d", cached: pd.DataFrame=None, fetcher=None) -> pd.DataFrame:
+        """ Download the bars missing from the cache with the fetcher, else the store's own, and save the result.
+
+        Unlike refresh, a failed download raises its error. The error is also kept for get_error. """
+
+        if cached is None:
+            cached = self.load(ticker, interval)
+        fetcher = fetcher if fetcher is not None else self.__fetcher
+
+        # The last cached bar is downloaded again as it may have been saved before the session closed.
+        start = cached.index[-1] if not cached.empty else None
+        new = self.fetch(ticker, start, interval, fetcher)
+        if new.empty:
+            if not cached.empty:
+                self.mark_checked(ticker, interval)
+            return cached
+
+        # A new split or dividend adjusts all the older prices, so the full history is needed again.
+        if start is not None and self.has_adjustments(new.iloc[1:]):
+            return self.download(ticker, interval, cached.iloc[:0], fetcher)
+
+        if not cached.empty:
+            new = pd.concat([cached[~cached.index.isin(new.index)], new]).sort_index()
+        self.save(ticker, interval, new)
+        return new
+
+
+    def fetch(self, ticker: str, start: pd.Timestamp, interval: str, fetcher) -> pd.DataFrame:
+        """ Fetch the bars from the start onwards, keeping the error for get_error if it fails. """
+
+        try:
+            new = fetcher.fetch(ticker, start=start, interval=interval)
+        except Exception as error:
+            self.__errors[(ticker, interval)] = error
+            raise
+        self.__errors.pop((ticker, interval), None)
+        return new
+
+
+    def load(self, ticker: str, interval: str="1d") -> pd.DataFrame:
+        """ Read the cached price history, or an empty DataFrame if the ticker has not been cached. Intraday history is
+        read into memory as a whole, so back-tests and refreshes use get_mapped and update_mapped instead. """
+
+        path = self.path(ticker, interval)
+        if is_intraday(interval):
+            return MappedPrices(path).frame() if has_prices(path) else pd.DataFrame()
+        if not os.path.exists(path):
+            return pd.DataFrame()
+        return pd.read_parquet(path)
+
+
+    def save(self, ticker: str, interval: str, data: pd.DataFrame) -> None:
+        os.makedirs(self.__directory, exist_ok=True)
+        if is_intraday(interval):
+            write_prices(self.path(ticker, interval), data)
+        else:
+            data.to_parquet(self.path(ticker, interval))
+        return
+
+
+    def is_stale(self, ticker: str, interval: str="1d") -> bool:
+        """ Check whether the cached file was last refreshed longer ago than the maximum age. """
+
+        if self.__max_age is None:
+            return False
+        return time.time() - os.path.getmtime(self.path(ticker, interval)) > self.__max_age.total_seconds()
+
+
+    def mark_checked(self, ticker: str, interval: str="1d") -> None:
+        """ Record that the cached file was checked for new bars just now, so it is not stale again until max_age has passed. """
+
+        os.utime(self.path(ticker, interval))
+        return
+
+
+    def has_adjustments(self, data: pd.DataFrame) -> bool:
+        """ Check whether any of the bars carry a split or dividend. """
+
+        for column in ("Dividends", "Stock Splits"):
+            if column in data and (data[column] != 0).any():
+                return True
+        return False
+
+
+    def path(self, ticker: str, interval: str="1d") -> str:
+        """ The Parquet file, or for intraday intervals the directory of column files, the ticker is kept in. """
+
+        if is_intraday(interval):
+            return os.path.join(self.__directory, ticker + "_" + interval)
+        return os.path.join(self.__directory, ticker + "_" + interval + ".parquet")
+
+
+    def get_error(self, ticker: str, interval: str="1d") -> Exception:
+        """ The error the last download of the ticker failed with, or None if it did not fail. """
+
+        return self.__errors.get((ticker, interval))
+
+
+    def get_fetcher(self):
+        return self.__fetcher
+
+
+    def set_fetcher(self, fetcher) -> None:
+        self.__fetcher = fetcher
+        return
+
+
+    def get_max_age(self) -> timedelta:
+        return self.__max_age
+
+
+    def set_max_age(self, max_age: timedelta) -> None:
+        self.__max_age = max_age
+        return
+
+
+    def get_offline(self) -> bool:
+        return self.__offline
+
+
+    def set_offline(self, offline: bool) -> None:
+        self.__offline = offline
+        return
+
+
+
+def missing_prices_message(price_store, ticker: str, interval: str="1d") -> str:
+    """ Say that there is no price history for the ticker, and why the download failed if the store knows. """
+
+    message = "No price data for " + ticker if interval == "1d" else "No " + interval + " price data for " + ticker
+    error = price_store.get_error(ticker, interval) if hasattr(price_store, "get_error") else None
+    if error is not None:
+        message += ". The download failed with " + type(error).__name__ + (": " + str(error) if str(error) != "" else "")
+    return message
+
+
+
+default_store = PriceStore()
\ No newline at end of file
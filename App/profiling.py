@@ -0,0 +1,153 @@
+import cProfile
+import importlib.util
+import io
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Iterator
+import numpy as np
+import pandas as pd
+
+
+# The deep-dive profilers a back-test can be captured with. "pyinstrument" needs pyinstrument to be installed.
+CAPTURE_MODES = ("cprofile", "pyinstrument")
+
+STAGE_COLUMNS = ["Stage", "Wall s", "CPU s", "Bars", "Bars/s", "Peak MiB"]
+
+
+def has_pyinstrument() -> bool:
+    return importlib.util.find_spec("pyinstrument") is not None
+
+
+
+class StageProfiler:
+    """ Records the wall time, CPU time, bars processed and peak memory of each stage of a back-test.
+
+    The CPU time is that of the thread running the stage, so it is right for back-tests run in a worker thread. Peak
+    memory is what Python allocated during the stage as seen by tracemalloc, which slows allocation-heavy code down, so
+    it can be turned off. When tracemalloc was already running its peak is reset at the start of each stage.
+
+    A capture mode also records every function call of the whole back-test with cProfile or pyinstrument. """
+
+
+    def __init__(self, trace_memory: bool=True, capture: str=None) -> None:
+        if capture is not None and capture not in CAPTURE_MODES:
+            raise ValueError("Unknown capture mode: " + str(capture))
+        if capture == "pyinstrument" and not has_pyinstrument():
+            raise ValueError("The pyinstrument capture mode needs pyinstrument to be installed")
+        self.__trace_memory = trace_memory
+        self.__capture = capture
+        self.__stages = []
+        self.__capture_profiler = None
+
+
+    @contextmanager
+    def stage(self, name: str, bars: int=0) -> Iterator[dict]:
+        """ Time the code in the with block as a stage. The stage's row is given to the block, so it can set the Bars once they are known. """
+
+        row = {"Stage": name, "Wall s": 0.0, "CPU s": 0.0, "Bars": bars, "Bars/s": np.nan, "Peak MiB": np.nan}
+        started_tracing = False
+        if self.__trace_memory:
+            if tracemalloc.is_tracing():
+                tracemalloc.reset_peak()
+            else:
+                tracemalloc.start()
+                started_tracing = True
+            memory_before = tracemalloc.get_traced_memory()[0]
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield row
+        finally:
+            row["Wall s"] = time.perf_counter() - wall_start
+            row["CPU s"] = time.thread_time() - cpu_start
+            if row["Bars"] != 0 and row["Wall s"] > 0:
+                row["Bars/s"] = row["Bars"] / row["Wall s"]
+            if self.__trace_memory:
+                row["Peak MiB"] = max(tracemalloc.get_traced_memory()[1] - memory_before, 0) / 2 ** 20
+                if started_tracing:
+                    tracemalloc.stop()
+            self.__stages.append(row)
+
+
+    @contextmanager
+    def capture(self) -> Iterator[None]:
+        """ Record every call made in the with block with the capture mode's profiler, if there is a capture mode. """
+
+        if self.__capture is None:
+            yield
+            return
+
+        if self.__capture == "cprofile":
+            self.__capture_profiler = cProfile.Profile()
+            self.__capture_profiler.enable()
+        else:
+            from pyinstrument import Profiler # Imported here as it is an optional dependency.
+            self.__capture_profiler = Profiler()
+            self.__capture_profiler.start()
+        try:
+            yield
+        finally:
+            if self.__capture == "cprofile": self.__capture_profiler.disable()
+            else: self.__capture_profiler.stop()
+
+
+    def get_stages(self) -> list[dict]:
+        return self.__stages
+
+
+    def to_frame(self) -> pd.DataFrame:
+        """ The stages as a table, one row per stage in the order they ran. """
+
+        return pd.DataFrame(self.__stages, columns=STAGE_COLUMNS)
+
+
+    def summary(self) -> str:
+        """ A line per stage and a total, for printing. """
+
+        lines = []
+        for row in self.__stages:
+            line = f"{row['Stage']:<24} {row['Wall s']:8.3f} s wall {row['CPU s']:8.3f} s CPU"
+            if row["Bars"] != 0:
+                line += f" {row['Bars']:>10,} bars {row['Bars/s']:>14,.0f} bars/s"
+            else:
+                line += " " * 38
+            if not np.isnan(row["Peak MiB"]):
+                line += f" {row['Peak MiB']:8.1f} MiB peak"
+            lines.append(line)
+        lines.append(f"{'Total':<24} {sum(row['Wall s'] for row in self.__stages):8.3f} s wall {sum(row['CPU s'] for row in self.__stages):8.3f} s CPU")
+        return "\n".join(lines)
+
+
+    def capture_report(self, limit: int=25) -> str:
+        """ The captured profile as text: the calls taking the most cumulative time for cProfile, the call tree for pyinstrument. """
+
+        if self.__capture_profiler is None:
+            return ""
+        if self.__capture == "pyinstrument":
+            return self.__capture_profiler.output_text()
+        output = io.StringIO()
+        pstats.Stats(self.__capture_profiler, stream=output).sort_stats("cumulative").print_stats(limit)
+        return output.getvalue()
+
+
+    def save_capture(self, path: str) -> None:
+        """ Save the captured profile: cProfile stats for pstats or snakeviz, or a pyinstrument HTML page. """
+
+        if self.__capture_profiler is None:
+            return
+        if self.__capture == "pyinstrument":
+            with open(path, "w") as file:
+                file.write(self.__capture_profiler.output_html())
+        else:
+            self.__capture_profiler.dump_stats(path)
+        return
+
+
+    def get_trace_memory(self) -> bool:
+        return self.__trace_memory
+
+
+    def get_capture(self) -> str:
+        return self.__capture
\ No newline at end of file
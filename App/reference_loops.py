@@ -0,0 +1,112 @@
+import pandas as pd
+from registry import create_strategy as create_registered_strategy
+
+
+# The bar by bar loops the strategies used to run, and indicators worked out one value at a time, for the tests to
+# check the vectorised engine and the plugin strategies against. Nothing in the app imports this module.
+
+
+# The parameters each strategy's trades are checked with.
+PARAMETERS = {"MA Crossover": (20, 50), "RSI Overbought Oversold": (30, 70), "Bollinger Bands": (None, None), "MACD": (12, 26), "Channel Breakout": (10, 20)}
+
+
+def loop_trades(data: pd.DataFrame, opens, closes, first_bar: int=0) -> list[tuple[int, int]]:
+    """ The bar by bar loop the strategies used, returning the (entry, exit) signal bars of the closed trades. """
+
+    position_open = False
+    trades = []
+    for count in range(first_bar, len(data) - 1):
+        if position_open == False and opens(data, count):
+            entry_bar = count
+            position_open = True
+        elif position_open == True and closes(data, count):
+            trades.append((entry_bar, count))
+            position_open = False
+    return trades
+
+
+def naive_ema(values: list[float], span: int) -> list[float]:
+    """ An EMA worked out one value at a time, NaN until span values have been seen. """
+
+    alpha = 2 / (span + 1)
+    averages = []
+    average = None
+    count = 0
+    for value in values:
+        if value != value:
+            averages.append(float("nan") if count < span else average)
+            continue
+        average = value if average is None else alpha * value + (1 - alpha) * average
+        count += 1
+        averages.append(average if count >= span else float("nan"))
+    return averages
+
+
+def naive_channel(values: list[float], window: int, highest: bool) -> list[float]:
+    """ The highest or lowest of the window values before each bar, found by scanning the window. """
+
+    pick = max if highest else min
+    return [pick(values[bar - window:bar]) if bar >= window else float("nan") for bar in range(len(values))]
+
+
+def naive_columns(strategy_name: str, prices: pd.DataFrame, data: pd.DataFrame) -> dict[str, list[float]]:
+    """ The MACD and channel indicators worked out with plain loops over the raw prices, lined up with the prepared data. """
+
+    rows = prices.index.get_indexer(data.index)
+    if strategy_name == "MACD":
+        closes = prices['Close'].tolist()
+        macd = [fast - slow for fast, slow in zip(naive_ema(closes, 12), naive_ema(closes, 26))]
+        signal = naive_ema(macd, 9)
+        return {"MACD": [macd[row] for row in rows], "MACD Signal": [signal[row] for row in rows]}
+
+    highs = prices['High'].tolist()
+    lows = prices['Low'].tolist()
+    columns = {}
+    for window in (10, 20):
+        channel_high = naive_channel(highs, window, True)
+        channel_low = naive_channel(lows, window, False)
+        columns[str(window) + " High"] = [channel_high[row] for row in rows]
+        columns[str(window) + " Low"] = [channel_low[row] for row in rows]
+    return columns
+
+
+def reference_trades(strategy_name: str, position: str, data: pd.DataFrame, prices: pd.DataFrame) -> list[tuple[int, int]]:
+    """ The signals of each strategy written as the scalar lookups of the original loops. MACD and Channel Breakout use naive indicators from the raw prices. """
+
+    if strategy_name == "MACD":
+        columns = naive_columns(strategy_name, prices, data)
+        macd, signal = columns["MACD"], columns["MACD Signal"]
+        cross_up = lambda d, c: macd[c-1] < signal[c-1] and macd[c] > signal[c]
+        cross_down = lambda d, c: macd[c-1] > signal[c-1] and macd[c] < signal[c]
+        return loop_trades(data, cross_up, cross_down, 1) if position == "Long" else loop_trades(data, cross_down, cross_up, 1)
+
+    if strategy_name == "Channel Breakout":
+        columns = naive_columns(strategy_name, prices, data)
+        closes = data['Close'].tolist()
+        if position == "Long":
+            return loop_trades(data, lambda d, c: closes[c] > columns["20 High"][c], lambda d, c: closes[c] < columns["10 Low"][c])
+        return loop_trades(data, lambda d, c: closes[c] < columns["20 Low"][c], lambda d, c: closes[c] > columns["10 High"][c])
+
+    if strategy_name == "MA Crossover":
+        above = lambda d, c: d['20 Moving Average'][c] > d['50 Moving Average'][c]
+        below = lambda d, c: d['50 Moving Average'][c] > d['20 Moving Average'][c]
+        return loop_trades(data, above, below) if position == "Long" else loop_trades(data, below, above)
+
+    if strategy_name == "RSI Overbought Oversold":
+        if position == "Long":
+            return loop_trades(data, lambda d, c: d['RSI'][c-1] < 30 and d['RSI'][c] > 30, lambda d, c: d['RSI'][c] > 70, 1)
+        return loop_trades(data, lambda d, c: d['RSI'][c] < 30, lambda d, c: d['RSI'][c-1] > 70 and d['RSI'][c] < 70, 1)
+
+    up_from_lower = lambda d, c: d['Close'][c-1] < d['Lower Band'][c-1] and d['Close'][c] > d['Lower Band'][c]
+    down_from_upper = lambda d, c: d['Close'][c-1] > d['Upper Band'][c-1] and d['Close'][c] < d['Upper Band'][c]
+    if position == "Long":
+        return loop_trades(data, up_from_lower, down_from_upper, 1)
+    return loop_trades(data, down_from_upper, up_from_lower, 1)
+
+
+def create_strategy(strategy_name: str, position: str):
+    return create_registered_strategy(strategy_name, "SYNTH", position, *PARAMETERS[strategy_name])
+
+
+def engine_trades(strategy, data: pd.DataFrame):
+    return strategy.find_trades(data, strategy.get_position_type())
\ No newline at end of file
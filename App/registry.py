@@ -0,0 +1,246 @@
+import importlib
+import importlib.metadata
+import importlib.util
+import os
+import sys
+import threading
+from exceptions import InvalidParameters, InvalidPlugin, UnknownStrategy
+
+
+# Packages can add strategies by declaring entry points in this group that point at a StrategySpec or a list of them.
+ENTRY_POINT_GROUP = "backtesting_app.strategies"
+
+# Python files in this directory that define a STRATEGIES list of StrategySpecs are added too.
+PLUGIN_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "plugins")
+
+
+class Parameter:
+    """ One parameter of a strategy: the label shown for it and the whole numbers it may take. """
+
+
+    def __init__(self, name: str, label: str, minimum: int, maximum: int, default: int) -> None:
+        self.name = name
+        self.label = label
+        self.minimum = minimum
+        self.maximum = maximum
+        self.default = default
+
+
+    def is_valid(self, value: int) -> bool:
+        return isinstance(value, int) and self.minimum <= value <= self.maximum
+
+
+    def __repr__(self) -> str:
+        return "Parameter(" + self.name + ", " + str(self.minimum) + "-" + str(self.maximum) + ", default=" + str(self.default) + ")"
+
+
+
+class StrategySpec:
+    """ Declares a strategy: its name, its parameters and the Strategy class that generates its vectorised signals.
+
+    Up to two parameters are supported, passed to the class after the ticker and position as the lower and higher
+    values used throughout the app. When ordered is set the first must be below the second. The class may be given
+    as "module:ClassName" so its module is only imported when the strategy is first used. """
+
+
+    def __init__(self, name: str, strategy_class, parameters: list[Parameter]=None, ordered: bool=False, description: str="") -> None:
+        self.name = name
+        self.parameters = parameters if parameters is not None else []
+        self.ordered = ordered
+        self.description = description
+        self.__strategy_class = strategy_class
+
+
+    def load(self) -> type:
+        """ Return the Strategy class, importing its module the first time. """
+
+        if isinstance(self.__strategy_class, str):
+            module_name, class_name = self.__strategy_class.split(":")
+            self.__strategy_class = getattr(importlib.import_module(module_name), class_name)
+        return self.__strategy_class
+
+
+    def create(self, ticker: str, position: str, lower_value: int=None, higher_value: int=None):
+        """ Create the strategy for a ticker, passing only the parameters it declares. """
+
+        values = [lower_value, higher_value][:len(self.parameters)]
+        return self.load()(ticker, position, *values)
+
+
+    def validate(self, lower_value: int=None, higher_value: int=None) -> bool:
+        """ Check the values are within their parameters' bounds and in order if the strategy needs them to be. """
+
+        values = [lower_value, higher_value][:len(self.parameters)]
+        if not all(parameter.is_valid(value) for parameter, value in zip(self.parameters, values)):
+            return False
+        if self.ordered and len(values) == 2:
+            return values[0] < values[1]
+        return True
+
+
+    def get_defaults(self) -> list[int]:
+        return [parameter.default for parameter in self.parameters]
+
+
+    def __repr__(self) -> str:
+        return "StrategySpec(" + self.name + ", " + str(self.parameters) + ")"
+
+
+
+class StrategyRegistry:
+    """ The strategies the app knows about, by name.
+
+    Plugins from entry points and the plugin directory are only looked for the first time the registry is read,
+    and a strategy's module is only imported when it is created. A plugin that fails to import, or declares anything
+    but StrategySpecs with new names, adds none of its strategies and its error is kept for get_plugin_errors. """
+
+
+    def __init__(self, plugin_directory: str=PLUGIN_DIRECTORY, entry_point_group: str=ENTRY_POINT_GROUP) -> None:
+        self.__specs = {}
+        self.__plugin_directory = plugin_directory
+        self.__entry_point_group = entry_point_group
+        self.__plugins_loaded = False
+        self.__plugin_errors = {}
+        self.__lock = threading.Lock()
+
+
+    def register(self, spec: StrategySpec) -> StrategySpec:
+        self.__specs[spec.name] = spec
+        return spec
+
+
+    def get(self, name: str) -> StrategySpec:
+        self.load_plugins()
+        if name not in self.__specs:
+            raise UnknownStrategy("Unknown strategy: " + str(name))
+        return self.__specs[name]
+
+
+    def names(self) -> list[str]:
+        self.load_plugins()
+        return list(self.__specs)
+
+
+    def __contains__(self, name: str) -> bool:
+        self.load_plugins()
+        return name in self.__specs
+
+
+    def get_plugin_errors(self) -> dict[str, str]:
+        """ The plugins that were rejected, by entry point name or file path, with why. """
+
+        self.load_plugins()
+        return dict(self.__plugin_errors)
+
+
+    def load_plugins(self) -> None:
+        """ Register the strategies from entry points and the plugin directory, once. """
+
+        with self.__lock:
+            if self.__plugins_loaded:
+                return
+            self.__plugins_loaded = True
+
+            for entry_point in importlib.metadata.entry_points(group=self.__entry_point_group):
+                self.__load_plugin(entry_point.name, entry_point.load)
+
+            if self.__plugin_directory is not None and os.path.isdir(self.__plugin_directory):
+                for filename in sorted(os.listdir(self.__plugin_directory)):
+                    if filename.endswith(".py") and not filename.startswith("_"):
+                        path = os.path.join(self.__plugin_directory, filename)
+                        self.__load_plugin(path, lambda: getattr(self.__import_plugin(path), "STRATEGIES", []))
+        return
+
+
+    def __load_plugin(self, source: str, load) -> None:
+        # A plugin is third party code that can raise anything while it is imported, so any error rejects it.
+        try:
+            specs = load()
+            specs = list(specs) if isinstance(specs, (list, tuple)) else [specs]
+            for number, spec in enumerate(specs):
+                self.__check_plugin_spec(spec, [spec.name for spec in specs[:number]])
+        except Exception as error:
+            self.__plugin_errors[source] = type(error).__name__ + ": " + str(error)
+            return
+
+        for spec in specs:
+            self.register(spec)
+        return
+
+
+    def __check_plugin_spec(self, spec, earlier_names: list[str]) -> None:
+        if not isinstance(spec, StrategySpec):
+            raise InvalidPlugin("Expected a StrategySpec, got " + repr(spec))
+        if not isinstance(spec.name, str) or not spec.name:
+            raise InvalidPlugin("A strategy needs a name: " + repr(spec))
+        if spec.name in self.__specs or spec.name in earlier_names:
+            raise InvalidPlugin("A strategy named " + spec.name + " is already registered")
+        if len(spec.parameters) > 2 or not all(isinstance(parameter, Parameter) for parameter in spec.parameters):
+            raise InvalidPlugin(spec.name + " must declare at most two Parameters")
+        return
+
+
+    def __import_plugin(self, path: str):
+        # Plugins are kept in sys.modules under their own names so worker processes can find their classes.
+        module_name = "backtesting_plugins." + os.path.splitext(os.path.basename(path))[0]
+        if module_name in sys.modules:
+            return sys.modules[module_name]
+        module_spec = importlib.util.spec_from_file_location(module_name, path)
+        module = importlib.util.module_from_spec(module_spec)
+        sys.modules[module_name] = module
+        try:
+            module_spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules[module_name]
+            raise
+        return module
+
+
+
+default_registry = StrategyRegistry()
+
+default_registry.register(StrategySpec(
+    "MA Crossover",
+    "strategy:MovingAverageCrossoverStrategy",
+    [Parameter("short_MA", "Short MA", 1, 1000, 20), Parameter("long_MA", "Long MA", 2, 1000, 50)],
+    ordered=True,
+    description="Long when the short moving average is above the long one, short when it is below."
+))
+
+default_registry.register(StrategySpec(
+    "RSI Overbought Oversold",
+    "strategy:RSI_OverboughtOversoldStrategy",
+    [Parameter("oversold_level", "Oversold Level", 1, 99, 30), Parameter("overbought_level", "Overbought Level", 1, 99, 70)],
+    ordered=True,
+    description="Long coming out of oversold, short coming down from overbought."
+))
+
+default_registry.register(StrategySpec(
+    "Bollinger Bands",
+    "strategy:BollingerBandsStrategy",
+    description="Long on a cross back above the lower band, short on a cross back below the upper band."
+))
+
+
+def get_strategy_spec(strategy_name: str) -> StrategySpec:
+    return default_registry.get(strategy_name)
+
+
+def strategy_names() -> list[str]:
+    return default_registry.names()
+
+
+def create_strategy(strategy_name: str, ticker: str, position: str, lower_value: int=None, higher_value: int=None):
+    """ Create a registered strategy from its name. The lower and higher values are the strategy's parameters. """
+
+    return default_registry.get(strategy_name).create(ticker, position, lower_value, higher_value)
+
+
+def check_parameters(strategy_name: str, lower_value: int=None, higher_value: int=None) -> None:
+    """ Raise InvalidParameters unless the values are valid for the strategy. """
+
+    spec = default_registry.get(strategy_name)
+    if not spec.validate(lower_value, higher_value):
+        bounds = ", ".join(parameter.label + " " + str(parameter.minimum) + "-" + str(parameter.maximum) for parameter in spec.parameters)
+        raise InvalidParameters("Invalid parameters for " + strategy_name + ": " + str([lower_value, higher_value][:len(spec.parameters)]) + " (" + bounds + (", lower below higher" if spec.ordered else "") + ")")
+    return
\ No newline at end of file
@@ -0,0 +1,138 @@
+import argparse
+import sys
+import time
+import numpy as np
+import pandas as pd
+from backtest import run_backtest
+from exceptions import BacktestError
+from price_store import PriceStore
+from registry import strategy_names
+from strategy import POSITIONS
+from trade_log import TradeLog
+
+
+# Monte Carlo tests of how much a back-test's result owes to luck. Bootstrap resamples draw the trades again with
+# replacement, so some repeat and some are left out. Permutations keep every trade but shuffle their order, which
+# leaves the total the same but changes the drawdowns on the way. Every simulation is a row of one matrix.
+# Run with: python robustness.py "MA Crossover" AAPL --lower 20 --higher 50
+
+METHODS = ("Bootstrap", "Permutation")
+
+# The most trade profits simulated in one matrix. Simulations beyond it are run in further matrices of the same size.
+BATCH_VALUES = 4_000_000
+
+
+def bootstrap_paths(profits: np.ndarray, simulations: int, rng: np.random.Generator) -> np.ndarray:
+    """ A simulations x trades matrix of trade profits drawn from the profits with replacement. """
+
+    return profits[rng.integers(0, len(profits), size=(simulations, len(profits)))]
+
+
+def permutation_paths(profits: np.ndarray, simulations: int, rng: np.random.Generator) -> np.ndarray:
+    """ A simulations x trades matrix holding the profits in a random order on each row. """
+
+    return rng.permuted(np.broadcast_to(profits, (simulations, len(profits))), axis=1)
+
+
+def path_statistics(paths: np.ndarray, capital: float) -> dict[str, np.ndarray]:
+    """ The total return and the largest drawdown of each row of trade profits, as percentages.
+
+    The equity is the capital plus the profit of the trades closed so far, so drawdowns are measured from trade to
+    trade and do not include the swings of a trade while it is open. """
+
+    equity = capital + np.cumsum(paths, axis=1)
+    peaks = np.maximum(np.maximum.accumulate(equity, axis=1), capital)
+    return {
+        "Total Return %": (equity[:, -1] / capital - 1) * 100,
+        "Max Drawdown %": np.minimum((equity / peaks - 1).min(axis=1), 0.0) * 100
+    }
+
+
+def simulate(profits: np.ndarray, capital: float, method: str="Bootstrap", simulations: int=10_000, seed: int=None) -> dict[str, np.ndarray]:
+    """ The total return and largest drawdown of every simulation of the trades, keyed like path_statistics. """
+
+    if method not in METHODS:
+        raise ValueError("Unknown simulation method: " + str(method))
+    profits = np.asarray(profits, dtype=np.float64)
+    if len(profits) == 0:
+        return {"Total Return %": np.zeros(simulations), "Max Drawdown %": np.zeros(simulations)}
+
+    rng = np.random.default_rng(seed)
+    draw = bootstrap_paths if method == "Bootstrap" else permutation_paths
+    batch = max(1, BATCH_VALUES // len(profits))
+    results = [path_statistics(draw(profits, min(batch, simulations - start), rng), capital) for start in range(0, simulations, batch)]
+    return {name: np.concatenate([result[name] for result in results]) for name in results[0]}
+
+
+def robustness_report(profits: np.ndarray, capital: float, simulations: int=10_000, confidence: float=0.95, seed: int=None) -> pd.DataFrame:
+    """ The distribution of the total return and largest drawdown under each method: the back-test's own value, the
+    mean and median of the simulations, the confidence interval, and for the return the percentage of simulations that lost money. """
+
+    profits = np.asarray(profits, dtype=np.float64)
+    observed = path_statistics(profits[np.newaxis, :], capital) if len(profits) != 0 else {"Total Return %": np.zeros(1), "Max Drawdown %": np.zeros(1)}
+    tail = (1 - confidence) / 2 * 100
+    rows = []
+    for method in METHODS:
+        distributions = simulate(profits, capital, method, simulations, seed)
+        for statistic, values in distributions.items():
+            lower, median, upper = np.percentile(values, [tail, 50, 100 - tail])
+            rows.append({
+                "Method": method,
+                "Statistic": statistic,
+                "Observed": float(observed[statistic][0]),
+                "Mean": float(values.mean()),
+                "Median": float(median),
+                "Lower": float(lower),
+                "Upper": float(upper),
+                "Loss %": float(np.mean(values < 0) * 100) if statistic == "Total Return %" else np.nan
+            })
+    return pd.DataFrame(rows)
+
+
+def trade_profits(trade_log: TradeLog) -> tuple[np.ndarray, float]:
+    """ The profits of a trade log's trades in the order they closed, and the capital: the entry price of the first trade, as one share is traded. """
+
+    trades = trade_log.to_frame().sort_values(["Date Close", "Date Open"], kind="stable")
+    if len(trades) == 0:
+        return np.empty(0), 0.0
+    return trades["Trade Profit"].to_numpy(dtype=np.float64), float(trades["Entry Price"].iloc[0])
+
+
+def main(argv: list[str]=None) -> int:
+    parser = argparse.ArgumentParser(description="Bootstrap and permutation tests of a back-test's trades.")
+    parser.add_argument("strategy", choices=strategy_names())
+    parser.add_argument("ticker")
+    parser.add_argument("--position", choices=POSITIONS, default="Long")
+    parser.add_argument("--lower", type=int, default=None, help="Lower parameter value (short MA, oversold level).")
+    parser.add_argument("--higher", type=int, default=None, help="Higher parameter value (long MA, overbought level).")
+    parser.add_argument("--simulations", type=int, default=10_000, help="Simulations of each method (default: %(default)s).")
+    parser.add_argument("--confidence", type=float, default=0.95, help="Confidence level of the intervals (default: %(default)s).")
+    parser.add_argument("--seed", type=int, default=None, help="Seed of the simulations, for repeatable results.")
+    parser.add_argument("--capital", type=float, default=None, help="Starting capital (default: the entry price of the first trade).")
+    parser.add_argument("--offline", action="store_true", help="Only use saved price data.")
+    parser.add_argument("--output", default=None, help="CSV file to save the report to.")
+    args = parser.parse_args(argv)
+
+    try:
+        result = run_backtest(args.strategy, args.ticker, args.position, args.lower, args.higher, True, PriceStore(offline=True) if args.offline else None)
+    except BacktestError as error:
+        print(f"{args.ticker}: {error}", file=sys.stderr)
+        return 1
+
+    profits, capital = trade_profits(result.get_trade_log())
+    if len(profits) == 0:
+        print(f"{args.ticker}: no closed trades to simulate.", file=sys.stderr)
+        return 1
+    capital = args.capital if args.capital is not None else capital
+
+    start = time.perf_counter()
+    report = robustness_report(profits, capital, args.simulations, args.confidence, args.seed)
+    print(f"{args.ticker}: {len(profits)} trades, {args.simulations} simulations of each method in {time.perf_counter() - start:.2f}s, {args.confidence:.0%} intervals.")
+    print(report.round(2).to_string(index=False))
+    if args.output is not None:
+        report.to_csv(args.output, index=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
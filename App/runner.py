@@ -0,0 +1,62 @@
+import queue
+import threading
+from event_log import INFO, Event, EventLog, QueueSink
+from exceptions import BacktestCancelled
+from strategy import Strategy
+
+
+class BacktestRunner:
+    """ Runs a strategy's back-test in a worker thread so the window stays responsive.
+
+    The strategy's progress events, and a final event saying how the run ended, are put on a queue
+    for the main thread to collect with get_events, e.g. from a Tk after() callback. The run ends with a
+    "Back-Test Complete", "Back-Test Failed" or "Back-Test Cancelled" event. """
+
+
+    def __init__(self, strategy: Strategy) -> None:
+        self.__strategy = strategy
+        self.__events = queue.Queue()
+        self.__cancel_event = threading.Event()
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+
+        strategy.set_event_log(EventLog(INFO, [QueueSink(self.__events)]))
+        strategy.set_cancel_event(self.__cancel_event)
+
+
+    def start(self) -> None:
+        self.__thread.start()
+        return
+
+
+    def cancel(self) -> None:
+        """ Ask the back-test to stop. It stops at the end of the stage it is in. """
+
+        self.__cancel_event.set()
+        return
+
+
+    def __run(self) -> None:
+        try:
+            self.__strategy.run_backtest()
+        except BacktestCancelled:
+            self.__events.put(Event(INFO, "Back-Test Cancelled", {"ticker": self.__strategy.get_ticker()}))
+        except Exception as error:
+            self.__events.put(Event(INFO, "Back-Test Failed", {"ticker": self.__strategy.get_ticker(), "error": error}))
+        return
+
+
+    def get_events(self) -> list[Event]:
+        """ Take the events posted since the last call, without waiting. """
+
+        events = []
+        while True:
+            try: events.append(self.__events.get_nowait())
+            except queue.Empty: return events
+
+
+    def is_running(self) -> bool:
+        return self.__thread.is_alive()
+
+
+    def get_strategy(self) -> Strategy:
+        return self.__strategy
\ No newline at end of file
@@ -0,0 +1,67 @@
+import numpy as np
+
+
+# The longest substrings indexed. Longer queries look up the item positions of each of their substrings of this
+# length and keep the positions found for all of them.
+GRAM_LENGTH = 3
+
+
+class SearchIndex:
+    """ Finds the items containing a query, ignoring case, without scanning every item.
+
+    Every substring of up to GRAM_LENGTH characters of the lower-cased items maps to the positions of the items that
+    contain it, so a short query is one lookup and a longer one intersects a lookup per substring before checking the
+    few items left. A query that extends the last one only needs to filter the last results. Results keep the order
+    of the items. """
+
+
+    def __init__(self, items: list) -> None:
+        self.__items = list(items)
+        self.__keys = [str(item).lower() for item in self.__items]
+        self.__grams = self.__index(self.__keys)
+        self.__last_query = None
+        self.__last_positions = None
+
+
+    @staticmethod
+    def __index(keys: list[str]) -> dict[str, np.ndarray]:
+        grams = {}
+        for position, key in enumerate(keys):
+            for gram in {key[start:start + length] for length in range(1, GRAM_LENGTH + 1) for start in range(len(key) - length + 1)}:
+                grams.setdefault(gram, []).append(position)
+        return {gram: np.array(positions, dtype=np.int64) for gram, positions in grams.items()}
+
+
+    def search(self, query: str) -> list:
+        """ The items containing the query, ignoring case, in the order they were given. An empty query matches every item. """
+
+        query = query.lower()
+        if query == "":
+            positions = np.arange(len(self.__items))
+        elif self.__last_query is not None and self.__last_query != "" and self.__last_query in query:
+            positions = self.__filter(self.__last_positions, query)
+        elif len(query) <= GRAM_LENGTH:
+            positions = self.__grams.get(query, np.empty(0, dtype=np.int64))
+        else:
+            positions = self.__grams.get(query[:GRAM_LENGTH], np.empty(0, dtype=np.int64))
+            for start in range(1, len(query) - GRAM_LENGTH + 1):
+                if len(positions) == 0:
+                    break
+                positions = np.intersect1d(positions, self.__grams.get(query[start:start + GRAM_LENGTH], np.empty(0, dtype=np.int64)), assume_unique=True)
+            positions = self.__filter(positions, query)
+
+        self.__last_query = query
+        self.__last_positions = positions
+        return [self.__items[position] for position in positions]
+
+
+    def __filter(self, positions: np.ndarray, query: str) -> np.ndarray:
+        return np.array([position for position in positions if query in self.__keys[position]], dtype=np.int64)
+
+
+    def __len__(self) -> int:
+        return len(self.__items)
+
+
+    def get_items(self) -> list:
+        return self.__items
\ No newline at end of file
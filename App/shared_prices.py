@@ -0,0 +1,142 @@
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+from column_store import DATES_FILE, META_FILE, MappedDates, column_file, replace_directory
+from price_store import PriceStore, default_store
+
+
+# The price columns kept for every ticker of a shared universe.
+SHARED_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+class SharedPrices:
+    """ The price history of a universe of tickers on one shared date axis, in memory-mapped files many processes can read at once.
+
+    Each column is a tickers x dates float64 array, NaN where a ticker has no bar, with each ticker's bars next to each
+    other. Opening the directory maps the files rather than reading them, so however many processes attach, the
+    operating system keeps one copy of the prices in memory. It stands in for a PriceStore, with get returning one
+    ticker's bars. Pickling it only sends the directory, so worker processes attach to the same files. """
+
+
+    def __init__(self, directory: str) -> None:
+        self.__directory = directory
+        self.__attach()
+
+
+    def __attach(self) -> None:
+        with open(os.path.join(self.__directory, META_FILE)) as file:
+            meta = json.load(file)
+        self.__tickers = meta["tickers"]
+        self.__rows = {ticker: row for row, ticker in enumerate(self.__tickers)}
+        self.__first_bars = meta["first_bars"]
+        self.__last_bars = meta["last_bars"]
+        self.__interval = meta["interval"]
+        self.__dates = MappedDates(np.load(os.path.join(self.__directory, DATES_FILE), mmap_mode="r"), meta["timezone"], meta["index_name"])
+        self.__columns = {name: np.load(column_file(self.__directory, name), mmap_mode="r") for name in SHARED_COLUMNS}
+        return
+
+
+    def __getstate__(self) -> dict:
+        return {"directory": self.__directory}
+
+
+    def __setstate__(self, state: dict) -> None:
+        self.__directory = state["directory"]
+        self.__attach()
+        return
+
+
+    def get(self, ticker: str, interval: str="1d") -> pd.DataFrame:
+        """ Return the bars of one ticker like PriceStore.get does. An empty DataFrame means the ticker is not in the universe. """
+
+        if ticker not in self.__rows or interval != self.__interval:
+            return pd.DataFrame()
+
+        row = self.__rows[ticker]
+        bars = slice(self.__first_bars[row], self.__last_bars[row] + 1)
+        traded = ~np.isnan(self.__columns['Close'][row, bars])
+        return pd.DataFrame({name: self.__columns[name][row, bars][traded] for name in SHARED_COLUMNS}, index=self.__dates[bars][traded])
+
+
+    def column(self, name: str) -> np.ndarray:
+        """ The memory-mapped tickers x dates array of a column, in the order of get_tickers. """
+
+        return self.__columns[name]
+
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self.__rows
+
+
+    def __len__(self) -> int:
+        return len(self.__tickers)
+
+
+    def get_tickers(self) -> list[str]:
+        return self.__tickers
+
+
+    def get_dates(self) -> MappedDates:
+        return self.__dates
+
+
+    def get_interval(self) -> str:
+        return self.__interval
+
+
+    def get_directory(self) -> str:
+        return self.__directory
+
+
+
+def build_shared_prices(directory: str, tickers: list[str], price_store: PriceStore=None, interval: str="1d") -> SharedPrices:
+    """ Write the prices of the tickers into a shared universe, reading each from the price store. Tickers with no data are left out.
+
+    The store is read twice, once for the dates and once for the prices, so only one ticker is held in memory at a time. """
+
+    price_store = price_store if price_store is not None else default_store
+    indexes = {}
+    for ticker in tickers:
+        data = price_store.get(ticker, interval)
+        if not data.empty:
+            indexes[ticker] = pd.DatetimeIndex(data.index)
+
+    timezone = next((index.tz for index in indexes.values()), None)
+    dates = np.unique(np.concatenate([index.asi8 for index in indexes.values()])) if len(indexes) != 0 else np.empty(0, dtype=np.int64)
+
+    staging = directory + ".saving"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    np.save(os.path.join(staging, DATES_FILE), dates)
+    columns = {name: np.lib.format.open_memmap(column_file(staging, name), mode="w+", dtype=np.float64, shape=(len(indexes), len(dates))) for name in SHARED_COLUMNS}
+    for values in columns.values():
+        values[:] = np.nan
+
+    first_bars = []
+    last_bars = []
+    for row, ticker in enumerate(indexes):
+        data = price_store.get(ticker, interval)
+        bars = np.searchsorted(dates, pd.DatetimeIndex(data.index).asi8)
+        for name in SHARED_COLUMNS:
+            columns[name][row, bars] = data[name].to_numpy(dtype=np.float64)
+        first_bars.append(int(bars[0]))
+        last_bars.append(int(bars[-1]))
+
+    for values in columns.values():
+        values.flush()
+    del columns
+
+    meta = {
+        "tickers": list(indexes),
+        "first_bars": first_bars,
+        "last_bars": last_bars,
+        "interval": interval,
+        "timezone": str(timezone) if timezone is not None else None,
+        "index_name": next((index.name for index in indexes.values()), None)
+    }
+    with open(os.path.join(staging, META_FILE), "w") as file:
+        json.dump(meta, file)
+    replace_directory(staging, directory)
+    return SharedPrices(directory)
\ No newline at end of file
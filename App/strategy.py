@@ -1,11 +1,29 @@
-import tkinter.messagebox as mb
+import threading
 from abc import ABC, abstractmethod
+from contextlib import nullcontext
 from uuid import uuid4
+import numpy as np
 import pandas as pd
-import yfinance as yf
+from engine import TradeList, build_trades, crossed_above, crossed_below, reverse_signals
+from event_log import DEBUG, EventLog, default_event_log
+from exceptions import BacktestCancelled, InvalidPosition, PriceDataUnavailable
+from indicators import IndicatorCache, data_version, default_cache, moving_average, relative_strength_index, rolling_std
+from column_store import MappedPrices
+from metrics import bars_per_year, calculate_metrics
+from price_store import PriceStore, default_store, is_intraday, missing_prices_message
+from profiling import StageProfiler
+from streaming import BollingerBands, IndicatorStream, RelativeStrengthIndex, RollingMean
+from trade_log import TradeLog
 
-# TODO - MACD Strategy
-# TODO - Channel Breakout Strategy
+
+# Intraday back-tests find their signals this many bars at a time. Each chunk starts this many bars early so its
+# indicators are warmed up: rolling windows fully, exponential averages of up to 500 bars to within rounding.
+CHUNK_BARS = 250_000
+WARMUP_BARS = 10_000
+
+# The position types a strategy can be back-tested with. Both tests longs and shorts side by side, and Stop And
+# Reverse makes each entry signal close the opposite position, so a position is always held after the first signal.
+POSITIONS = ["Long", "Short", "Both", "Stop And Reverse"]
 
 
 class BaseStrategy(ABC):
@@ -42,14 +60,116 @@ class BaseStrategy(ABC):
         """ The Chosen Strategy. """
 
 
+    @property
+    def __metrics(self):
+        """ The risk and return metrics of the last back-test. """
+
+
+    @property
+    def __price_store(self):
+        """ The store the price history is read from. """
+
+
+    @property
+    def __indicator_cache(self):
+        """ The cache calculated indicators are kept in. """
+
+
+    @property
+    def __trade_log(self):
+        """ The trade log closed trades are added to. """
+
+
+    @property
+    def __event_log(self):
+        """ The event log trades and results are reported to. """
+
+
+    @property
+    def __cancel_event(self):
+        """ The event that is set to cancel a running back-test. """
+
+
+    @property
+    def __interval(self):
+        """ The length of the price bars. """
+
+
+    @property
+    def __stop_loss(self):
+        """ The stop-loss as a fraction of the entry price. """
+
+
+    @property
+    def __trailing_stop(self):
+        """ The trailing stop as a fraction of the best price since entry. """
+
+
+    @property
+    def __side_results(self):
+        """ The results of the longs and shorts of the last Both or Stop And Reverse back-test. """
+
+
+    @property
+    def __profiler(self):
+        """ Records the time and memory each stage of a back-test takes, when profiling. """
+
+
     @abstractmethod
     def setup_data(self) -> pd.DataFrame:
         """ Setup the data to start the backtest. """
 
 
     @abstractmethod
-    def process_backtest(self) -> None:
-        """ Process the backtest with the stock's data and a chosen position type. Assumes the parameters set by the user are valid."""
+    def load_prices(self) -> pd.DataFrame | MappedPrices:
+        """ Load the price history the back-test runs on, before any indicators are added. """
+
+
+    @abstractmethod
+    def prepare_data(self, data: pd.DataFrame) -> pd.DataFrame:
+        """ Add the strategy's indicators to the price data. """
+
+
+    @abstractmethod
+    def compute_indicators(self, data: pd.DataFrame) -> dict[str, np.ndarray]:
+        """ Calculate the strategy's indicators from the price data, keyed by their column names. """
+
+
+    @abstractmethod
+    def create_indicator_stream(self) -> IndicatorStream:
+        """ Create the state that updates the strategy's indicators one bar at a time, for live evaluation. """
+
+
+    @abstractmethod
+    def generate_long_signals(self, data: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+        """ Return the entry and exit signals for long positions as boolean arrays. """
+
+
+    @abstractmethod
+    def generate_short_signals(self, data: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+        """ Return the entry and exit signals for short positions as boolean arrays. """
+
+
+    @abstractmethod
+    def generate_signals(self, data: pd.DataFrame) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+        """ Return the entry and exit signals of long and short positions, keyed by position type, from one pass over the indicators. """
+
+
+    @abstractmethod
+    def backtest_in_chunks(self, prices: MappedPrices, chunk_bars: int=CHUNK_BARS, warmup_bars: int=WARMUP_BARS) -> None:
+        """ Back-test memory-mapped intraday prices a chunk of bars at a time, without loading them all into a DataFrame. """
+
+
+    @abstractmethod
+    def run_backtest(self) -> str:
+        """ Process the backtest with the stock's data and a chosen position type, saving a CSV of the trades. Returns the path of the trade log.
+
+        Problems are raised as the exceptions in exceptions.py for the caller to report. """
+
+
+    @abstractmethod
+    def run_stages(self) -> int:
+        """ Load the prices, calculate the indicators and find the trades, each as a profiled stage. Returns the number of bars tested. """
 
 
     @abstractmethod
@@ -62,6 +182,11 @@ class BaseStrategy(ABC):
         """ Test the strategy with short positions only. Assumes the parameters set by the user are valid. """
 
 
+    @abstractmethod
+    def test_both(self) -> None:
+        """ Test long and short positions side by side from one pass over the signals, optionally stopping and reversing. """
+
+
     @abstractmethod
     def get_ticker(self) -> str:
         """ Return the Ticker for the strategy being back-tested. """
@@ -121,6 +246,116 @@ class BaseStrategy(ABC):
         """ Set the strategy name. """
 
 
+    @abstractmethod
+    def get_metrics(self) -> dict[str, float]:
+        """ Get the risk and return metrics of the last back-test, keyed by the names in metrics.METRIC_NAMES. """
+
+
+    @abstractmethod
+    def set_metrics(self, metrics: dict[str, float]) -> None:
+        """ Set the risk and return metrics of the last back-test. """
+
+
+    @abstractmethod
+    def get_side_results(self) -> dict[str, dict]:
+        """ Get the profit, wins, losses, win %, trades and metrics of the longs and of the shorts, keyed by position type. Empty unless both were tested. """
+
+
+    @abstractmethod
+    def set_side_results(self, side_results: dict[str, dict]) -> None:
+        """ Set the results of the longs and of the shorts, keyed by position type. """
+
+
+    @abstractmethod
+    def get_profiler(self) -> StageProfiler:
+        """ Get the profiler recording each stage of the back-test, or None when not profiling. """
+
+
+    @abstractmethod
+    def set_profiler(self, profiler: StageProfiler) -> None:
+        """ Set the profiler to record each stage of the back-test with, or None to stop profiling. """
+
+
+    @abstractmethod
+    def get_price_store(self) -> PriceStore:
+        """ Get the store the price history is read from. """
+
+
+    @abstractmethod
+    def set_price_store(self, price_store: PriceStore) -> None:
+        """ Set the store the price history is read from, such as an offline store or one with a different fetcher. """
+
+
+    @abstractmethod
+    def get_indicator_cache(self) -> IndicatorCache:
+        """ Get the cache calculated indicators are kept in. """
+
+
+    @abstractmethod
+    def set_indicator_cache(self, indicator_cache: IndicatorCache) -> None:
+        """ Set the cache calculated indicators are kept in. None calculates them on every run. """
+
+
+    @abstractmethod
+    def get_trade_log(self) -> TradeLog:
+        """ Get the trade log closed trades are added to. """
+
+
+    @abstractmethod
+    def set_trade_log(self, trade_log: TradeLog) -> None:
+        """ Set the trade log closed trades are added to. None keeps no record of the trades. """
+
+
+    @abstractmethod
+    def get_event_log(self) -> EventLog:
+        """ Get the event log trades and results are reported to. """
+
+
+    @abstractmethod
+    def set_event_log(self, event_log: EventLog) -> None:
+        """ Set the event log trades and results are reported to. """
+
+
+    @abstractmethod
+    def get_cancel_event(self) -> threading.Event:
+        """ Get the event that is set to cancel a running back-test. """
+
+
+    @abstractmethod
+    def set_cancel_event(self, cancel_event: threading.Event) -> None:
+        """ Set the event that is set to cancel a running back-test. None means it cannot be cancelled. """
+
+
+    @abstractmethod
+    def get_interval(self) -> str:
+        """ Get the length of the price bars. """
+
+
+    @abstractmethod
+    def set_interval(self, interval: str) -> None:
+        """ Set the length of the price bars, one of price_store.INTERVALS, e.g. "5m" or "1d". """
+
+
+    @abstractmethod
+    def get_stop_loss(self) -> float:
+        """ Get the stop-loss as a fraction of the entry price. """
+
+
+    @abstractmethod
+    def set_stop_loss(self, stop_loss: float) -> None:
+        """ Set the stop-loss as a fraction of the entry price, e.g. 0.05 closes a trade 5% against its entry. 0 uses no stop-loss. """
+
+
+    @abstractmethod
+    def get_trailing_stop(self) -> float:
+        """ Get the trailing stop as a fraction of the best price since entry. """
+
+
+    @abstractmethod
+    def set_trailing_stop(self, trailing_stop: float) -> None:
+        """ Set the trailing stop as a fraction of the best price since entry. 0 uses no trailing stop. """
+
+
     @abstractmethod
     def calculate_win_percentage(self) -> float:
         """ Calculate the win rate for the strategy for this specific ticker. """
@@ -139,46 +374,345 @@ class Strategy(BaseStrategy):
     def __init__(self, ticker: str, position: str) -> None:
         self.set_ticker(ticker)
         self.set_position_type(position)
+        self.set_profit(0)
+        self.set_wins(0)
+        self.set_losses(0)
+        self.set_metrics({})
+        self.set_side_results({})
+        self.set_profiler(None)
+        self.set_price_store(default_store)
+        self.set_indicator_cache(default_cache)
+        self.set_trade_log(None)
+        self.set_event_log(default_event_log)
+        self.set_cancel_event(None)
+        self.set_interval("1d")
+        self.set_stop_loss(0.0)
+        self.set_trailing_stop(0.0)
 
 
     def setup_data(self) -> pd.DataFrame:
+        data = self.get_price_store().get(self.get_ticker(), self.get_interval())
+        if data.empty:
+            return data
+        return self.prepare_data(data)
+
+
+    def prepare_data(self, data: pd.DataFrame) -> pd.DataFrame:
+        for column, values in self.compute_indicators(data).items():
+            data[column] = values
+        data.dropna(inplace=True)
+        return data
+
+
+    def compute_indicators(self, data: pd.DataFrame) -> dict[str, np.ndarray]:
+        return {}
+
+
+    def create_indicator_stream(self) -> IndicatorStream:
+        return IndicatorStream({})
+
+
+    def cached_indicator(self, data: pd.DataFrame, name: str, window: int, calculate) -> np.ndarray:
+        """ Return an indicator of this ticker's data from the indicator cache, calculating it when it is missing. """
+
+        if self.get_indicator_cache() is None:
+            return calculate()
+        return self.get_indicator_cache().get((self.get_ticker(), data_version(data), name, window), calculate)
+
+
+    def run_backtest(self) -> str:
+        self.set_trade_log(TradeLog())
+        with self.profile_capture():
+            bars = self.run_stages()
+
+            self.get_event_log().info("Back-Test Progress", stage="Writing trade log", ticker=self.get_ticker(), bars=bars, trades=len(self.get_trade_log()))
+            path = self.get_ticker() + "_" + self.get_strategy().replace(" ", "_") + "_" + str(uuid4()) + ".csv"
+            with self.profile_stage("Writing trade log"):
+                self.get_trade_log().write(path)
+
+        self.get_event_log().info(
+            "Back-Test Complete",
+            strategy=self.get_strategy(),
+            ticker=self.get_ticker(),
+            position=self.get_position_type(),
+            profit=round(self.get_profit(), 2),
+            wins=self.get_wins(),
+            losses=self.get_losses(),
+            win_percentage=round(self.calculate_win_percentage(), 2),
+            trade_log=path
+        )
+        return path
+
+
+    def run_stages(self) -> int:
+        """ The back-test itself, shared by the GUI's run_backtest and backtest.run_backtest. Trades go to the trade log, if one is set.
+
+        Intraday prices stay memory-mapped and are tested in chunks, with their indicators calculated chunk by chunk. """
+
+        self.get_event_log().info("Back-Test Progress", stage="Loading prices", ticker=self.get_ticker(), interval=self.get_interval())
+        with self.profile_stage("Loading prices") as stage:
+            data = self.load_prices()
+            stage["Bars"] = len(data)
+        self.check_cancelled()
+
+        if not isinstance(data, MappedPrices):
+            with self.profile_stage("Calculating indicators", len(data)):
+                data = self.prepare_data(data)
+            self.check_cancelled()
+
+        self.get_event_log().info("Back-Test Progress", stage="Finding trades", ticker=self.get_ticker(), bars=len(data))
+        with self.profile_stage("Finding trades", len(data)):
+            if isinstance(data, MappedPrices): self.backtest_in_chunks(data)
+            else: self.backtest(data)
+        self.check_cancelled()
+        return len(data)
+
+
+    def load_prices(self) -> pd.DataFrame | MappedPrices:
+        """ The ticker's price history without indicators: memory-mapped for intraday intervals. Raises PriceDataUnavailable when there is none. """
+
+        if is_intraday(self.get_interval()):
+            data = self.get_price_store().get_mapped(self.get_ticker(), self.get_interval())
+            if data is not None and len(data) != 0:
+                return data
+        else:
+            data = self.get_price_store().get(self.get_ticker(), self.get_interval())
+            if not data.empty:
+                return data
+        raise PriceDataUnavailable(missing_prices_message(self.get_price_store(), self.get_ticker(), self.get_interval()))
+
+
+    def profile_stage(self, name: str, bars: int=0):
+        """ Time a stage of the back-test with the profiler, if there is one. Used as a with block that is given the stage's row. """
+
+        if self.get_profiler() is None:
+            return nullcontext({})
+        return self.get_profiler().stage(name, bars)
+
+
+    def profile_capture(self):
+        """ Capture every call of the back-test with the profiler's capture mode, if there is a profiler. """
+
+        if self.get_profiler() is None:
+            return nullcontext()
+        return self.get_profiler().capture()
+
+
+    def check_cancelled(self) -> None:
+        """ Raise BacktestCancelled if the cancel event has been set. """
+
+        if self.get_cancel_event() is not None and self.get_cancel_event().is_set():
+            raise BacktestCancelled(self.get_ticker() + " back-test cancelled")
         return
 
 
-    def process_backtest(self) -> None:
-        data = self.setup_data()
-        if data.empty:
-            mb.showwarning(title="Internet Connection Error", message="There seems to be a problem with your network connection. Please reconnect and try again.")
-            return
+    def backtest(self, data: pd.DataFrame) -> None:
+        """ Test the chosen position type on data from setup_data. Trades are only recorded when there is a trade log. """
 
-        self.file = open(self.get_ticker() + "_" + self.get_strategy().replace(" ", "_") + "_" + str(uuid4()) + ".csv", "w")
-        self.file.write("Trade Number:,Date Open:,Date Close:,Position:,Entry Price:,Exit Price:,Trade Profit:\n")
-        
         if self.get_position_type() == "Long": self.test_long(data)
         elif self.get_position_type() == "Short": self.test_short(data)
-        else:
-            mb.showerror(title="Position Type Not Known", message="There seems to be a problem with the specified position. Please restart the app.")
-            return
-
-        self.file.close()
+        elif self.get_position_type() == "Both": self.test_both(data)
+        elif self.get_position_type() == "Stop And Reverse": self.test_both(data, reverse=True)
+        else: raise InvalidPosition("Unknown position type: " + str(self.get_position_type()))
+        return
 
-        print(f"Strategy: {self.get_strategy()}")
-        print("Ticker:", self.get_ticker())
-        print("Position:", self.get_position_type())
-        print("Profit:", round(self.get_profit(), 2))
-        print("Wins:", self.get_wins())
-        print("Losses:", self.get_losses())
-        print("Winning %:", round(self.calculate_win_percentage(), 2))
 
-        mb.showinfo(title="Back-Test Complete", message="The back-test has been completed. A CSV file has been saved logging all trades.")
+    def backtest_in_chunks(self, prices: MappedPrices, chunk_bars: int=CHUNK_BARS, warmup_bars: int=WARMUP_BARS) -> None:
+        """ Test the chosen position type on memory-mapped prices. Only one chunk of bars is held in a DataFrame at a time.
+
+        The signals of each chunk go into boolean arrays over all the bars, which the position state machine then runs
+        over with the open and close prices, so trades carry on across chunks. The signals match a back-test of the whole
+        DataFrame unless two indicators tie to the last bit, where the rounding of a rolling window can differ with the
+        bar it started on. The signal columns are not marked. """
+
+        position = self.get_position_type()
+        if position not in POSITIONS:
+            raise InvalidPosition("Unknown position type: " + str(position))
+
+        sides = [position] if position in ("Long", "Short") else ["Long", "Short"]
+        signals = {side: (np.zeros(len(prices), dtype=bool), np.zeros(len(prices), dtype=bool)) for side in sides}
+        # Chunks are not kept in the indicator cache, they would only fill it.
+        indicator_cache = self.get_indicator_cache()
+        self.set_indicator_cache(None)
+        try:
+            for start in range(0, len(prices), chunk_bars):
+                self.check_cancelled()
+                first = max(start - warmup_bars, 0)
+                stop = min(start + chunk_bars, len(prices))
+                chunk = prices.frame(first, stop)
+                for column, values in self.compute_indicators(chunk).items():
+                    chunk[column] = values
+
+                if position == "Long": chunk_signals = {"Long": self.generate_long_signals(chunk)}
+                elif position == "Short": chunk_signals = {"Short": self.generate_short_signals(chunk)}
+                else: chunk_signals = self.generate_signals(chunk)
+                for side, (entries, exits) in signals.items():
+                    entries[start:stop] = chunk_signals[side][0][start - first:]
+                    exits[start:stop] = chunk_signals[side][1][start - first:]
+        finally:
+            self.set_indicator_cache(indicator_cache)
+
+        if position == "Stop And Reverse":
+            signals = reverse_signals(signals)
+
+        columns = {"Open": prices.values("Open"), "Close": prices.values("Close")}
+        if self.get_stop_loss() > 0 or self.get_trailing_stop() > 0:
+            columns['High'] = prices.values("High")
+            columns['Low'] = prices.values("Low")
+        trades_by_side = {side: self.price_trades(columns, side, entries, exits) for side, (entries, exits) in signals.items()}
+
+        if len(trades_by_side) == 1:
+            trades = trades_by_side[position]
+            self.tally_trades(columns, trades)
+            self.set_metrics(calculate_metrics(columns, trades, periods_per_year=bars_per_year(self.get_interval())))
+        else:
+            self.tally_sides(columns, trades_by_side)
+        if self.get_trade_log() is not None:
+            for trades in trades_by_side.values():
+                self.get_trade_log().add(self.get_ticker(), self.get_strategy(), trades, prices.get_dates())
         return
 
 
     def test_long(self, data: pd.DataFrame) -> None:
+        trades = self.find_trades(data, "Long")
+        self.tally_trades(data, trades)
+        self.set_metrics(calculate_metrics(data, trades, periods_per_year=bars_per_year(self.get_interval())))
+        self.log_trades(data, trades)
         return
 
 
     def test_short(self, data: pd.DataFrame) -> None:
+        trades = self.find_trades(data, "Short")
+        self.tally_trades(data, trades)
+        self.set_metrics(calculate_metrics(data, trades, periods_per_year=bars_per_year(self.get_interval())))
+        self.log_trades(data, trades)
+        return
+
+
+    def test_both(self, data: pd.DataFrame, reverse: bool=False) -> None:
+        trades_by_side = self.find_both_trades(data, reverse)
+        self.tally_sides(data, trades_by_side)
+        self.log_trades(data, *trades_by_side.values())
+        return
+
+
+    def find_trades(self, data: pd.DataFrame, position: str) -> TradeList:
+        """ Generate the signals for the position type and run them through the position state machine. The data may be a DataFrame or a dict of arrays. """
+
+        if position == "Long": entries, exits = self.generate_long_signals(data)
+        else: entries, exits = self.generate_short_signals(data)
+        return self.price_trades(data, position, entries, exits)
+
+
+    def find_both_trades(self, data: pd.DataFrame, reverse: bool=False) -> dict[str, TradeList]:
+        """ The long and the short trades, keyed by position type, from one set of indicators and one pass over the signals.
+
+        When reversing, each side's entries are the other side's exits, so a long entry signal closes any short and a
+        short entry signal closes any long. """
+
+        signals = self.generate_signals(data)
+        if reverse:
+            signals = reverse_signals(signals)
+        return {position: self.price_trades(data, position, entries, exits) for position, (entries, exits) in signals.items()}
+
+
+    def price_trades(self, data: pd.DataFrame, position: str, entries: np.ndarray, exits: np.ndarray) -> TradeList:
+        """ Run the signals through the position state machine. The highs and lows are only read when a stop is set. """
+
+        if self.get_stop_loss() > 0 or self.get_trailing_stop() > 0:
+            return build_trades(data['Open'], entries, exits, position, self.get_price_decimals(position), data['High'], data['Low'], self.get_stop_loss(), self.get_trailing_stop())
+        return build_trades(data['Open'], entries, exits, position, self.get_price_decimals(position))
+
+
+    def generate_signals(self, data: pd.DataFrame) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+        return {"Long": self.generate_long_signals(data), "Short": self.generate_short_signals(data)}
+
+
+    def get_price_decimals(self, position: str) -> int:
+        """ The number of decimals the fill prices are rounded to. None leaves the prices unrounded. """
+
+        return None
+
+
+    def tally_trades(self, data: pd.DataFrame, trades: TradeList) -> None:
+        """ Add the closed trades to the profit, wins and losses, then settle any trade left open at the end. """
+
+        wins = int(np.count_nonzero(trades.profits > 0))
+        self.set_profit(self.get_profit() + float(trades.profits.sum()))
+        self.set_wins(self.get_wins() + wins)
+        self.set_losses(self.get_losses() + len(trades) - wins)
+
+        if trades.has_open_position():
+            self.close_final_position(data, trades)
+        return
+
+
+    def tally_sides(self, data: pd.DataFrame, trades_by_side: dict[str, TradeList]) -> None:
+        """ Tally the longs and the shorts on their own into the side results, then add them together for the overall profit, wins, losses and metrics. """
+
+        profit, wins, losses = self.get_profit(), self.get_wins(), self.get_losses()
+        periods_per_year = bars_per_year(self.get_interval())
+        side_results = {}
+        for position, trades in trades_by_side.items():
+            self.set_profit(0)
+            self.set_wins(0)
+            self.set_losses(0)
+            self.tally_trades(data, trades)
+            side_results[position] = {"Profit": self.get_profit(), "Wins": self.get_wins(), "Losses": self.get_losses(), "Win %": self.calculate_win_percentage(), "Trades": len(trades)}
+            side_results[position].update(calculate_metrics(data, trades, periods_per_year=periods_per_year))
+
+        self.set_profit(profit + sum(result["Profit"] for result in side_results.values()))
+        self.set_wins(wins + sum(result["Wins"] for result in side_results.values()))
+        self.set_losses(losses + sum(result["Losses"] for result in side_results.values()))
+        self.set_metrics(calculate_metrics(data, list(trades_by_side.values()), periods_per_year=periods_per_year))
+        self.set_side_results(side_results)
+        return
+
+
+    def close_final_position(self, data: pd.DataFrame, trades: TradeList) -> None:
+        """ Settle the trade left open after the last bar. By default it is ignored. """
+
+        return
+
+
+    def log_trades(self, data: pd.DataFrame, *trade_lists: TradeList) -> None:
+        """ Mark the signal bars, add the trades to the trade log and report each closed trade as a debug event. Both sides may be given at once. """
+
+        if self.get_trade_log() is not None:
+            for trades in trade_lists:
+                self.get_trade_log().add(self.get_ticker(), self.get_strategy(), trades, data.index)
+
+        self.mark_signals(data, *trade_lists)
+
+        event_log = self.get_event_log()
+        if event_log.is_enabled(DEBUG):
+            for trades in trade_lists:
+                for number in range(len(trades)):
+                    event_log.debug(
+                        "Trade Closed",
+                        ticker=self.get_ticker(),
+                        position=trades.position,
+                        trade_number=number + 1,
+                        date_open=data.index[trades.entry_bars[number] + 1],
+                        entry_price=float(trades.entry_prices[number]),
+                        date_close=data.index[trades.exit_bars[number] + 1],
+                        exit_price=float(trades.exit_prices[number]),
+                        trade_profit=float(trades.profits[number])
+                    )
+        return
+
+
+    def mark_signals(self, data: pd.DataFrame, *trade_lists: TradeList) -> None:
+        """ Attach boolean Entry and Exit columns marking the signal bars of the closed trades of every side given. """
+
+        entries = np.zeros(len(data), dtype=bool)
+        exits = np.zeros(len(data), dtype=bool)
+        for trades in trade_lists:
+            entries[trades.entry_bars] = True
+            exits[trades.exit_bars] = True
+
+        data['Entry'] = entries
+        data['Exit'] = exits
         return
 
 
@@ -235,6 +769,105 @@ class Strategy(BaseStrategy):
         return
 
 
+    def get_metrics(self) -> dict[str, float]:
+        return self.__metrics
+
+
+    def set_metrics(self, metrics: dict[str, float]) -> None:
+        self.__metrics = metrics
+        return
+
+
+    def get_side_results(self) -> dict[str, dict]:
+        return self.__side_results
+
+
+    def set_side_results(self, side_results: dict[str, dict]) -> None:
+        self.__side_results = side_results
+        return
+
+
+    def get_profiler(self) -> StageProfiler:
+        return self.__profiler
+
+
+    def set_profiler(self, profiler: StageProfiler) -> None:
+        self.__profiler = profiler
+        return
+
+
+    def get_price_store(self) -> PriceStore:
+        return self.__price_store
+
+
+    def set_price_store(self, price_store: PriceStore) -> None:
+        self.__price_store = price_store
+        return
+
+
+    def get_indicator_cache(self) -> IndicatorCache:
+        return self.__indicator_cache
+
+
+    def set_indicator_cache(self, indicator_cache: IndicatorCache) -> None:
+        self.__indicator_cache = indicator_cache
+        return
+
+
+    def get_trade_log(self) -> TradeLog:
+        return self.__trade_log
+
+
+    def set_trade_log(self, trade_log: TradeLog) -> None:
+        self.__trade_log = trade_log
+        return
+
+
+    def get_event_log(self) -> EventLog:
+        return self.__event_log
+
+
+    def set_event_log(self, event_log: EventLog) -> None:
+        self.__event_log = event_log
+        return
+
+
+    def get_cancel_event(self) -> threading.Event:
+        return self.__cancel_event
+
+
+    def set_cancel_event(self, cancel_event: threading.Event) -> None:
+        self.__cancel_event = cancel_event
+        return
+
+
+    def get_interval(self) -> str:
+        return self.__interval
+
+
+    def set_interval(self, interval: str) -> None:
+        self.__interval = interval
+        return
+
+
+    def get_stop_loss(self) -> float:
+        return self.__stop_loss
+
+
+    def set_stop_loss(self, stop_loss: float) -> None:
+        self.__stop_loss = stop_loss
+        return
+
+
+    def get_trailing_stop(self) -> float:
+        return self.__trailing_stop
+
+
+    def set_trailing_stop(self, trailing_stop: float) -> None:
+        self.__trailing_stop = trailing_stop
+        return
+
+
     def calculate_win_percentage(self) -> float:
         return round(self.get_wins() / (self.get_wins() + self.get_losses()), 4) * 100 if self.get_wins() != 0 else 0.0
 
@@ -256,134 +889,54 @@ class MovingAverageCrossoverStrategy(Strategy):
 
 
     def __init__(self, ticker: str, position: str, short_MA: int, long_MA: int, *args, **kwargs) -> None:
-        self.set_ticker(ticker)
-        self.set_position_type(position)
+        super().__init__(ticker, position)
         self.set_strategy("MA Crossover")
-        self.set_profit(0)
-        self.set_wins(0)
-        self.set_losses(0)
 
         self.__short_MA = short_MA
         self.__long_MA = long_MA
 
 
-    def setup_data(self) -> pd.DataFrame:
-        data = yf.Ticker(self.get_ticker()).history(period="max", interval="1d")
-        if data.empty:
-            return data
+    def compute_indicators(self, data: pd.DataFrame) -> dict[str, np.ndarray]:
+        indicators = {}
+        for window in (self.__short_MA, self.__long_MA):
+            indicators[str(window) + " Moving Average"] = self.cached_indicator(data, "Moving Average", window, lambda: moving_average(data['Close'], window))
+        return indicators
 
-        data[str(self.__short_MA) + " Moving Average"] = data["Close"].rolling(self.__short_MA).mean()
-        data[str(self.__long_MA) + " Moving Average"] = data['Close'].rolling(self.__long_MA).mean()
-        data.dropna(inplace=True)
 
-        data['Entry'] = data['Close'].map(lambda x: False)
-        data['Exit'] = data['Close'].map(lambda x: False)
-        return data
+    def create_indicator_stream(self) -> IndicatorStream:
+        return IndicatorStream({str(window) + " Moving Average": RollingMean(window) for window in (self.__short_MA, self.__long_MA)})
 
 
-    def test_long(self, data: pd.DataFrame) -> None:
-        position_open = False
-        trade_count = 0
-        date_open = ""
-        date_close = ""
-        entry_price = 0
-        exit_price = 0
-        trade_profit = 0
-
-        for count in range(len(data)):
-            if data[str(self.__long_MA) + ' Moving Average'][count] > data[str(self.__short_MA) + ' Moving Average'][count] and position_open == True:
-                # Close Long Position
-                date_close = data.index[count+1]
-                exit_price = round(data['Open'][count+1], 2)
-                trade_profit = exit_price - entry_price
-                position_open = False
-                self.set_profit(self.get_profit() + trade_profit)
-
-                
-
-                print("Profit:", trade_profit)
-                print("Date Close:", date_close)
-                print()
-
-                self.file.write(str(trade_count) + "," + str(date_open) + "," + str(date_close) + "," + self.get_position_type() + "," + str(entry_price) + "," + str(exit_price) + "," + str(trade_profit) + "\n")
-
-                if self.check_trade_result(trade_profit) == 1: self.set_wins(self.get_wins() + 1)
-                else: self.set_losses(self.get_losses() + 1)
-
-            elif data[str(self.__short_MA) + ' Moving Average'][count] > data[str(self.__long_MA) + ' Moving Average'][count] and position_open == False:
-                # Open Long Position
-                date_open = data.index[count+1]
-                entry_price = round(data['Open'][count+1], 2)
-                position_open = True
-                trade_count += 1
-
-                data['Entry'][count] = True
-
-                print()
-                print("Trade Number:", trade_count)
-                print("Date Open:", date_open)
-
-        # Close open position if reached the last interval.
-        if position_open:
-            exit_price = data['Close'][count]
-            trade_profit = exit_price - entry_price
-            self.set_profit(self.get_profit() + (trade_profit))
-            position_open = False
-
-        print(data)
-            
-        return
+    def generate_long_signals(self, data: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+        short_MA = np.asarray(data[str(self.__short_MA) + ' Moving Average'])
+        long_MA = np.asarray(data[str(self.__long_MA) + ' Moving Average'])
+        return short_MA > long_MA, long_MA > short_MA
 
-    
-    def test_short(self, data: pd.DataFrame) -> None:
-        position_open = False
-        trade_count = 0
-        date_open = ""
-        date_close = ""
-        entry_price = 0
-        exit_price = 0
-        trade_profit = 0
-
-        for count in range(len(data)):
-            if data[str(self.__long_MA) + ' Moving Average'][count] > data[str(self.__short_MA) + ' Moving Average'][count] and position_open == False:
-                # Open Short Position
-                date_open = data.index[count+1]
-                trade_count += 1
-                entry_price = data['Open'][count+1]
-                position_open = True
-
-                data['Entry'][count] = True
-
-                print()
-                print("Date Open:", data.index[count+1])
-                print("Trade Number:", trade_count)
-
-
-            elif data[str(self.__short_MA) + ' Moving Average'][count] > data[str(self.__long_MA) + ' Moving Average'][count] and position_open == True:
-                # Close Short Position
-                date_close = data.index[count+1]
-                exit_price = data['Open'][count+1]
-                trade_profit = entry_price - exit_price
-                position_open = False
-                self.set_profit(self.get_profit() + (trade_profit))
-
-                data['Exit'][count] = True
-
-                print("Date Closed:", data.index[count+1])
-                print("Trade Profit:", trade_profit)
-
-                self.file.write(str(trade_count) + "," + str(date_open) + "," + str(date_close) + "," + self.get_position_type() + "," + str(entry_price) + "," + str(exit_price) + "," + str(trade_profit) + "\n")
-
-                if self.check_trade_result(trade_profit) == 1: self.set_wins(self.get_wins() + 1)
-                else: self.set_losses(self.get_losses() + 1)
-
-        # Close open position if reached the last interval.
-        if position_open:
-            exit_price = data['Close'][count]
-            trade_profit = entry_price - exit_price
-            self.set_profit(self.get_profit() + (trade_profit))
-            position_open = False
 
+    def generate_short_signals(self, data: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+        short_MA = np.asarray(data[str(self.__short_MA) + ' Moving Average'])
+        long_MA = np.asarray(data[str(self.__long_MA) + ' Moving Average'])
+        return long_MA > short_MA, short_MA > long_MA
+
+
+    def generate_signals(self, data: pd.DataFrame) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+        short_MA = np.asarray(data[str(self.__short_MA) + ' Moving Average'])
+        long_MA = np.asarray(data[str(self.__long_MA) + ' Moving Average'])
+        above, below = short_MA > long_MA, long_MA > short_MA
+        return {"Long": (above, below), "Short": (below, above)}
+
+
+    def get_price_decimals(self, position: str) -> int:
+        # Long fills have always been logged to the cent.
+        return 2 if position == "Long" else None
+
+
+    def close_final_position(self, data: pd.DataFrame, trades: TradeList) -> None:
+        """ Close the open position at the last close. It counts towards the profit but not the wins and losses. """
+
+        exit_price = np.asarray(data['Close'])[-1]
+        trade_profit = exit_price - trades.open_price if trades.position == "Long" else trades.open_price - exit_price
+        self.set_profit(self.get_profit() + trade_profit)
         return
 
 
@@ -403,166 +956,29 @@ class RSI_OverboughtOversoldStrategy(Strategy):
 
 
     def __init__(self, ticker: str, position: str, oversold_level: int, overbought_level: int) -> None:
-        self.set_ticker(ticker)
-        self.set_position_type(position)
+        super().__init__(ticker, position)
         self.set_strategy("RSI Overbought Oversold")
-        self.set_profit(0)
-        self.set_wins(0)
-        self.set_losses(0)
 
         self.__oversold_level = oversold_level
         self.__overbought_level = overbought_level
 
 
-    def setup_data(self) -> pd.DataFrame:
-        data = yf.Ticker(self.get_ticker()).history(period="max", interval="1d")
-
-        # Gather all differences between close prices.
-        change = data['Close'].diff()
-        change.dropna(inplace=True)
-
-        up_days = change.copy()
-        down_days = change.copy()
-
-        up_days[up_days < 0] = 0 # Set all the down days to 0 to get all the up days.
-        down_days[down_days > 0] = 0 # Set all the up days to 0 to get the down days.
-
-        avg_up = up_days.rolling(14).mean() # Get the average of the up days.
-        avg_down = down_days.rolling(14).mean().abs() # Get the average of the down days (get only the numerical value, not the signage).
-
-        rsi = (100 * avg_up) / (avg_up + avg_down)
+    def compute_indicators(self, data: pd.DataFrame) -> dict[str, np.ndarray]:
+        return {"RSI": self.cached_indicator(data, "RSI", 14, lambda: relative_strength_index(data['Close'], 14))}
 
-        data['RSI'] = rsi
-        data.dropna(inplace=True)
-
-        data['Entry'] = data['Close'].map(lambda x: False)
-        data['Exit'] = data['Close'].map(lambda x: False)
-        return data
 
+    def create_indicator_stream(self) -> IndicatorStream:
+        return IndicatorStream({"RSI": RelativeStrengthIndex(14)})
 
-    def test_long(self, data: pd.DataFrame) -> None:
-        date_open = ""
-        date_close = ""
-        entry_price = 0
-        exit_price = 0
-        position_open = False
-        total_profit = 0
-        trade_profit = 0
-        trade_count = 0
-
-        for count in range(1, len(data) - 1):
-            if data['RSI'][count-1] < 30 and data['RSI'][count] > 30 and position_open == False:
-                # Open Long Position
-                position_open = True
-                entry_price = data['Open'][count+1]
-                date_open = data.index[count+1]
-                trade_count += 1
-
-                data['Entry'][count] = True
-
-                print()
-                print("Open Long Position")
-                print("Entry Price:", entry_price)
-                print("Entry Date:", date_open)
-
-            elif data['RSI'][count] > 70 and position_open == True:
-                # Close Long Position
-                position_open = False
-                exit_price = data['Open'][count+1]
-                date_close = data.index[count+1]
-                trade_profit = exit_price - entry_price
-                self.set_profit(self.get_profit() + trade_profit)
-
-                if self.check_trade_result(trade_profit) == 1: self.set_wins(self.get_wins() + 1)
-                else: self.set_losses(self.get_losses() + 1)
-
-                data['Exit'][count] = True
-
-                print("Close Long Position")
-                print("Exit Price:", exit_price)
-                print("Exit Date:", date_close)
-                print("Trade Profit:", trade_profit)
-                print()
-
-                self.file.write(str(trade_count) + "," + str(date_open) + "," + str(date_close) + "," + self.get_position_type() + "," + str(entry_price) + "," + str(exit_price) + "," + str(trade_profit) + "\n")
-
-        # Close last trade if it was open.
-        if position_open == True:
-            position_open = False
-            exit_price = data['Open'][count+1]
-            date_close = data.index[count+1]
-            trade_profit = exit_price - entry_price
-            total_profit += trade_profit
-
-            print("Close Long Position")
-            print("Exit Price:", exit_price)
-            print("Exit Date:", date_close)
-            print("Trade Profit:", trade_profit)
-            print()
-
-        return
 
+    def generate_long_signals(self, data: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+        rsi = np.asarray(data['RSI'])
+        return crossed_above(rsi, self.__oversold_level), rsi > self.__overbought_level
 
-    def test_short(self, data: pd.DataFrame) -> None:
-        date_open = ""
-        date_close = ""
-        entry_price = 0
-        exit_price = 0
-        position_open = False
-        total_profit = 0
-        trade_profit = 0
-        trade_count = 0
-
-        for count in range(1, len(data) - 1):
-            if data['RSI'][count-1] > 70 and data['RSI'][count] < 70 and position_open == True:
-                # Close Short Position
-                position_open = False
-                exit_price = data['Open'][count+1]
-                date_close = data.index[count+1]
-                trade_profit = entry_price - exit_price
-                self.set_profit(self.get_profit() + trade_profit)
-
-                if self.check_trade_result(trade_profit) == 1: self.set_wins(self.get_wins() + 1)
-                else: self.set_losses(self.get_losses() + 1)
-
-                data['Exit'][count] = True
-                
-                print("Close Short Position")
-                print("Entry Price:", exit_price)
-                print("Entry Date:", date_close)
-                print("Trade Profit:", trade_profit)
-                print()
-
-                self.file.write(str(trade_count) + "," + str(date_open) + "," + str(date_close) + "," + self.get_position_type() + "," + str(entry_price) + "," + str(exit_price) + "," + str(trade_profit) + "\n")
-
-            elif data['RSI'][count] < 30 and position_open == False:
-                # Open Short Position
-                position_open = True
-                entry_price = data['Open'][count+1]
-                date_open = data.index[count+1]
-
-                data['Entry'][count] = True
-
-                print()
-                print("Open Short Position")
-                print("Exit Price:", entry_price)
-                print("Exit Date:", date_open)
-
-        # Close last trade if it was open.
-        if position_open == True:
-            position_open = False
-            exit_price = data['Open'][count+1]
-            exit_date = data.index[count+1]
-            trade_profit = exit_price - entry_price
-            total_profit += trade_profit
-
-            print("Close Long Position")
-            print("Exit Price:", exit_price)
-            print("Exit Date:", exit_date)
-            print("Trade Profit:", trade_profit)
-            print()
 
-        return
+    def generate_short_signals(self, data: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+        rsi = np.asarray(data['RSI'])
+        return rsi < self.__oversold_level, crossed_below(rsi, self.__overbought_level)
 
 
     
@@ -577,149 +993,42 @@ class BollingerBandsStrategy(Strategy):
 
 
     def __init__(self, ticker: str, position: str) -> None:
-        self.set_ticker(ticker)
-        self.set_position_type(position)
+        super().__init__(ticker, position)
         self.set_strategy("Bollinger Bands")
-        self.set_profit(0)
-        self.set_wins(0)
-        self.set_losses(0)
 
 
-    def setup_data(self) -> pd.DataFrame:
-        data = yf.Ticker(self.get_ticker()).history(period="max", interval="1d")
-        if data.empty:
-            return data
+    def compute_indicators(self, data: pd.DataFrame) -> dict[str, np.ndarray]:
+        average = self.cached_indicator(data, "Moving Average", 20, lambda: moving_average(data['Close'], 20))
+        rate = self.cached_indicator(data, "Standard Deviation", 20, lambda: rolling_std(data['Close'], 20))
+        return {"20 Moving Average": average, "Upper Band": average + (2 * rate), "Lower Band": average - (2 * rate)}
 
-        data['20 Moving Average'] = data['Close'].rolling(20).mean()
-        rate = data['Close'].rolling(20).std()
-        data['Upper Band'] = data["20 Moving Average"] + (2 * rate)
-        data['Lower Band'] = data["20 Moving Average"] - (2 * rate)
-        data.dropna(inplace=True)
 
-        data['Entry'] = data['Close'].map(lambda x: False)
-        data['Exit'] = data['Close'].map(lambda x: False)
-        return data
+    def create_indicator_stream(self) -> IndicatorStream:
+        return IndicatorStream({("20 Moving Average", "Upper Band", "Lower Band"): BollingerBands(20, 2)})
 
 
-    def test_long(self, data: pd.DataFrame) -> None:
-        date_open = ""
-        date_close = ""
-        trade_count = 0
-        entry_price = 0
-        exit_price = 0
-        trade_profit = 0
-        position_open = False
-
-        for count in range(1, len(data) - 1):
-            if position_open == False and data['Close'][count-1] < data['Lower Band'][count-1] and data['Close'][count] > data['Lower Band'][count]:
-                # Open Long Position
-                position_open = True
-                entry_price = data['Open'][count+1]
-                date_open = data.index[count+1]
-                trade_count += 1
-
-                data['Entry'][count] = True
-
-                print()
-                print("Hit Lower Band")
-                print("Entry Price:", entry_price)
-                print("Date Opened:", date_open)
-
-            elif position_open == True and data['Close'][count-1] > data['Upper Band'][count-1] and data['Close'][count] < data['Upper Band'][count]:
-                # Close Long Position
-                position_open = False
-                exit_price = data['Open'][count+1]
-                date_close = data.index[count+1]
-                trade_profit = exit_price - entry_price
-                self.set_profit(self.get_profit() + trade_profit)
-
-                if trade_profit > 0: self.set_wins(self.get_wins() + 1)
-                else: self.set_losses(self.get_losses() + 1)
-
-                self.file.write(str(trade_count) + "," + str(date_open) + "," + str(date_close) + "," + self.get_position_type() + "," + str(entry_price) + "," + str(exit_price) + "," + str(trade_profit) + "\n")
-
-                data['Exit'][count] = True
-
-                print("Hit Upper Band")
-                print("Exit Price:", exit_price)
-                print("Date Close", date_close)
-                print("Trade Profit:", trade_profit)
-                print()
-
-        # Close last trade if it was open.
-        if position_open == True:
-            position_open = False
-            exit_price = data['Open'][count+1]
-            trade_profit = exit_price - entry_price
-
-            if trade_profit > 0: self.set_wins(self.get_wins() + 1)
-            else: self.set_losses(self.get_losses() + 1)
-
-            print("Closing Last Trade")
-            print("Exit Price:", exit_price)
-            print("Trade Profit:", trade_profit)
-            print()
+    def generate_long_signals(self, data: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+        close = np.asarray(data['Close'])
+        return crossed_above(close, data['Lower Band']), crossed_below(close, data['Upper Band'])
 
-        return
 
+    def generate_short_signals(self, data: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+        close = np.asarray(data['Close'])
+        return crossed_below(close, data['Upper Band']), crossed_above(close, data['Lower Band'])
 
-    def test_short(self, data: pd.DataFrame) -> None:
-        date_open = ""
-        date_close = ""
-        trade_count = 0
-        entry_price = 0
-        exit_price = 0
-        trade_profit = 0
-        position_open = False
-
-        for count in range(len(data)):
-            if position_open == False and data['Close'][count-1] > data['Upper Band'][count-1] and data['Close'][count] < data['Upper Band'][count]:
-                # Open Short Position
-                position_open = True
-                entry_price = data['Open'][count+1]
-                date_open = data.index[count+1]
-                trade_count += 1
-
-                data['Entry'][count] = True
-
-                print()
-                print("Hit Upper Band")
-                print("Entry Price:", entry_price)
-                print("Date Opened:", date_open)
-
-            elif position_open == True and data['Close'][count-1] < data['Lower Band'][count-1] and data['Close'][count] > data['Lower Band'][count]:
-                # Close Short Position
-                position_open = False
-                exit_price = data['Open'][count+1]
-                date_close = data.index[count+1]
-                trade_profit = entry_price - exit_price
-                self.set_profit(self.get_profit() + trade_profit)
-
-                if trade_profit > 0: self.set_wins(self.get_wins() + 1)
-                else: self.set_losses(self.get_losses() + 1)
-
-                self.file.write(str(trade_count) + "," + str(date_open) + "," + str(date_close) + "," + self.get_position_type() + "," + str(entry_price) + "," + str(exit_price) + "," + str(trade_profit) + "\n")
-
-                data['Exit'][count] = True
-
-                print("Hit Lower Band")
-                print("Exit Price:", exit_price)
-                print("Date Close", date_close)
-                print("Trade Profit:", trade_profit)
-                print()
-
-
-        if position_open == True:
-            position_open = False
-            exit_price = data['Close'][count]
-            trade_profit = entry_price - exit_price
-
-            if trade_profit > 0: self.set_wins(self.get_wins() + 1)
-            else: self.set_losses(self.get_losses() + 1)
-
-            print("Closing Last Trade")
-            print("Exit Price:", exit_price)
-            print("Trade Profit:", trade_profit)
-            print()
 
+    def generate_signals(self, data: pd.DataFrame) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+        close = np.asarray(data['Close'])
+        above_lower, below_upper = crossed_above(close, data['Lower Band']), crossed_below(close, data['Upper Band'])
+        return {"Long": (above_lower, below_upper), "Short": (below_upper, above_lower)}
+
+
+    def close_final_position(self, data: pd.DataFrame, trades: TradeList) -> None:
+        """ Close the open position on the last bar. It counts towards the wins and losses but not the profit. """
+
+        if trades.position == "Long": trade_profit = np.asarray(data['Open'])[-1] - trades.open_price
+        else: trade_profit = trades.open_price - np.asarray(data['Close'])[-1]
+
+        if trade_profit > 0: self.set_wins(self.get_wins() + 1)
+        else: self.set_losses(self.get_losses() + 1)
         return
\ No newline at end of file
@@ -1,6 +1,7 @@
 import tkinter as tk
 import tkinter.messagebox as mb
 from abc import ABC, abstractmethod
+from registry import Parameter, default_registry
 from styles import Theme
 
 
@@ -40,70 +41,18 @@ class StrategyParameters(BaseStrategyParameters):
         self.__lower_value = tk.IntVar()
 
 
-    def __MA_strategy_parameter_inputs(self, theme: Theme) -> None:
-        """ Moving Average Crossover Strategy Parameters: Long Moving Average and Short Moving Average. """
+    def __parameter_input(self, column: int, parameter: Parameter, variable: tk.IntVar, theme: Theme) -> None:
+        """ A labelled entry for one strategy parameter, placed in the given column of the parameters frame. """
 
-        self.__higher_value = tk.IntVar()
-        self.__lower_value = tk.IntVar()
-
-        short_MA_frame = tk.Frame(self.__params_frame, background=theme.background)
-        short_MA_frame.grid(row=0, column=0, padx=10)
-
-        short_MA_label = tk.Label(short_MA_frame, text="Short MA:", background=theme.background, foreground=theme.foreground, font=("tkDefaultFont", 16))
-        short_MA_label.grid(row=0, column=0)
-
-        short_MA_entry = tk.Entry(
-            short_MA_frame,
-            textvariable=self.__lower_value,
-            background=theme.background,
-            foreground=theme.foreground,
-            highlightbackground=theme.foreground,
-            highlightthickness=1,
-            insertbackground=theme.foreground,
-            font=("tkDefaultFont", 14),
-            width=6,
-            relief="flat"
-        )
-        short_MA_entry.grid(row=0, column=1)
-
-        long_MA_frame = tk.Frame(self.__params_frame, background=theme.background)
-        long_MA_frame.grid(row=0, column=1, padx=10)
-
-        long_MA_label = tk.Label(long_MA_frame, text="Long MA:", background=theme.background, foreground=theme.foreground, font=("tkDefaultFont", 16))
-        long_MA_label.grid(row=0, column=0)
-
-        long_MA_entry = tk.Entry(
-            long_MA_frame,
-            textvariable=self.__higher_value,
-            background=theme.background,
-            foreground=theme.foreground,
-            highlightbackground=theme.foreground,
-            highlightthickness=1,
-            insertbackground=theme.foreground,
-            font=("tkDefaultFont", 14),
-            width=6,
-            relief="flat"
-        )
-        long_MA_entry.grid(row=0, column=1)
-
-        return
-
-
-    def __RSI_strategy_params_inputs(self, theme: Theme) -> None:
-        """ RSI Overbought/Oversold Strategy Parameters: Overbought Level and Oversold Level """
-
-        self.__higher_value = tk.IntVar(value=None)
-        self.__lower_value = tk.IntVar(value=None)
-
-        oversold_level_frame = tk.Frame(self.__params_frame, background=theme.background)
-        oversold_level_frame.grid(row=0, column=0, padx=5)
+        parameter_frame = tk.Frame(self.__params_frame, background=theme.background)
+        parameter_frame.grid(row=0, column=column, padx=5)
 
-        oversold_level_label = tk.Label(oversold_level_frame, text="Oversold Level:", background=theme.background, foreground=theme.foreground, font=("tkDefaultFont", 12))
-        oversold_level_label.grid(row=0, column=0)
+        parameter_label = tk.Label(parameter_frame, text=parameter.label + ":", background=theme.background, foreground=theme.foreground, font=("tkDefaultFont", 12))
+        parameter_label.grid(row=0, column=0)
 
-        oversold_level_entry = tk.Entry(
-            oversold_level_frame,
-            textvariable=self.__lower_value,
+        parameter_entry = tk.Entry(
+            parameter_frame,
+            textvariable=variable,
             background=theme.background,
             foreground=theme.foreground,
             highlightbackground=theme.foreground,
@@ -113,38 +62,10 @@ class StrategyParameters(BaseStrategyParameters):
             width=6,
             relief="flat"
         )
-        oversold_level_entry.grid(row=0, column=1)
-
-        overbought_level_frame = tk.Frame(self.__params_frame, background=theme.background)
-        overbought_level_frame.grid(row=0, column=1, padx=5)
-
-        overbought_level_label = tk.Label(overbought_level_frame, text="Overbought Level:", background=theme.background, foreground=theme.foreground, font=("tkDefaultFont", 12))
-        overbought_level_label.grid(row=0, column=0)
-
-        overbought_level_entry = tk.Entry(
-            overbought_level_frame,
-            textvariable=self.__higher_value,
-            background=theme.background,
-            foreground=theme.foreground,
-            highlightbackground=theme.foreground,
-            highlightthickness=1,
-            insertbackground=theme.foreground,
-            font=("tkDefaultFont", 14),
-            width=6,
-            relief="flat"
-        )
-        overbought_level_entry.grid(row=0, column=1)
-
+        parameter_entry.grid(row=0, column=1)
         return
 
 
-    def __bollinger_bands_strategy_params_inputs(self) -> None:
-        """ Bollinger Bands Strategy: No Parameters """
-        
-        self.__higher_value = tk.IntVar()
-        self.__lower_value = tk.IntVar()
-
-
     def get_higher_value(self) -> int:
         return self.__higher_value.get()
 
@@ -159,8 +80,14 @@ class StrategyParameters(BaseStrategyParameters):
         self.__params_frame = tk.Frame(params_container, background=theme.background)
         self.__params_frame.pack(pady=10)
 
-        if strategy_name == "MA Crossover": self.__MA_strategy_parameter_inputs(theme)
-        elif strategy_name == "RSI Overbought Oversold": self.__RSI_strategy_params_inputs(theme)            
-        elif strategy_name == "Bollinger Bands": self.__bollinger_bands_strategy_params_inputs()
-        else: mb.showwarning(title="Unidentified Strategy", message="This strategy does not exist here just yet. Please choose a strategy from the list.")
+        if strategy_name not in default_registry:
+            mb.showwarning(title="Unidentified Strategy", message="This strategy does not exist here just yet. Please choose a strategy from the list.")
+            return
+
+        # The first parameter is the lower value and the second the higher value, e.g. the short and long moving averages.
+        parameters = default_registry.get(strategy_name).parameters
+        self.__lower_value = tk.IntVar(value=parameters[0].default) if len(parameters) > 0 else tk.IntVar()
+        self.__higher_value = tk.IntVar(value=parameters[1].default) if len(parameters) > 1 else tk.IntVar()
+        for column, (parameter, variable) in enumerate(zip(parameters, (self.__lower_value, self.__higher_value))):
+            self.__parameter_input(column, parameter, variable, theme)
         return
\ No newline at end of file
@@ -0,0 +1,334 @@
+import math
+from collections import deque
+import numpy as np
+from engine import reverse_signals
+from exceptions import InvalidPosition
+
+
+# Indicators that take one bar at a time in O(1), so a strategy can be driven from a live or replayed feed
+# without recalculating its history. They return NaN until they have seen a full window, like pandas rolling.
+
+
+class RollingMean:
+    """ The mean of the last window values. """
+
+
+    def __init__(self, window: int) -> None:
+        self.__window = window
+        self.__values = deque()
+        self.__total = 0.0
+        self.__updates = 0
+
+
+    def update(self, value: float) -> float:
+        self.__values.append(value)
+        self.__total += value
+        if len(self.__values) > self.__window:
+            self.__total -= self.__values.popleft()
+
+        # Re-add the window now and then so rounding errors in the running total cannot build up.
+        self.__updates += 1
+        if self.__updates % self.__window == 0:
+            self.__total = math.fsum(self.__values)
+
+        if len(self.__values) < self.__window:
+            return math.nan
+        return self.__total / self.__window
+
+
+
+class RollingStd:
+    """ The sample standard deviation of the last window values, updated with a sliding form of Welford's method. """
+
+
+    def __init__(self, window: int) -> None:
+        self.__window = window
+        self.__values = deque()
+        self.__mean = 0.0
+        self.__squares = 0.0
+        self.__updates = 0
+
+
+    def update(self, value: float) -> float:
+        self.__values.append(value)
+        if len(self.__values) <= self.__window:
+            delta = value - self.__mean
+            self.__mean += delta / len(self.__values)
+            self.__squares += delta * (value - self.__mean)
+        else:
+            removed = self.__values.popleft()
+            mean = self.__mean + (value - removed) / self.__window
+            self.__squares += (value - removed) * (value - mean + removed - self.__mean)
+            self.__mean = mean
+
+        self.__updates += 1
+        if self.__updates % self.__window == 0:
+            self.__mean = math.fsum(self.__values) / len(self.__values)
+            self.__squares = math.fsum((x - self.__mean) ** 2 for x in self.__values)
+
+        if len(self.__values) < self.__window:
+            return math.nan
+        return math.sqrt(max(self.__squares, 0.0) / (self.__window - 1))
+
+
+
+class BollingerBands:
+    """ The moving average with bands a number of standard deviations above and below it. Returns (average, upper, lower). """
+
+
+    def __init__(self, window: int=20, width: float=2) -> None:
+        self.__mean = RollingMean(window)
+        self.__std = RollingStd(window)
+        self.__width = width
+
+
+    def update(self, value: float) -> tuple[float, float, float]:
+        average = self.__mean.update(value)
+        rate = self.__std.update(value)
+        return average, average + (self.__width * rate), average - (self.__width * rate)
+
+
+
+class RelativeStrengthIndex:
+    """ The RSI from simple rolling averages of the up and down moves between closes. """
+
+
+    def __init__(self, window: int=14) -> None:
+        self.__up = RollingMean(window)
+        self.__down = RollingMean(window)
+        self.__last_close = None
+
+
+    def update(self, close: float) -> float:
+        if self.__last_close is None:
+            self.__last_close = close
+            return math.nan
+
+        change = close - self.__last_close
+        self.__last_close = close
+        avg_up = self.__up.update(max(change, 0.0))
+        avg_down = abs(self.__down.update(min(change, 0.0)))
+        if math.isnan(avg_up):
+            return math.nan
+        return (100 * avg_up) / (avg_up + avg_down) if avg_up + avg_down != 0 else math.nan
+
+
+
+class ExponentialMovingAverage:
+    """ The recursive EMA with a smoothing factor of 2 / (span + 1). It starts from the first value that is not NaN. """
+
+
+    def __init__(self, span: int) -> None:
+        self.__span = span
+        self.__alpha = 2 / (span + 1)
+        self.__average = math.nan
+        self.__count = 0
+
+
+    def update(self, value: float) -> float:
+        if math.isnan(value):
+            return math.nan if self.__count < self.__span else self.__average
+
+        self.__average = value if self.__count == 0 else self.__alpha * value + (1 - self.__alpha) * self.__average
+        self.__count += 1
+        return self.__average if self.__count >= self.__span else math.nan
+
+
+
+class MovingAverageConvergenceDivergence:
+    """ The MACD line (fast EMA less slow EMA) and its signal line (an EMA of the MACD line). Returns (macd, signal). """
+
+
+    def __init__(self, fast: int=12, slow: int=26, signal: int=9) -> None:
+        self.__fast = ExponentialMovingAverage(fast)
+        self.__slow = ExponentialMovingAverage(slow)
+        self.__signal = ExponentialMovingAverage(signal)
+
+
+    def update(self, value: float) -> tuple[float, float]:
+        macd = self.__fast.update(value) - self.__slow.update(value)
+        return macd, self.__signal.update(macd)
+
+
+
+class RollingMax:
+    """ The highest of the last window values, kept with a deque of the values that could still become the highest. """
+
+
+    def __init__(self, window: int) -> None:
+        self.__window = window
+        self.__candidates = deque()
+        self.__count = 0
+
+
+    def update(self, value: float) -> float:
+        while len(self.__candidates) != 0 and self.__candidates[-1][1] <= value:
+            self.__candidates.pop()
+        self.__candidates.append((self.__count, value))
+        if self.__candidates[0][0] <= self.__count - self.__window:
+            self.__candidates.popleft()
+
+        self.__count += 1
+        return self.__candidates[0][1] if self.__count >= self.__window else math.nan
+
+
+
+class RollingMin:
+    """ The lowest of the last window values. """
+
+
+    def __init__(self, window: int) -> None:
+        self.__max = RollingMax(window)
+
+
+    def update(self, value: float) -> float:
+        return -self.__max.update(-value)
+
+
+
+class Previous:
+    """ What another state returned on the bar before, so a bar can be compared with the bars that came before it. """
+
+
+    def __init__(self, state) -> None:
+        self.__state = state
+        self.__last = math.nan
+
+
+    def update(self, value: float) -> float:
+        last = self.__last
+        self.__last = self.__state.update(value)
+        return last
+
+
+
+class IndicatorStream:
+    """ Updates a strategy's indicators with each bar, returning them by column name.
+
+    The states are keyed by column name, or by a tuple of names for states that return several values.
+    They are fed the close unless sources names another price ("High" or "Low") for their key. """
+
+
+    def __init__(self, states: dict, sources: dict=None) -> None:
+        self.__states = states
+        self.__sources = sources if sources is not None else {}
+
+
+    def update(self, close: float, high: float=math.nan, low: float=math.nan) -> dict[str, float]:
+        prices = {"Close": close, "High": high, "Low": low}
+        values = {}
+        for names, state in self.__states.items():
+            value = state.update(prices[self.__sources.get(names, "Close")])
+            if isinstance(names, tuple): values.update(zip(names, value))
+            else: values[names] = value
+        return values
+
+
+# The sides each position type trades when streamed.
+POSITION_SIDES = {"Long": ["Long"], "Short": ["Short"], "Both": ["Long", "Short"], "Stop And Reverse": ["Long", "Short"]}
+
+
+
+class StreamEvent:
+    """ Something that happened to one side on a bar: an Entry or Exit signal, or a trade that Opened or Closed at the bar's open. """
+
+
+    def __init__(self, kind: str, position: str, bar: int, date, price: float, trade_profit: float=None) -> None:
+        self.kind = kind
+        self.position = position
+        self.bar = bar
+        self.date = date
+        self.price = price
+        self.trade_profit = trade_profit
+
+
+    def __repr__(self) -> str:
+        profit = "" if self.trade_profit is None else ", profit=" + str(round(self.trade_profit, 2))
+        return "StreamEvent(" + self.kind + ", " + self.position + ", bar=" + str(self.bar) + ", date=" + str(self.date) + ", price=" + str(round(self.price, 2)) + profit + ")"
+
+
+
+class LiveStrategy:
+    """ Runs a strategy's signal logic bar by bar as the bars arrive.
+
+    The signals of the newest bar only depend on it and the bar before, so the strategy's own
+    generate_long_signals/generate_short_signals run on those two bars. Each side then follows the
+    rule of the back-test's pair_signals: an entry only opens a trade when the side is flat and an
+    exit only closes an open trade. Both runs the longs and shorts side by side and Stop And Reverse
+    exits each side on the other side's entries. Signals are filled at the open of the next bar that
+    arrives, the same as a back-test. """
+
+
+    def __init__(self, strategy, position: str=None) -> None:
+        self.__strategy = strategy
+        self.__position = position if position is not None else strategy.get_position_type()
+        if self.__position not in POSITION_SIDES:
+            raise InvalidPosition("Unknown position type: " + str(self.__position))
+        self.__sides = POSITION_SIDES[self.__position]
+        self.__indicators = strategy.create_indicator_stream()
+        self.__previous = None
+        self.__bar = -1
+        self.__position_open = {side: False for side in self.__sides}
+        self.__pending = {side: None for side in self.__sides}
+        self.__entry_price = {side: 0.0 for side in self.__sides}
+        self.__trades = []
+
+
+    def on_bar(self, date, open_: float, high: float, low: float, close: float) -> list[StreamEvent]:
+        """ Take the next bar and return the events it caused. """
+
+        self.__bar += 1
+        events = []
+
+        # Fill the signals from the last bar at this bar's open.
+        for side in self.__sides:
+            if self.__pending[side] == "Entry":
+                self.__entry_price[side] = open_
+                events.append(StreamEvent("Open", side, self.__bar, date, open_))
+            elif self.__pending[side] == "Exit":
+                trade_profit = open_ - self.__entry_price[side] if side == "Long" else self.__entry_price[side] - open_
+                self.__trades.append((side, self.__entry_price[side], open_, trade_profit))
+                events.append(StreamEvent("Close", side, self.__bar, date, open_, trade_profit))
+            self.__pending[side] = None
+
+        current = {"Open": open_, "High": high, "Low": low, "Close": close}
+        current.update(self.__indicators.update(close, high, low))
+        previous = self.__previous if self.__previous is not None else {name: math.nan for name in current}
+        self.__previous = current
+
+        columns = {name: np.array([previous[name], current[name]]) for name in current}
+        for side, (entries, exits) in self.__signals(columns).items():
+            if not self.__position_open[side] and entries[-1]:
+                self.__position_open[side] = True
+                self.__pending[side] = "Entry"
+                events.append(StreamEvent("Entry", side, self.__bar, date, close))
+            elif self.__position_open[side] and exits[-1]:
+                self.__position_open[side] = False
+                self.__pending[side] = "Exit"
+                events.append(StreamEvent("Exit", side, self.__bar, date, close))
+        return events
+
+
+    def __signals(self, columns: dict[str, np.ndarray]) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+        """ The entry and exit signals of each side traded, keyed by position type. """
+
+        if self.__position == "Long": return {"Long": self.__strategy.generate_long_signals(columns)}
+        if self.__position == "Short": return {"Short": self.__strategy.generate_short_signals(columns)}
+        signals = self.__strategy.generate_signals(columns)
+        if self.__position == "Stop And Reverse":
+            signals = reverse_signals(signals)
+        return signals
+
+
+    def get_trades(self, position: str=None) -> list[tuple[str, float, float, float]]:
+        """ The closed trades so far as (position type, entry price, exit price, trade profit), of one side or all of them. """
+
+        return [trade for trade in self.__trades if position is None or trade[0] == position]
+
+
+    def get_position_open(self, position: str=None) -> bool:
+        """ Whether a trade is open on the side, or on any side. """
+
+        if position is None:
+            return any(self.__position_open.values())
+        return self.__position_open.get(position, False)
\ No newline at end of file
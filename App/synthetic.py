@@ -0,0 +1,114 @@
+import threading
+import time
+import zlib
+import numpy as np
+import pandas as pd
+
+
+# Seeded price histories shaped like the yfinance history, so back-tests and benchmarks can run offline.
+# The same bars, seed and settings always give the same prices.
+
+
+# The drift and volatility of each daily return in the regimes regime_prices switches between.
+REGIMES = {"Bull": (0.0008, 0.010), "Bear": (-0.0010, 0.025), "Sideways": (0.0, 0.008)}
+
+
+def price_frame(returns: np.ndarray, volatility, rng: np.random.Generator, freq: str="B", start_price: float=50.0) -> pd.DataFrame:
+    """ Build OHLCV bars from the log returns between closes. The volatility may be one number or one per bar. """
+
+    bars = len(returns)
+    close = start_price * np.exp(np.cumsum(returns))
+    # The gaps and the wicks are a third of the size of the moves between closes.
+    open_ = close * np.exp(rng.normal(0, volatility / 3, bars))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, volatility / 3, bars)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, volatility / 3, bars)))
+    volume = rng.integers(1_000_000, 10_000_000, bars).astype(np.float64)
+    index = pd.date_range(end="2023-09-01", periods=bars, freq=freq, tz="America/New_York", name="Date")
+    return pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume, "Dividends": 0.0, "Stock Splits": 0.0}, index=index)
+
+
+def gbm_prices(bars: int, seed: int=0, freq: str="B", drift: float=0.0003, volatility: float=0.015) -> pd.DataFrame:
+    """ Prices following a geometric brownian motion. The bars are daily unless freq says otherwise. """
+
+    rng = np.random.default_rng(seed)
+    return price_frame(rng.normal(drift, volatility, bars), volatility, rng, freq)
+
+
+def regime_states(bars: int, regimes: int, persistence: float, rng: np.random.Generator) -> np.ndarray:
+    """ A Markov chain over the regimes that stays in its regime with the persistence probability and otherwise moves to one of the others at random. """
+
+    switches = rng.random(bars) > persistence
+    steps = np.where(switches, rng.integers(1, regimes, bars), 0)
+    steps[0] = rng.integers(0, regimes)
+    return np.cumsum(steps) % regimes
+
+
+def regime_prices(bars: int, seed: int=0, freq: str="B", regimes: dict[str, tuple[float, float]]=None, persistence: float=0.99) -> pd.DataFrame:
+    """ Prices that switch between regimes of different drift and volatility, such as trending and ranging markets.
+
+    A persistence of 0.99 keeps a regime for 100 bars on average. The regime of each bar is in the Regime column. """
+
+    regimes = regimes if regimes is not None else REGIMES
+    rng = np.random.default_rng(seed)
+    states = regime_states(bars, len(regimes), persistence, rng)
+    drifts, volatilities = (np.array(values)[states] for values in zip(*regimes.values()))
+    data = price_frame(rng.normal(drifts, volatilities), volatilities, rng, freq)
+    data['Regime'] = np.array(list(regimes), dtype=object)[states]
+    return data
+
+
+# The generators the benchmark suite runs, by name.
+GENERATORS = {"GBM": gbm_prices, "Regimes": regime_prices}
+
+
+
+class SimulatedFetcher:
+    """ A stand-in for YahooFetcher serving synthetic prices, with the latency and failures of a real data source.
+
+    Each ticker gets its own seeded GBM history, so it is the same on every fetch. Every request waits the latency,
+    then fails with a ConnectionError at the failure rate, always for the first fail_first requests of a ticker, and on
+    every request for the tickers in failing. Tickers in missing return no bars, as Yahoo does for unknown tickers.
+    The time of every request is recorded. """
+
+
+    def __init__(self, bars: int=2_500, latency: float=0.0, failure_rate: float=0.0, fail_first: int=0, missing: set[str]=None, failing: set[str]=None, seed: int=0) -> None:
+        self.__bars = bars
+        self.__latency = latency
+        self.__failure_rate = failure_rate
+        self.__fail_first = fail_first
+        self.__missing = set(missing) if missing is not None else set()
+        self.__failing = set(failing) if failing is not None else set()
+        self.__seed = seed
+        self.__rng = np.random.default_rng(seed)
+        self.__lock = threading.Lock()
+        self.__requests = {}
+        self.__request_times = []
+
+
+    def fetch(self, ticker: str, start: pd.Timestamp=None, interval: str="1d") -> pd.DataFrame:
+        with self.__lock:
+            self.__requests[ticker] = self.__requests.get(ticker, 0) + 1
+            self.__request_times.append(time.monotonic())
+            fails = ticker in self.__failing or self.__requests[ticker] <= self.__fail_first or self.__rng.random() < self.__failure_rate
+        time.sleep(self.__latency)
+
+        if fails:
+            raise ConnectionError("Simulated failure fetching " + ticker)
+        if ticker in self.__missing:
+            return pd.DataFrame()
+        data = gbm_prices(self.__bars, zlib.crc32(ticker.encode()) + self.__seed)
+        return data[data.index >= start] if start is not None else data
+
+
+    def get_requests(self, ticker: str=None) -> int:
+        """ The number of requests made for the ticker, or for every ticker. """
+
+        with self.__lock:
+            return self.__requests.get(ticker, 0) if ticker is not None else sum(self.__requests.values())
+
+
+    def get_request_times(self) -> list[float]:
+        """ The time.monotonic time of every request, in the order they were made. """
+
+        with self.__lock:
+            return list(self.__request_times)
\ No newline at end of file
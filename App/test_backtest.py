@@ -0,0 +1,106 @@
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+import pandas as pd
+from backtest import main, run_backtest
+from exceptions import InvalidParameters, InvalidPosition, PriceDataUnavailable, UnknownStrategy
+from price_store import PriceStore
+from synthetic import gbm_prices
+from trade_log import read_store
+
+
+# Checks the headless API and command line: they import without tkinter or yfinance, raise their typed errors, and
+# save what they are asked to.
+# Run with: python -m pytest test_backtest.py
+
+HEADLESS_MODULES = ["backtest", "batch", "optimizer", "portfolio", "walkforward", "robustness"]
+
+
+
+class TestHeadless(unittest.TestCase):
+
+
+    def test_imports_without_gui_or_downloader(self) -> None:
+        code = "import sys; import " + ", ".join(HEADLESS_MODULES) + "; print(' '.join(name for name in ('tkinter', 'yfinance') if name in sys.modules))"
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+        self.assertEqual(output.split(), [])
+
+
+
+class TestRunBacktest(unittest.TestCase):
+
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.price_store = PriceStore(self.directory.name, offline=True)
+        self.price_store.save("SYNTH", "1d", gbm_prices(2_000))
+
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+
+    def test_result(self) -> None:
+        result = run_backtest("MA Crossover", "SYNTH", "Long", 20, 50, price_store=self.price_store)
+        row = result.to_row()
+        self.assertEqual((row["Ticker"], row["Strategy"], row["Position"]), ("SYNTH", "MA Crossover", "Long"))
+        self.assertEqual(row["Trades"], len(result.get_trade_log()))
+        self.assertAlmostEqual(row["Profit"], result.get_trade_log().to_frame()["Trade Profit"].sum(), places=2)
+        self.assertIsNone(run_backtest("MA Crossover", "SYNTH", "Long", 20, 50, False, self.price_store).get_trade_log())
+
+
+    def test_typed_errors(self) -> None:
+        for error, arguments in ((UnknownStrategy, ("No Such Strategy", "SYNTH", "Long", 20, 50)), (InvalidParameters, ("MA Crossover", "SYNTH", "Long", 50, 20)),
+                                 (InvalidPosition, ("MA Crossover", "SYNTH", "Sideways", 20, 50)), (PriceDataUnavailable, ("MA Crossover", "MISSING", "Long", 20, 50))):
+            with self.subTest(error=error.__name__), self.assertRaises(error):
+                run_backtest(*arguments, price_store=self.price_store)
+
+
+
+class TestCommandLine(unittest.TestCase):
+
+
+    def setUp(self) -> None:
+        # The command line reads its saved prices from the Price Data folder of the working directory.
+        self.directory = tempfile.TemporaryDirectory()
+        self.working_directory = os.getcwd()
+        os.chdir(self.directory.name)
+        PriceStore(offline=True).save("SYNTH", "1d", gbm_prices(2_000))
+
+
+    def tearDown(self) -> None:
+        os.chdir(self.working_directory)
+        self.directory.cleanup()
+
+
+    def run_main(self, argv: list[str]) -> tuple[int, str, str]:
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            code = main(argv)
+        return code, stdout.getvalue(), stderr.getvalue()
+
+
+    def test_saves_results_and_trades(self) -> None:
+        code, stdout, stderr = self.run_main(["MA Crossover", "SYNTH", "--position", "Both", "--lower", "20", "--higher", "50", "--offline", "--output", "results.csv", "--trades", "trades.sqlite"])
+        self.assertEqual(code, 0, stderr)
+        self.assertIn("SYNTH: profit", stdout)
+        self.assertIn("Longs", stdout)
+        results = pd.read_csv("results.csv")
+        self.assertEqual(results["Ticker"].tolist(), ["SYNTH"])
+        self.assertEqual(len(read_store("trades.sqlite")), results["Trades"].iloc[0])
+
+
+    def test_failed_ticker(self) -> None:
+        code, stdout, stderr = self.run_main(["MA Crossover", "SYNTH", "MISSING", "--lower", "20", "--higher", "50", "--offline"])
+        self.assertEqual(code, 1)
+        self.assertIn("SYNTH: profit", stdout)
+        self.assertTrue(stderr.startswith("MISSING: "))
+
+
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,71 @@
+import unittest
+import numpy as np
+from engine import has_numba, run_positions
+from synthetic import gbm_prices
+
+
+# Checks every kernel of the position state machine finds the same trades, with and without stops, and that the stops
+# fill where they should on a few hand-made bars.
+# Run with: python -m pytest test_engine.py
+
+# The kernels that can run here. numba is only tested when it is installed.
+INSTALLED_KERNELS = ["python", "numpy"] + (["numba"] if has_numba() else [])
+
+# The stop-loss and trailing stop fractions each kernel is run with.
+STOPS = [(0.0, 0.0), (0.05, 0.0), (0.0, 0.1), (0.05, 0.1)]
+
+
+
+class TestKernels(unittest.TestCase):
+
+
+    def test_kernels_agree(self) -> None:
+        prices = gbm_prices(5_000)
+        rng = np.random.default_rng(0)
+        entries = rng.random(len(prices)) < 0.05
+        exits = rng.random(len(prices)) < 0.05
+        arrays = [prices[name].to_numpy() for name in ("Open", "High", "Low")]
+        for position in ("Long", "Short"):
+            for stop_loss, trailing_stop in STOPS:
+                expected = None
+                for kernel in INSTALLED_KERNELS:
+                    with self.subTest(position=position, stop_loss=stop_loss, trailing_stop=trailing_stop, kernel=kernel):
+                        entry_bars, exit_bars, exit_prices, open_bar = run_positions(arrays[0], entries, exits, position, arrays[1], arrays[2], stop_loss, trailing_stop, kernel)
+                        if expected is None:
+                            expected = (entry_bars, exit_bars, exit_prices, open_bar)
+                            self.assertGreater(len(entry_bars), 10)
+                        np.testing.assert_array_equal(entry_bars, expected[0])
+                        np.testing.assert_array_equal(exit_bars, expected[1])
+                        np.testing.assert_allclose(exit_prices, expected[2])
+                        self.assertEqual(open_bar, expected[3])
+
+
+    def test_stops(self) -> None:
+        # A long fills at 100 on bar 1. Its 5% stop is hit on bar 2 and fills at 95, or at 90 when bar 2 gaps down through it.
+        opens = np.array([100.0, 100.0, 99.0, 97.0, 97.0])
+        highs = np.array([101.0, 102.0, 99.0, 98.0, 98.0])
+        lows = np.array([99.0, 99.0, 94.0, 96.0, 96.0])
+        entries = np.array([True, False, False, False, False])
+        exits = np.zeros(5, dtype=bool)
+        for kernel in INSTALLED_KERNELS:
+            with self.subTest(kernel=kernel):
+                self.assertEqual([values.tolist() for values in run_positions(opens, entries, exits, "Long", highs, lows, 0.05, 0.0, kernel)[:3]], [[0], [1], [95.0]])
+                gapped = opens.copy()
+                gapped[2] = 90.0
+                self.assertEqual(run_positions(gapped, entries, exits, "Long", highs, lows, 0.05, 0.0, kernel)[2].tolist(), [90.0])
+                # Without a stop the trade is still open at the end.
+                self.assertEqual(run_positions(opens, entries, exits, "Long", kernel=kernel)[3], 0)
+
+
+    def test_bad_arguments(self) -> None:
+        opens = np.ones(10)
+        signals = np.zeros(10, dtype=bool)
+        with self.assertRaises(ValueError):
+            run_positions(opens, signals, signals, "Long", kernel="fortran")
+        with self.assertRaises(ValueError):
+            run_positions(opens, signals, signals, "Long", stop_loss=0.05)
+
+
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
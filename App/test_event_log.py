@@ -0,0 +1,104 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from event_log import DEBUG, INFO, WARNING, EventLog, FileSink, RingBufferSink
+from registry import create_strategy
+from synthetic import gbm_prices
+from trade_log import TradeLog
+
+
+# Checks the event log only passes on events at or above its level, is off with no sinks, and that a back-test reports
+# each closed trade to it instead of printing.
+# Run with: python -m pytest test_event_log.py
+
+
+
+class TestEventLog(unittest.TestCase):
+
+
+    def test_levels(self) -> None:
+        sink = RingBufferSink()
+        event_log = EventLog(INFO, [sink])
+        event_log.debug("Skipped")
+        event_log.info("Kept", number=1)
+        event_log.warning("Kept", number=2)
+        self.assertEqual([(event.kind, event.fields) for event in sink.get_events()], [("Kept", {"number": 1}), ("Kept", {"number": 2})])
+        self.assertFalse(event_log.is_enabled(DEBUG))
+
+        event_log.set_level(DEBUG)
+        event_log.debug("Now Kept")
+        self.assertEqual(len(sink.get_events("Now Kept")), 1)
+
+
+    def test_off_without_sinks(self) -> None:
+        event_log = EventLog(DEBUG)
+        self.assertFalse(event_log.is_enabled(WARNING))
+        sink = RingBufferSink()
+        event_log.add_sink(sink)
+        self.assertTrue(event_log.is_enabled(DEBUG))
+        event_log.remove_sink(sink)
+        self.assertFalse(event_log.is_enabled(WARNING))
+
+
+    def test_ring_buffer_keeps_the_latest(self) -> None:
+        sink = RingBufferSink(capacity=3)
+        event_log = EventLog(INFO, [sink])
+        for number in range(5):
+            event_log.info("Event", number=number)
+        self.assertEqual([event.fields["number"] for event in sink.get_events()], [2, 3, 4])
+
+
+    def test_file_sink_writes_json_lines(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "events.jsonl")
+            event_log = EventLog(INFO, [FileSink(path)])
+            event_log.info("Finished", ticker="SYNTH", profit=1.5)
+            event_log.error("Failed", ticker="OTHER")
+            event_log.close()
+            with open(path, encoding="utf-8") as file:
+                lines = [json.loads(line) for line in file]
+        self.assertEqual([(line["level"], line["kind"], line["ticker"]) for line in lines], [("INFO", "Finished", "SYNTH"), ("ERROR", "Failed", "OTHER")])
+        self.assertEqual(lines[0]["profit"], 1.5)
+
+
+
+class TestBacktestEvents(unittest.TestCase):
+
+
+    def run_backtest(self, event_log: EventLog=None) -> tuple[TradeLog, str]:
+        strategy = create_strategy("MA Crossover", "SYNTH", "Both", 20, 50)
+        strategy.set_trade_log(TradeLog())
+        if event_log is not None:
+            strategy.set_event_log(event_log)
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            strategy.backtest(strategy.prepare_data(gbm_prices(3_000)))
+        return strategy.get_trade_log(), stdout.getvalue()
+
+
+    def test_trades_are_reported(self) -> None:
+        sink = RingBufferSink()
+        trade_log, stdout = self.run_backtest(EventLog(DEBUG, [sink]))
+        events = sink.get_events("Trade Closed")
+        trades = trade_log.to_frame()
+        self.assertEqual(stdout, "")
+        self.assertEqual(len(events), len(trades))
+        self.assertEqual([(event.fields["position"], event.fields["date_open"], event.fields["trade_profit"]) for event in events],
+                         list(zip(trades["Position"], trades["Date Open"], trades["Trade Profit"])))
+
+
+    def test_quiet_by_default(self) -> None:
+        sink = RingBufferSink()
+        trade_log, stdout = self.run_backtest(EventLog(INFO, [sink]))
+        self.assertEqual(len(sink), 0)
+        trade_log, stdout = self.run_backtest()
+        self.assertEqual(stdout, "")
+        self.assertGreater(len(trade_log), 0)
+
+
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
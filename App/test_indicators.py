@@ -0,0 +1,94 @@
+import unittest
+from unittest import mock
+import numpy as np
+import strategy
+from indicators import IndicatorCache
+from registry import create_strategy
+from synthetic import gbm_prices
+
+
+# Checks the indicator cache hands back what it stored, drops the least recently used arrays once it is full, and is
+# what spares a repeated back-test from calculating its indicators again.
+# Run with: python -m pytest test_indicators.py
+
+ARRAY_BYTES = 100 * 8
+
+
+def values(fill: float) -> np.ndarray:
+    return np.full(100, fill)
+
+
+
+class TestIndicatorCache(unittest.TestCase):
+
+
+    def test_hit_does_not_calculate(self) -> None:
+        cache = IndicatorCache()
+        calculate = mock.Mock(return_value=values(1.0))
+        first = cache.get(("SYNTH", (100,), "Moving Average", 20), calculate)
+        second = cache.get(("SYNTH", (100,), "Moving Average", 20), calculate)
+        self.assertIs(first, second)
+        self.assertEqual(calculate.call_count, 1)
+        self.assertFalse(first.flags.writeable)
+
+        cache.get(("SYNTH", (100,), "Moving Average", 50), calculate)
+        self.assertEqual(calculate.call_count, 2)
+
+
+    def test_least_recently_used_is_dropped(self) -> None:
+        cache = IndicatorCache(max_bytes=3 * ARRAY_BYTES)
+        for name in ("a", "b", "c"):
+            cache.put(name, values(0.0))
+        cache.get("a", mock.Mock()) # Reading a makes b the least recently used.
+        cache.put("d", values(0.0))
+        self.assertEqual([name in cache for name in ("a", "b", "c", "d")], [True, False, True, True])
+        self.assertEqual(cache.get_size(), 3 * ARRAY_BYTES)
+
+        cache.set_max_bytes(ARRAY_BYTES)
+        self.assertEqual([name in cache for name in ("a", "c", "d")], [False, False, True])
+        self.assertEqual(cache.get_size(), ARRAY_BYTES)
+
+
+    def test_oversized_array_is_not_kept(self) -> None:
+        cache = IndicatorCache(max_bytes=ARRAY_BYTES)
+        cache.put("small", values(0.0))
+        cache.put("large", np.zeros(200))
+        self.assertNotIn("large", cache)
+        self.assertIn("small", cache)
+
+
+    def test_replacing_an_entry_keeps_the_size(self) -> None:
+        cache = IndicatorCache()
+        cache.put("a", values(0.0))
+        cache.put("a", values(1.0))
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.get_size(), ARRAY_BYTES)
+
+
+
+class TestStrategyCache(unittest.TestCase):
+
+
+    def test_repeated_run_reuses_indicators(self) -> None:
+        prices = gbm_prices(1_000)
+        cache = IndicatorCache()
+        with mock.patch.object(strategy, "moving_average", wraps=strategy.moving_average) as moving_average:
+            for _ in range(2):
+                s = create_strategy("MA Crossover", "SYNTH", "Long", 20, 50)
+                s.set_indicator_cache(cache)
+                s.prepare_data(prices.copy())
+            self.assertEqual(moving_average.call_count, 2)
+
+            # A new bar changes the data version, so the indicators are calculated for it.
+            s.prepare_data(gbm_prices(1_001))
+            self.assertEqual(moving_average.call_count, 4)
+
+            # Without a cache they are calculated on every run.
+            s.set_indicator_cache(None)
+            s.prepare_data(prices.copy())
+            self.assertEqual(moving_average.call_count, 6)
+
+
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
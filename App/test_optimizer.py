@@ -0,0 +1,47 @@
+import tempfile
+import unittest
+from optimizer import optimise
+from price_store import PriceStore
+from registry import get_strategy_spec, strategy_names
+from synthetic import gbm_prices
+
+
+# Checks a grid search scores every parameter pair on its own indicators, the same as searching that pair alone.
+# Run with: python -m pytest test_optimizer.py
+
+RESULT_COLUMNS = ["Profit", "Wins", "Losses", "Trades"]
+
+
+class TestOptimiser(unittest.TestCase):
+
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.price_store = PriceStore(self.directory.name, offline=True)
+        self.price_store.save("SYNTH", "1d", gbm_prices(3_000))
+
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+
+    def test_pairs_are_scored_separately(self) -> None:
+        for strategy_name in strategy_names():
+            parameters = get_strategy_spec(strategy_name).parameters
+            if len(parameters) != 2:
+                continue
+
+            lower_values = [parameters[0].default, parameters[0].default + 3]
+            higher_values = [parameters[1].default, parameters[1].default + 10]
+            for position in ("Long", "Short"):
+                with self.subTest(strategy=strategy_name, position=position):
+                    results = optimise(strategy_name, "SYNTH", position, lower_values, higher_values, max_workers=1, price_store=self.price_store).set_index(["Lower", "Higher"])
+                    self.assertGreater(len(results[RESULT_COLUMNS].drop_duplicates()), 1, "every pair gave the same result")
+                    for lower, higher in results.index:
+                        alone = optimise(strategy_name, "SYNTH", position, [lower], [higher], max_workers=1, price_store=self.price_store).iloc[0]
+                        self.assertEqual(results.loc[(lower, higher), RESULT_COLUMNS].tolist(), alone[RESULT_COLUMNS].tolist(), f"{lower}/{higher}")
+
+
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
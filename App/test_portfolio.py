@@ -0,0 +1,135 @@
+import unittest
+import numpy as np
+import pandas as pd
+from exceptions import InvalidPosition
+from portfolio import backtest_portfolio, simulate
+from registry import create_strategy
+from synthetic import gbm_prices
+
+
+# Checks the cash and positions of the shared-capital portfolio back-test on small hand-made and synthetic universes.
+# Run with: python -m pytest test_portfolio.py
+
+
+def with_ending(data: pd.DataFrame, drift: float, bars: int=80) -> pd.DataFrame:
+    """ The prices with a steady trend of drift a bar over their last bars, so every position of a moving average crossover is closed by the end. """
+
+    trend = np.exp(drift * np.clip(np.arange(len(data)) - (len(data) - bars), 0, None))
+    return data.assign(**{column: data[column] * trend for column in ('Open', 'High', 'Low', 'Close')})
+
+
+def held_positions(trades: pd.DataFrame, dates: pd.Index) -> np.ndarray:
+    """ The number of the closed trades held on each date, counting a trade from the date it opened to the date before it closed. """
+
+    held = np.zeros(len(dates), dtype=np.int64)
+    for opened, closed in zip(dates.get_indexer(trades["Date Open"]), dates.get_indexer(trades["Date Close"])):
+        held[opened:closed] += 1
+    return held
+
+
+
+class TestSimulate(unittest.TestCase):
+
+
+    def setUp(self) -> None:
+        self.opens = np.array([[10.0, 20.0], [10.0, 20.0], [12.0, 18.0], [12.0, 18.0]])
+        self.closes = np.array([[11.0, 19.0], [11.0, 19.0], [12.0, 18.0], [12.0, 18.0]])
+        self.entry_fills = np.array([[True, True], [False, False], [False, False], [False, False]])
+        self.exit_fills = np.array([[False, False], [False, False], [True, True], [False, False]])
+
+
+    def test_long_cash(self) -> None:
+        equity, closed, still_open = simulate(self.opens, self.closes, self.entry_fills, self.exit_fills, "Long", 1_000.0, 2)
+        # Each position gets half the capital: 50 shares at 10 and 25 at 20, leaving no cash.
+        columns, entry_bars, exit_bars, shares, entry_prices, exit_prices, profits = closed[0]
+        np.testing.assert_array_equal(shares, [50, 25])
+        np.testing.assert_array_equal(profits, [100.0, -50.0])
+        np.testing.assert_allclose(equity, [50 * 11 + 25 * 19, 50 * 11 + 25 * 19, 1_050.0, 1_050.0])
+        self.assertEqual(len(still_open), 0)
+
+
+    def test_short_cash(self) -> None:
+        equity, closed, still_open = simulate(self.opens, self.closes, self.entry_fills, self.exit_fills, "Short", 1_000.0, 2)
+        # The sale value is set aside, so a short marked above its entry is worth less than it cost.
+        np.testing.assert_array_equal(closed[0][6], [-100.0, 50.0])
+        np.testing.assert_allclose(equity, [50 * 9 + 25 * 21, 50 * 9 + 25 * 21, 950.0, 950.0])
+
+
+    def test_max_positions(self) -> None:
+        opens = np.full((4, 4), 10.0)
+        entry_fills = np.array([[True, True, True, False], [False, False, True, True], [False, False, False, True], [False, False, False, False]])
+        exit_fills = np.array([[False] * 4, [False] * 4, [True, False, False, False], [False] * 4])
+        equity, closed, still_open = simulate(opens, opens, entry_fills, exit_fills, "Long", 1_000.0, 2)
+        # The third ticker never gets a slot. The fourth takes the first ticker's slot on the bar it is freed.
+        np.testing.assert_array_equal(closed[0][0], [0])
+        np.testing.assert_array_equal(still_open, [1, 3])
+        np.testing.assert_allclose(equity, 1_000.0)
+
+
+    def test_entry_is_limited_to_the_cash_left(self) -> None:
+        opens = np.array([[10.0, 10.0, 10.0], [20.0, 20.0, 10.0], [20.0, 20.0, 20.0]])
+        closes = np.array([[20.0, 20.0, 10.0], [20.0, 20.0, 10.0], [20.0, 20.0, 20.0]])
+        entry_fills = np.array([[True, True, False], [False, False, True], [False, False, False]])
+        exit_fills = np.array([[False, False, False], [False, False, False], [True, True, True]])
+        equity, closed, still_open = simulate(opens, closes, entry_fills, exit_fills, "Long", 1_000.0, 3)
+        # A third of the capital buys 33 shares of each of the first two, leaving 340. A third of the equity after
+        # they double would be 553, so the third entry is held to the 340 of cash and buys 34 shares.
+        np.testing.assert_array_equal(closed[0][3], [33, 33, 34])
+        np.testing.assert_allclose(equity, [1_660.0, 1_660.0, 1_000.0 + 33 * 10 * 2 + 34 * 10])
+
+
+
+class TestBacktestPortfolio(unittest.TestCase):
+
+
+    def setUp(self) -> None:
+        self.prices = {"SYNTH" + str(seed): gbm_prices(1_500, seed) for seed in range(6)}
+
+
+    def test_positions_are_capped(self) -> None:
+        for max_positions in (1, 3):
+            with self.subTest(max_positions=max_positions):
+                result = backtest_portfolio("MA Crossover", self.prices, "Long", 10, 30, max_positions=max_positions)
+                held = held_positions(result.get_trades(), result.get_equity_curve().index)
+                self.assertEqual(held.max(), max_positions) # The cap is reached but never passed.
+        unlimited = backtest_portfolio("MA Crossover", self.prices, "Long", 10, 30, max_positions=len(self.prices))
+        self.assertGreater(len(unlimited.get_trades()), len(result.get_trades()))
+
+
+    def test_realised_profit_when_flat(self) -> None:
+        for position, drift in (("Long", -0.05), ("Short", 0.05)):
+            with self.subTest(position=position):
+                prices = {ticker: with_ending(data, drift) for ticker, data in self.prices.items()}
+                result = backtest_portfolio("MA Crossover", prices, position, 10, 30, initial_capital=50_000, max_positions=3)
+                self.assertEqual(result.get_open_positions(), 0)
+
+                # On a date with nothing held, the equity is the capital plus the profits of the trades closed so far.
+                trades = result.get_trades()
+                equity = result.get_equity_curve()
+                flat = np.flatnonzero(held_positions(trades, equity.index) == 0)
+                realised = np.array([trades.loc[trades["Date Close"] <= equity.index[bar], "Trade Profit"].sum() for bar in flat])
+                np.testing.assert_allclose(equity.to_numpy()[flat], 50_000 + realised)
+                self.assertAlmostEqual(result.get_final_equity(), 50_000 + trades["Trade Profit"].sum())
+
+
+    def test_single_ticker_matches_engine(self) -> None:
+        prices = {"SYNTH": gbm_prices(2_000)}
+        for position in ("Long", "Short"):
+            with self.subTest(position=position):
+                result = backtest_portfolio("MA Crossover", prices, position, 20, 50, initial_capital=1e9, max_positions=1)
+                strategy = create_strategy("MA Crossover", "SYNTH", position, 20, 50)
+                strategy.set_indicator_cache(None)
+                trades = strategy.find_trades(strategy.prepare_data(prices["SYNTH"].copy()), position)
+                # The single-ticker engine rounds its fills to cents.
+                np.testing.assert_allclose(result.get_trades()["Trade Profit"] / result.get_trades()["Shares"], trades.profits, atol=0.011)
+
+
+    def test_two_sided_positions_are_rejected(self) -> None:
+        for position in ("Both", "Stop And Reverse"):
+            with self.subTest(position=position), self.assertRaises(InvalidPosition):
+                backtest_portfolio("MA Crossover", self.prices, position, 10, 30)
+
+
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,86 @@
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from prefetch import prefetch
+from price_store import PriceStore
+from synthetic import SimulatedFetcher
+
+
+# Drives prefetch against the local stand-in data source, with its latency and failures, and checks what ends up in
+# the price store and the report.
+# Run with: python -m pytest test_prefetch.py
+
+TICKERS = ["SYNTH" + str(number) for number in range(12)]
+
+
+class TestPrefetch(unittest.TestCase):
+
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+
+    def run_prefetch(self, fetcher: SimulatedFetcher, tickers: list[str]=TICKERS, **kwargs) -> tuple[PriceStore, pd.DataFrame]:
+        price_store = PriceStore(self.directory.name, fetcher=fetcher)
+        report = pd.DataFrame(prefetch(tickers, price_store, **kwargs)).set_index("Ticker")
+        return price_store, report
+
+
+    def test_retries_recover_transient_failures(self) -> None:
+        fetcher = SimulatedFetcher(bars=200, latency=0.005, fail_first=2)
+        price_store, report = self.run_prefetch(fetcher, max_workers=4, retries=3, backoff=0.04)
+        self.assertTrue((report["Status"] == "Updated").all(), report["Status"].to_dict())
+        self.assertTrue((report["Attempts"] == 3).all())
+        self.assertEqual(fetcher.get_requests(), 3 * len(TICKERS))
+
+        # The first wait is at least half of backoff and the second at least half of twice that.
+        single = SimulatedFetcher(bars=200, fail_first=2)
+        self.run_prefetch(single, ["SYNTH"], max_workers=1, retries=3, backoff=0.04)
+        waits = np.diff(single.get_request_times())
+        self.assertGreaterEqual(waits[0], 0.02)
+        self.assertGreaterEqual(waits[1], 0.04)
+
+
+    def test_failing_ticker_is_reported(self) -> None:
+        fetcher = SimulatedFetcher(bars=200, failing={"SYNTH3"})
+        price_store, report = self.run_prefetch(fetcher, max_workers=4, retries=2, backoff=0.001)
+        self.assertEqual(len(report), len(TICKERS))
+        self.assertEqual(report.loc["SYNTH3", "Status"], "Failed")
+        self.assertEqual(report.loc["SYNTH3", "Attempts"], 3)
+        self.assertEqual(report.loc["SYNTH3", "Error"], "ConnectionError: Simulated failure fetching SYNTH3")
+        self.assertTrue((report.drop(index="SYNTH3")["Status"] == "Updated").all())
+        self.assertTrue(price_store.load("SYNTH3").empty)
+
+
+    def test_rate_limit_bounds_requests(self) -> None:
+        rate, burst = 40.0, 3
+        fetcher = SimulatedFetcher(bars=50)
+        self.run_prefetch(fetcher, [ticker + suffix for ticker in TICKERS for suffix in ("", ".L")], max_workers=8, rate=rate, burst=burst)
+        request_times = np.array(fetcher.get_request_times())
+        self.assertEqual(len(request_times), 2 * len(TICKERS))
+        # Up to burst requests go at once, then they come no faster than the rate. A little slack covers timer jitter.
+        elapsed = request_times - request_times[0]
+        self.assertTrue(np.all(np.arange(1, len(request_times) + 1) <= burst + rate * elapsed + 1), elapsed)
+        self.assertGreaterEqual(elapsed[-1], (len(request_times) - burst - 1) / rate)
+
+
+    def test_updated_tickers_are_stored(self) -> None:
+        fetcher = SimulatedFetcher(bars=300, missing={"SYNTH5"})
+        price_store, report = self.run_prefetch(fetcher, max_workers=4)
+        self.assertEqual(report.loc["SYNTH5", "Status"], "No Data")
+        for ticker in report.index[report["Status"] == "Updated"]:
+            with self.subTest(ticker=ticker):
+                stored = price_store.load(ticker)
+                self.assertEqual(report.loc[ticker, "Bars"], 300)
+                pd.testing.assert_frame_equal(stored, fetcher.fetch(ticker), check_freq=False)
+        self.assertEqual((report["Status"] == "Updated").sum(), len(TICKERS) - 1)
+
+
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
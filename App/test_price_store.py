@@ -0,0 +1,155 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+from column_store import MappedPrices
+from price_store import PriceStore
+from reference_loops import PARAMETERS
+from registry import create_strategy
+from synthetic import gbm_prices
+from trade_log import TradeLog
+
+
+# Checks refreshing intraday prices appends the new bars to the column files without reading the stored history, that
+# a stale file with no new bars is only checked once per max_age, and that back-testing intraday prices a chunk at a
+# time finds the same trades as back-testing them in one DataFrame.
+# Run with: python -m pytest test_price_store.py
+
+class FrameFetcher:
+    """ Serves the bars of a DataFrame from the start asked for onwards. """
+
+
+    def __init__(self, data: pd.DataFrame) -> None:
+        self.data = data
+
+
+    def fetch(self, ticker: str, start: pd.Timestamp=None, interval: str="1d") -> pd.DataFrame:
+        return self.data if start is None else self.data[self.data.index >= start]
+
+
+
+class TestIntradayRefresh(unittest.TestCase):
+
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.prices = gbm_prices(20_000, freq="min", drift=0.0, volatility=0.0008).astype(np.float32).astype(np.float64)
+        self.prices["Volume"] = np.arange(len(self.prices), dtype=np.int64)
+
+        # The last bar is saved before it closed, so the refresh must replace it.
+        saved = self.prices.iloc[:15_000].copy()
+        saved.iloc[-1, saved.columns.get_loc("Close")] = 1.0
+        self.price_store = PriceStore(self.directory.name, fetcher=FrameFetcher(saved), max_age=None)
+        self.price_store.update_mapped("SYNTH", "1m")
+
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+
+    def test_new_bars_are_appended(self) -> None:
+        self.price_store.set_fetcher(FrameFetcher(self.prices))
+        with mock.patch.object(MappedPrices, "frame", side_effect=AssertionError("the stored history was read")):
+            self.assertEqual(self.price_store.update_mapped("SYNTH", "1m"), len(self.prices))
+        pd.testing.assert_frame_equal(self.price_store.get_mapped("SYNTH", "1m").frame(), self.prices, check_freq=False)
+
+
+    def test_new_columns_save_the_history_again(self) -> None:
+        prices = self.prices.assign(Extra=1.0)
+        self.price_store.set_fetcher(FrameFetcher(prices))
+        self.price_store.update_mapped("SYNTH", "1m")
+        stored = self.price_store.get_mapped("SYNTH", "1m").frame()
+        pd.testing.assert_frame_equal(stored[self.prices.columns], self.prices, check_freq=False)
+        self.assertEqual(stored["Extra"].isna().sum(), 15_000 - 1) # The bars saved before the column was added have none.
+
+
+
+
+class TestStaleCheck(unittest.TestCase):
+
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.fetcher = mock.Mock()
+        self.fetcher.fetch.return_value = pd.DataFrame()
+        self.price_store = PriceStore(self.directory.name, fetcher=self.fetcher)
+        self.daily = gbm_prices(500)
+        self.minutes = gbm_prices(2_000, freq="min", drift=0.0, volatility=0.0008)
+        self.price_store.save("SYNTH", "1d", self.daily)
+        self.price_store.save("SYNTH", "1m", self.minutes)
+        # Both were last checked a day ago, so they are stale.
+        for interval in ("1d", "1m"):
+            os.utime(self.price_store.path("SYNTH", interval), (time.time() - 86_400, time.time() - 86_400))
+
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+
+    def test_no_new_bars_is_checked_once(self) -> None:
+        for _ in range(3):
+            pd.testing.assert_frame_equal(self.price_store.get("SYNTH"), self.daily, check_freq=False)
+        for _ in range(3):
+            self.assertEqual(len(self.price_store.get_mapped("SYNTH", "1m")), len(self.minutes))
+        self.assertEqual([call.kwargs["interval"] for call in self.fetcher.fetch.call_args_list], ["1d", "1m"])
+        self.assertFalse(self.price_store.is_stale("SYNTH", "1d") or self.price_store.is_stale("SYNTH", "1m"))
+
+
+    def test_failed_download_keeps_the_stored_bars(self) -> None:
+        self.fetcher.fetch.side_effect = ConnectionError("offline")
+        self.assertEqual(len(self.price_store.get_mapped("SYNTH", "1m")), len(self.minutes))
+        self.assertIsInstance(self.price_store.get_error("SYNTH", "1m"), ConnectionError)
+        self.assertTrue(self.price_store.is_stale("SYNTH", "1m")) # It is tried again on the next read.
+
+        # Errors that are not about the download or the files are not hidden.
+        self.fetcher.fetch.side_effect = TypeError("a bug")
+        with self.assertRaises(TypeError):
+            self.price_store.get_mapped("SYNTH", "1m")
+
+
+
+class TestChunkedBacktest(unittest.TestCase):
+
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.price_store = PriceStore(self.directory.name, offline=True)
+        # Passed through float32 as Yahoo's intraday prices are.
+        self.price_store.save("SYNTH", "1m", gbm_prices(60_000, freq="min", drift=0.0, volatility=0.0008).astype(np.float32).astype(np.float64))
+
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+
+    def create_strategy(self, strategy_name: str, position: str):
+        s = create_strategy(strategy_name, "SYNTH", position, *PARAMETERS[strategy_name])
+        s.set_price_store(self.price_store)
+        s.set_indicator_cache(None)
+        s.set_trade_log(TradeLog())
+        s.set_interval("1m")
+        return s
+
+
+    def test_chunks_match_one_frame(self) -> None:
+        for strategy_name in PARAMETERS:
+            for position in ("Long", "Both"):
+                with self.subTest(strategy=strategy_name, position=position):
+                    in_memory = self.create_strategy(strategy_name, position)
+                    in_memory.backtest(in_memory.setup_data())
+
+                    # Chunks far smaller than usual, so trades and indicators run across many of them.
+                    chunked = self.create_strategy(strategy_name, position)
+                    chunked.backtest_in_chunks(self.price_store.get_mapped("SYNTH", "1m"), chunk_bars=7_000, warmup_bars=2_000)
+
+                    self.assertGreater(len(chunked.get_trade_log()), 0)
+                    pd.testing.assert_frame_equal(chunked.get_trade_log().to_frame(), in_memory.get_trade_log().to_frame())
+                    self.assertEqual((chunked.get_profit(), chunked.get_wins(), chunked.get_losses()), (in_memory.get_profit(), in_memory.get_wins(), in_memory.get_losses()))
+
+
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
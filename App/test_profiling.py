@@ -0,0 +1,93 @@
+import os
+import pstats
+import tempfile
+import tracemalloc
+import unittest
+import numpy as np
+from backtest import run_backtest
+from price_store import PriceStore
+from profiling import STAGE_COLUMNS, StageProfiler
+from synthetic import gbm_prices
+
+
+# Checks the stage profiler records what each stage did, and that a back-test profiles the stages of its daily and
+# intraday paths without changing its result.
+# Run with: python -m pytest test_profiling.py
+
+
+
+class TestStageProfiler(unittest.TestCase):
+
+
+    def test_stage_rows(self) -> None:
+        profiler = StageProfiler()
+        with profiler.stage("Allocating") as stage:
+            values = np.ones(2 ** 20) # 8 MiB
+            stage["Bars"] = len(values)
+        with profiler.stage("Nothing"):
+            pass
+
+        allocating, nothing = profiler.get_stages()
+        self.assertGreaterEqual(allocating["Peak MiB"], 8.0)
+        self.assertAlmostEqual(allocating["Bars/s"], allocating["Bars"] / allocating["Wall s"])
+        self.assertTrue(np.isnan(nothing["Bars/s"]))
+        self.assertFalse(tracemalloc.is_tracing()) # Tracing is stopped again when the profiler started it.
+        self.assertEqual(list(profiler.to_frame().columns), STAGE_COLUMNS)
+        self.assertEqual(profiler.to_frame()["Stage"].tolist(), ["Allocating", "Nothing"])
+        self.assertTrue(profiler.summary().split("\n")[-1].startswith("Total"))
+
+
+    def test_without_memory(self) -> None:
+        profiler = StageProfiler(trace_memory=False)
+        with profiler.stage("Timed", 10):
+            pass
+        self.assertTrue(np.isnan(profiler.get_stages()[0]["Peak MiB"]))
+        self.assertNotIn("MiB", profiler.summary())
+
+
+    def test_unknown_capture_mode(self) -> None:
+        with self.assertRaises(ValueError):
+            StageProfiler(capture="perf")
+
+
+
+class TestProfiledBacktest(unittest.TestCase):
+
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.price_store = PriceStore(self.directory.name, offline=True)
+        self.price_store.save("SYNTH", "1d", gbm_prices(3_000))
+        self.price_store.save("SYNTH", "1m", gbm_prices(20_000, freq="min", drift=0.0, volatility=0.0008))
+
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+
+    def test_stages(self) -> None:
+        # The daily trades are found after the bars before the 50 bar average are dropped. Intraday prices are
+        # back-tested in chunks, which calculate their own indicators.
+        for interval, stages, bars in (("1d", ["Loading prices", "Calculating indicators", "Finding trades"], [3_000, 3_000, 2_951]), ("1m", ["Loading prices", "Finding trades"], [20_000, 20_000])):
+            with self.subTest(interval=interval):
+                profiler = StageProfiler()
+                profiled = run_backtest("MA Crossover", "SYNTH", "Long", 20, 50, True, self.price_store, interval=interval, profiler=profiler)
+                plain = run_backtest("MA Crossover", "SYNTH", "Long", 20, 50, True, self.price_store, interval=interval)
+                self.assertIs(profiled.get_profiler(), profiler)
+                self.assertEqual(profiler.to_frame()["Stage"].tolist(), stages)
+                self.assertEqual(profiler.to_frame()["Bars"].tolist(), bars)
+                self.assertEqual(profiled.to_row(), plain.to_row())
+
+
+    def test_capture(self) -> None:
+        profiler = StageProfiler(trace_memory=False, capture="cprofile")
+        run_backtest("MA Crossover", "SYNTH", "Long", 20, 50, True, self.price_store, profiler=profiler)
+        self.assertIn("run_stages", profiler.capture_report())
+        path = os.path.join(self.directory.name, "backtest.prof")
+        profiler.save_capture(path)
+        self.assertGreater(pstats.Stats(path).total_calls, 0)
+
+
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
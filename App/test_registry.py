@@ -0,0 +1,117 @@
+import os
+import sys
+import tempfile
+import textwrap
+import unittest
+import numpy as np
+from exceptions import InvalidParameters, UnknownStrategy
+from registry import PLUGIN_DIRECTORY, StrategyRegistry, StrategySpec, check_parameters, create_strategy, strategy_names
+from synthetic import gbm_prices
+
+
+# Checks strategies are added from a directory of plugins, that a plugin which fails to import or declares strategies
+# the registry can't use is turned away without stopping the others, and that parameters are checked against their specs.
+# Run with: python -m pytest test_registry.py
+
+GOOD_PLUGIN = """
+from registry import Parameter, StrategySpec
+from strategy import MovingAverageCrossoverStrategy
+
+
+class SlowCrossoverStrategy(MovingAverageCrossoverStrategy):
+    pass
+
+
+STRATEGIES = [StrategySpec(
+    "Slow Crossover",
+    SlowCrossoverStrategy,
+    [Parameter("short_MA", "Short MA", 1, 1000, 50), Parameter("long_MA", "Long MA", 2, 1000, 200)],
+    ordered=True
+)]
+"""
+
+BAD_PLUGINS = {
+    "broken.py": "raise ImportError('needs a package that is not installed')\n",
+    "not_a_spec.py": "STRATEGIES = ['Not A Strategy']\n",
+    "taken_name.py": "from registry import StrategySpec\nSTRATEGIES = [StrategySpec('Taken', 'strategy:BollingerBandsStrategy')]\n",
+    "half_bad.py": "from registry import StrategySpec\nSTRATEGIES = [StrategySpec('Half', 'strategy:BollingerBandsStrategy'), None]\n"
+}
+
+
+
+class TestPlugins(unittest.TestCase):
+
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+
+
+    def tearDown(self) -> None:
+        # The plugins are imported under their file names, so they are dropped for the next test's files of the same name.
+        for filename in os.listdir(self.directory.name):
+            sys.modules.pop("backtesting_plugins." + os.path.splitext(filename)[0], None)
+        self.directory.cleanup()
+
+
+    def registry_with(self, plugins: dict[str, str]) -> StrategyRegistry:
+        for filename, source in plugins.items():
+            with open(os.path.join(self.directory.name, filename), "w") as file:
+                file.write(textwrap.dedent(source))
+        return StrategyRegistry(self.directory.name, entry_point_group="backtesting_app.no_plugins")
+
+
+    def test_plugin_is_loaded(self) -> None:
+        registry = self.registry_with({"slow_crossover.py": GOOD_PLUGIN, "_helpers.py": "raise ImportError\n"})
+        self.assertEqual(registry.names(), ["Slow Crossover"])
+        self.assertEqual(registry.get_plugin_errors(), {})
+
+        spec = registry.get("Slow Crossover")
+        self.assertEqual(spec.get_defaults(), [50, 200])
+        self.assertFalse(spec.validate(200, 50))
+
+        # The plugin's strategy finds the same trades as the built-in one it extends.
+        prices = gbm_prices(2_000)
+        plugin = spec.create("SYNTH", "Long", 20, 50)
+        built_in = create_strategy("MA Crossover", "SYNTH", "Long", 20, 50)
+        trades = [s.find_trades(s.prepare_data(prices.copy()), "Long") for s in (plugin, built_in)]
+        np.testing.assert_array_equal(trades[0].entry_bars, trades[1].entry_bars)
+        np.testing.assert_array_equal(trades[0].exit_bars, trades[1].exit_bars)
+
+
+    def test_bad_plugins_are_rejected(self) -> None:
+        registry = self.registry_with({"slow_crossover.py": GOOD_PLUGIN, **BAD_PLUGINS})
+        registry.register(StrategySpec("Taken", "strategy:BollingerBandsStrategy"))
+
+        self.assertEqual(sorted(registry.names()), ["Slow Crossover", "Taken"])
+        self.assertNotIn("Half", registry)
+        errors = {os.path.basename(path): error for path, error in registry.get_plugin_errors().items()}
+        self.assertEqual(sorted(errors), sorted(BAD_PLUGINS))
+        self.assertEqual(errors["broken.py"], "ImportError: needs a package that is not installed")
+        self.assertTrue(errors["not_a_spec.py"].startswith("InvalidPlugin: Expected a StrategySpec"))
+        self.assertEqual(errors["taken_name.py"], "InvalidPlugin: A strategy named Taken is already registered")
+        self.assertNotIn("backtesting_plugins.broken", sys.modules)
+        with self.assertRaises(UnknownStrategy):
+            registry.get("Half")
+
+
+
+class TestDefaultRegistry(unittest.TestCase):
+
+
+    def test_bundled_plugins(self) -> None:
+        self.assertTrue({"MA Crossover", "RSI Overbought Oversold", "Bollinger Bands", "MACD", "Channel Breakout"} <= set(strategy_names()))
+        self.assertEqual(StrategyRegistry(PLUGIN_DIRECTORY).get_plugin_errors(), {})
+
+
+    def test_check_parameters(self) -> None:
+        check_parameters("MA Crossover", 20, 50)
+        for values in ((50, 20), (0, 50), (20, 1_001)):
+            with self.subTest(values=values), self.assertRaises(InvalidParameters):
+                check_parameters("MA Crossover", *values)
+        with self.assertRaises(UnknownStrategy):
+            check_parameters("No Such Strategy", 20, 50)
+
+
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,92 @@
+import unittest
+from unittest import mock
+import numpy as np
+import robustness
+from robustness import METHODS, path_statistics, robustness_report, simulate
+
+
+# Checks the Monte Carlo simulations: permutations keep the total, a seed repeats the draws, and splitting the
+# simulations into batches changes neither how many there are nor what they give.
+# Run with: python -m pytest test_robustness.py
+
+CAPITAL = 1_000.0
+
+
+
+class TestSimulate(unittest.TestCase):
+
+
+    def setUp(self) -> None:
+        self.profits = np.random.default_rng(1).normal(2.0, 25.0, 60).round(2)
+
+
+    def test_permutation_keeps_the_total(self) -> None:
+        results = simulate(self.profits, CAPITAL, "Permutation", 2_000, seed=7)
+        observed = path_statistics(self.profits[np.newaxis, :], CAPITAL)
+        np.testing.assert_allclose(results["Total Return %"], observed["Total Return %"][0])
+
+        # Only the order changes, so the drawdowns spread out around the back-test's own.
+        drawdowns = results["Max Drawdown %"]
+        self.assertTrue(np.all(drawdowns <= 0))
+        self.assertGreater(len(np.unique(drawdowns)), 1)
+        self.assertTrue(drawdowns.min() <= observed["Max Drawdown %"][0] <= drawdowns.max())
+
+
+    def test_seed_repeats_the_draws(self) -> None:
+        for method in METHODS:
+            with self.subTest(method=method):
+                first = simulate(self.profits, CAPITAL, method, 500, seed=11)
+                again = simulate(self.profits, CAPITAL, method, 500, seed=11)
+                other = simulate(self.profits, CAPITAL, method, 500, seed=12)
+                for statistic in first:
+                    np.testing.assert_array_equal(first[statistic], again[statistic])
+                self.assertFalse(np.array_equal(first["Max Drawdown %"], other["Max Drawdown %"]))
+
+        bootstrap = simulate(self.profits, CAPITAL, "Bootstrap", 500, seed=11)["Total Return %"]
+        self.assertGreater(len(np.unique(bootstrap)), 1) # Unlike a permutation, a resample changes the total.
+
+
+    def test_batches(self) -> None:
+        for method in METHODS:
+            unbatched = simulate(self.profits, CAPITAL, method, 1_001, seed=3)
+            # Batches of 3 simulations of the 60 trades, with 2 left over for the last one.
+            with self.subTest(method=method), mock.patch.object(robustness, "BATCH_VALUES", 3 * len(self.profits) + 10):
+                batched = simulate(self.profits, CAPITAL, method, 1_001, seed=3)
+                for statistic in unbatched:
+                    self.assertEqual(len(batched[statistic]), 1_001)
+                    np.testing.assert_array_equal(batched[statistic], unbatched[statistic])
+
+        # More trades than fit in a batch still gives a simulation a batch.
+        with mock.patch.object(robustness, "BATCH_VALUES", 10):
+            self.assertEqual(len(simulate(self.profits, CAPITAL, "Bootstrap", 7, seed=3)["Total Return %"]), 7)
+
+
+    def test_no_trades(self) -> None:
+        results = simulate(np.empty(0), CAPITAL, "Bootstrap", 100)
+        self.assertEqual([len(values) for values in results.values()], [100, 100])
+        self.assertTrue(all(np.all(values == 0) for values in results.values()))
+
+
+    def test_unknown_method(self) -> None:
+        with self.assertRaises(ValueError):
+            simulate(self.profits, CAPITAL, "Jackknife", 100)
+
+
+
+class TestReport(unittest.TestCase):
+
+
+    def test_report(self) -> None:
+        profits = np.random.default_rng(2).normal(1.0, 10.0, 40)
+        report = robustness_report(profits, CAPITAL, 1_000, confidence=0.9, seed=5).set_index(["Method", "Statistic"])
+        self.assertEqual(len(report), 2 * len(METHODS))
+        self.assertTrue((report["Lower"] <= report["Median"]).all() and (report["Median"] <= report["Upper"]).all())
+        permutation = report.loc[("Permutation", "Total Return %")]
+        self.assertAlmostEqual(permutation["Lower"], permutation["Observed"])
+        self.assertAlmostEqual(permutation["Upper"], permutation["Observed"])
+        self.assertTrue(report.xs("Max Drawdown %", level="Statistic")["Loss %"].isna().all())
+
+
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,55 @@
+import unittest
+import numpy as np
+from search_index import GRAM_LENGTH, SearchIndex
+
+
+# Checks the search index finds the same symbols as scanning them all, in the same order, whether the query is typed a
+# key at a time, deleted a key at a time or changed outright.
+# Run with: python -m pytest test_search_index.py
+
+
+def scan(items: list, query: str) -> list:
+    """ The items containing the query, ignoring case, found the way the symbol list used to filter them. """
+
+    return [item for item in items if query.lower() in str(item).lower()]
+
+
+
+class TestSearchIndex(unittest.TestCase):
+
+
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        letters = list("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+        self.symbols = sorted({"".join(rng.choice(letters, rng.integers(1, 6))) + rng.choice(["", ".L", ".TO", ".HK"]) for _ in range(6_000)})[:5_000]
+        self.index = SearchIndex(self.symbols)
+
+
+    def test_typing_and_deleting(self) -> None:
+        for symbol in self.symbols[::250]:
+            typed = [symbol[:length] for length in range(1, len(symbol) + 1)]
+            for query in typed + typed[-2::-1]:
+                with self.subTest(query=query):
+                    self.assertEqual(self.index.search(query), scan(self.symbols, query))
+
+
+    def test_queries(self) -> None:
+        queries = ["", "a", "AB", "ab.", ".l", ".TO", "ZZZZZZZ", "b.h", "abcd", "q", "xyz.hk", "X", "e.to"]
+        for query in queries + queries[::-1]:
+            with self.subTest(query=query):
+                self.assertEqual(self.index.search(query), scan(self.symbols, query))
+        self.assertGreater(max(len(query) for query in queries), GRAM_LENGTH)
+
+
+    def test_other_items(self) -> None:
+        items = ["BRK-B", 1234, "Ünïcode", "brk.a", "BRK"]
+        index = SearchIndex(items)
+        self.assertEqual(len(index), len(items))
+        for query in ("brk", "23", "ÜNÏ", "k.", "brk-b", "12345"):
+            with self.subTest(query=query):
+                self.assertEqual(index.search(query), scan(items, query))
+
+
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
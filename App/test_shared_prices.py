@@ -0,0 +1,71 @@
+import multiprocessing
+import os
+import pickle
+import tempfile
+import unittest
+import pandas as pd
+from batch import collect_results, run_batch
+from price_store import PriceStore
+from shared_prices import SHARED_COLUMNS, build_shared_prices
+from synthetic import gbm_prices
+from trade_log import TradeLog
+
+
+# Checks a shared price universe hands back each ticker's bars as they were saved, survives being sent to spawned
+# worker processes, and gives a batch the same results as the price store it was built from.
+# Run with: python -m pytest test_shared_prices.py
+
+
+
+class TestSharedPrices(unittest.TestCase):
+
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.price_store = PriceStore(os.path.join(self.directory.name, "Price Data"), offline=True)
+        # Histories of different lengths, so their first dates differ, and one with bars missing in the middle.
+        self.prices = {"SYNTH" + str(seed): gbm_prices(bars, seed) for seed, bars in enumerate((1_500, 2_000, 800))}
+        gaps = gbm_prices(1_200, 9)
+        self.prices["GAPS"] = gaps.drop(index=gaps.index[300:340])
+        for ticker, data in self.prices.items():
+            self.price_store.save(ticker, "1d", data)
+        self.tickers = list(self.prices) + ["MISSING"]
+        self.shared = build_shared_prices(os.path.join(self.directory.name, "Shared Prices"), self.tickers, self.price_store)
+
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+
+    def test_bars_are_kept(self) -> None:
+        self.assertEqual(self.shared.get_tickers(), list(self.prices))
+        self.assertNotIn("MISSING", self.shared)
+        self.assertTrue(self.shared.get("MISSING").empty)
+        self.assertTrue(self.shared.get("SYNTH0", "1h").empty)
+        self.assertEqual(self.shared.column("Close").shape, (len(self.prices), len(self.shared.get_dates())))
+        for ticker, data in self.prices.items():
+            with self.subTest(ticker=ticker):
+                pd.testing.assert_frame_equal(self.shared.get(ticker), data[SHARED_COLUMNS], check_freq=False)
+
+
+    def test_pickling_sends_the_directory(self) -> None:
+        pickled = pickle.dumps(self.shared)
+        self.assertLess(len(pickled), 1_000) # None of the prices go with it.
+        pd.testing.assert_frame_equal(pickle.loads(pickled).get("GAPS"), self.shared.get("GAPS"))
+
+
+    def test_batch_matches_price_store(self) -> None:
+        results = {}
+        for name, price_store in (("store", self.price_store), ("shared", self.shared)):
+            trade_log = TradeLog()
+            table = collect_results(run_batch("MA Crossover", "Long", self.tickers, 20, 50, 2, trade_log, price_store, multiprocessing.get_context("spawn")))
+            results[name] = (table.sort_values("Ticker", ignore_index=True), trade_log.to_frame().sort_values(["Ticker", "Trade Number"], ignore_index=True))
+
+        pd.testing.assert_frame_equal(results["shared"][0], results["store"][0])
+        pd.testing.assert_frame_equal(results["shared"][1], results["store"][1])
+        self.assertEqual(results["shared"][0].set_index("Ticker").loc["MISSING", "Error"], "No price data")
+
+
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,77 @@
+import unittest
+import warnings
+import numpy as np
+import pandas as pd
+from reference_loops import PARAMETERS, create_strategy, engine_trades, naive_columns, reference_trades
+from indicators import default_cache
+from strategy import POSITIONS
+from synthetic import gbm_prices
+from trade_log import TradeLog
+
+
+# Checks the vectorised engine finds the same trades as the bar by bar loops the strategies used to run, and the
+# plugin strategies' indicators match ones worked out with plain loops over the raw prices, and a back-test marks
+# exactly the signal bars of its trades without chained assignment.
+# Run with: python -m pytest test_signals.py
+
+BARS = 2_000
+
+# The columns of the plugins' indicators and of the naive ones they are checked against.
+NAIVE_COLUMNS = {
+    "MACD": {"MACD 12/26/9": "MACD", "MACD Signal 12/26/9": "MACD Signal"},
+    "Channel Breakout": {"10 Channel High": "10 High", "10 Channel Low": "10 Low", "20 Channel High": "20 High", "20 Channel Low": "20 Low"}
+}
+
+
+class TestSignals(unittest.TestCase):
+
+
+    def setUp(self) -> None:
+        default_cache.clear()
+        self.prices = gbm_prices(BARS)
+
+
+    def test_trades_match_loops(self) -> None:
+        for strategy_name in PARAMETERS:
+            for position in ("Long", "Short"):
+                with self.subTest(strategy=strategy_name, position=position):
+                    strategy = create_strategy(strategy_name, position)
+                    data = strategy.prepare_data(self.prices.copy())
+                    trades = engine_trades(strategy, data)
+                    with warnings.catch_warnings():
+                        warnings.simplefilter("ignore", FutureWarning) # The loops keep the positional Series lookups of the original code.
+                        expected = reference_trades(strategy_name, position, data, self.prices)
+                    self.assertEqual(list(zip(trades.entry_bars.tolist(), trades.exit_bars.tolist())), expected)
+
+
+    def test_plugin_indicators_match_loops(self) -> None:
+        for strategy_name, names in NAIVE_COLUMNS.items():
+            with self.subTest(strategy=strategy_name):
+                data = create_strategy(strategy_name, "Long").prepare_data(self.prices.copy())
+                naive = naive_columns(strategy_name, self.prices, data)
+                for column, naive_column in names.items():
+                    np.testing.assert_allclose(data[column].to_numpy(), naive[naive_column], rtol=1e-9, atol=1e-9, err_msg=column)
+
+
+    def test_signal_bars_are_marked(self) -> None:
+        for strategy_name in PARAMETERS:
+            for position in POSITIONS:
+                with self.subTest(strategy=strategy_name, position=position), pd.option_context("mode.chained_assignment", "raise"):
+                    strategy = create_strategy(strategy_name, position)
+                    strategy.set_trade_log(TradeLog())
+                    data = strategy.prepare_data(self.prices.copy())
+                    strategy.backtest(data)
+
+                    # The trade log dates a trade from the bar after its signal.
+                    trades = strategy.get_trade_log().to_frame()
+                    self.assertGreater(len(trades), 0)
+                    entries = data.index.get_indexer(trades["Date Open"]) - 1
+                    exits = data.index.get_indexer(trades["Date Close"]) - 1
+                    self.assertEqual(data['Entry'].dtype, bool)
+                    self.assertEqual(np.flatnonzero(data['Entry']).tolist(), sorted(set(entries)))
+                    self.assertEqual(np.flatnonzero(data['Exit']).tolist(), sorted(set(exits)))
+
+
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,84 @@
+import unittest
+import numpy as np
+import pandas as pd
+from exceptions import InvalidPosition
+from registry import create_strategy, get_strategy_spec, strategy_names
+from strategy import POSITIONS
+from streaming import LiveStrategy
+from synthetic import gbm_prices
+
+
+# Streams synthetic prices bar by bar through every registered strategy and checks the indicators and trades match
+# the batch calculation on the same prices.
+# Run with: python -m pytest test_streaming.py
+
+BARS = 2_000
+
+
+def default_strategy(strategy_name: str, position: str):
+    """ A registered strategy with its default parameters, without the indicator cache so every test starts from the prices. """
+
+    defaults = [parameter.default for parameter in get_strategy_spec(strategy_name).parameters]
+    strategy = create_strategy(strategy_name, "SYNTH", position, *defaults)
+    strategy.set_indicator_cache(None)
+    return strategy
+
+
+def stream_trades(strategy, prices: pd.DataFrame) -> dict[str, list[tuple[int, int]]]:
+    """ Replay the prices through a LiveStrategy, returning the (entry, exit) signal bars of the closed trades of each side. """
+
+    live = LiveStrategy(strategy)
+    trades = {}
+    entry_bars = {}
+    for row in zip(prices.index, prices['Open'].to_numpy(), prices['High'].to_numpy(), prices['Low'].to_numpy(), prices['Close'].to_numpy()):
+        for event in live.on_bar(*row):
+            if event.kind == "Entry": entry_bars[event.position] = event.bar
+            elif event.kind == "Exit": trades.setdefault(event.position, []).append((entry_bars[event.position], event.bar))
+    return trades
+
+
+def batch_trades(strategy, prices: pd.DataFrame, position: str) -> dict[str, list[tuple[int, int]]]:
+    """ The (entry, exit) signal bars of each side's closed trades from the back-test's signals and position state machine. """
+
+    columns = {"Open": prices['Open'].to_numpy(), "Close": prices['Close'].to_numpy()}
+    columns.update(strategy.compute_indicators(prices))
+    if position in ("Long", "Short"): trades_by_side = {position: strategy.find_trades(columns, position)}
+    else: trades_by_side = strategy.find_both_trades(columns, reverse=position == "Stop And Reverse")
+    return {side: list(zip(trades.entry_bars.tolist(), trades.exit_bars.tolist())) for side, trades in trades_by_side.items() if len(trades.entry_bars) > 0}
+
+
+
+class TestStreaming(unittest.TestCase):
+
+
+    def setUp(self) -> None:
+        self.prices = gbm_prices(BARS)
+
+
+    def test_indicators_match_batch(self) -> None:
+        for strategy_name in strategy_names():
+            with self.subTest(strategy=strategy_name):
+                strategy = default_strategy(strategy_name, "Long")
+                columns = strategy.compute_indicators(self.prices)
+                stream = strategy.create_indicator_stream()
+                streamed = [stream.update(close, high, low) for close, high, low in zip(self.prices['Close'].to_numpy(), self.prices['High'].to_numpy(), self.prices['Low'].to_numpy())]
+                for name, values in columns.items():
+                    np.testing.assert_allclose([row[name] for row in streamed], values, rtol=1e-9, atol=1e-9, err_msg=name)
+
+
+    def test_trades_match_batch(self) -> None:
+        for strategy_name in strategy_names():
+            for position in POSITIONS:
+                with self.subTest(strategy=strategy_name, position=position):
+                    strategy = default_strategy(strategy_name, position)
+                    self.assertEqual(stream_trades(strategy, self.prices), batch_trades(strategy, self.prices, position))
+
+
+    def test_unknown_position(self) -> None:
+        with self.assertRaises(InvalidPosition):
+            LiveStrategy(default_strategy(strategy_names()[0], "Long"), "Sideways")
+
+
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
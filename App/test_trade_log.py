@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from engine import TradeList
+from trade_log import TRADE_COLUMNS, TradeLog, read_store
+
+
+# Checks trades written to a SQLite results store read back the same, and that each write appends to what is there.
+# Run with: python -m pytest test_trade_log.py
+
+DATES = pd.bdate_range(end="2023-09-01", periods=10, tz="America/New_York", name="Date")
+
+
+def sample_log(ticker: str, position: str) -> TradeLog:
+    trades = TradeList(position, np.array([0, 4]), np.array([2, 7]), np.array([10.25, 11.5]), np.array([10.75, 11.0]))
+    trade_log = TradeLog()
+    trade_log.add(ticker, "MA Crossover", trades, DATES)
+    return trade_log
+
+
+def stored_frame(trade_log: TradeLog) -> pd.DataFrame:
+    """ The trade log's trades the way the store holds them: dates as text under its snake case column names. """
+
+    trades = trade_log.to_frame().astype({"Date Open": str, "Date Close": str})
+    trades.columns = [column.lower().replace(" ", "_") for column in TRADE_COLUMNS]
+    return trades.astype({"trade_number": np.int64, "entry_price": np.float64, "exit_price": np.float64, "trade_profit": np.float64})
+
+
+
+class TestSQLiteStore(unittest.TestCase):
+
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "results.sqlite")
+
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+
+    def test_round_trip(self) -> None:
+        trade_log = sample_log("AAA", "Long")
+        trade_log.write(self.path)
+        stored = read_store(self.path)
+        pd.testing.assert_frame_equal(stored, stored_frame(trade_log))
+        self.assertEqual(stored["date_open"].tolist(), [str(DATES[1]), str(DATES[5])])
+        self.assertEqual(stored["trade_profit"].tolist(), [0.5, -0.5])
+
+
+    def test_writes_are_appended(self) -> None:
+        first = sample_log("AAA", "Long")
+        second = sample_log("BBB", "Short")
+        first.write(self.path)
+        second.write(self.path)
+
+        both = TradeLog()
+        both.extend(first)
+        both.extend(second)
+        pd.testing.assert_frame_equal(read_store(self.path), stored_frame(both))
+        self.assertEqual(read_store(self.path, "SELECT ticker, SUM(trade_profit) AS profit FROM trades GROUP BY ticker").values.tolist(), [["AAA", 0.0], ["BBB", 0.0]])
+
+
+    def test_empty_log_creates_the_table(self) -> None:
+        TradeLog().write(os.path.join(self.directory.name, "results.db"))
+        self.assertEqual(len(read_store(os.path.join(self.directory.name, "results.db"))), 0)
+
+
+    def test_unknown_file_type(self) -> None:
+        with self.assertRaises(ValueError):
+            sample_log("AAA", "Long").write(os.path.join(self.directory.name, "results.txt"))
+
+
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
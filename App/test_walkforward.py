@@ -0,0 +1,109 @@
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from price_store import PriceStore
+from synthetic import gbm_prices
+from walkforward import rolling_windows, walk_forward
+
+
+# Checks the walk-forward windows tile the history as intended and that the parameters chosen on each in-sample
+# window depend on nothing after it.
+# Run with: python -m pytest test_walkforward.py
+
+LOWER_VALUES = [10, 20, 30]
+HIGHER_VALUES = [50, 100]
+
+# The bars of the history, of each in-sample and out-of-sample window, and the bar the prices are changed from.
+BARS = 2_000
+IN_SAMPLE = 500
+OUT_OF_SAMPLE = 250
+CUT = 1_000
+
+IN_SAMPLE_COLUMNS = ["Lower", "Higher", "In-Sample Profit", "In-Sample Win %"]
+
+
+def with_trend_from(data: pd.DataFrame, bar: int, drift: float) -> pd.DataFrame:
+    """ The prices with a steady trend of drift a bar added from the bar onwards, leaving the bars before it as they were. """
+
+    trend = np.exp(drift * np.clip(np.arange(len(data)) - bar, 0, None))
+    return data.assign(**{column: data[column] * trend for column in ('Open', 'High', 'Low', 'Close')})
+
+
+
+class TestRollingWindows(unittest.TestCase):
+
+
+    def test_out_of_sample_windows_follow_on(self) -> None:
+        windows = rolling_windows(BARS, IN_SAMPLE, OUT_OF_SAMPLE)
+        self.assertEqual(windows[0], (0, IN_SAMPLE, IN_SAMPLE + OUT_OF_SAMPLE))
+        self.assertEqual(len(windows), (BARS - IN_SAMPLE) // OUT_OF_SAMPLE)
+        for (start, split, stop), following in zip(windows, windows[1:] + [None]):
+            self.assertEqual(split - start, IN_SAMPLE)
+            self.assertEqual(stop - split, OUT_OF_SAMPLE)
+            if following is not None:
+                self.assertEqual(following[1], stop) # The next out-of-sample window starts where this one stopped.
+        self.assertLessEqual(windows[-1][2], BARS)
+        self.assertGreater(windows[-1][2] + OUT_OF_SAMPLE, BARS) # No room is left for another window.
+
+
+    def test_step(self) -> None:
+        windows = rolling_windows(1_000, 300, 100, step=50)
+        self.assertEqual([start for start, _, _ in windows], list(range(0, 601, 50)))
+        self.assertEqual(rolling_windows(399, 300, 100), [])
+        self.assertEqual(rolling_windows(400, 300, 100), [(0, 300, 400)])
+
+
+
+class TestWalkForward(unittest.TestCase):
+
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.prices = gbm_prices(BARS)
+
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+
+    def run_walk_forward(self, data: pd.DataFrame, max_workers: int=1) -> pd.DataFrame:
+        price_store = PriceStore(self.directory.name, offline=True)
+        price_store.save("SYNTH", "1d", data)
+        return walk_forward("MA Crossover", "SYNTH", "Long", LOWER_VALUES, HIGHER_VALUES, IN_SAMPLE, OUT_OF_SAMPLE, max_workers=max_workers, price_store=price_store)
+
+
+    def test_window_dates(self) -> None:
+        table = self.run_walk_forward(self.prices)
+        windows = rolling_windows(BARS, IN_SAMPLE, OUT_OF_SAMPLE)
+        dates = self.prices.index
+        self.assertEqual(table["Window"].tolist(), list(range(1, len(windows) + 1)))
+        self.assertEqual(table["In-Sample Start"].tolist(), [dates[start] for start, _, _ in windows])
+        self.assertEqual(table["Out-Of-Sample Start"].tolist(), [dates[split] for _, split, _ in windows])
+        self.assertEqual(table["Out-Of-Sample End"].tolist(), [dates[stop - 1] for _, _, stop in windows])
+        self.assertTrue(set(zip(table["Lower"], table["Higher"])) <= {(lower, higher) for lower in LOWER_VALUES for higher in HIGHER_VALUES})
+
+
+    def test_no_look_ahead(self) -> None:
+        table = self.run_walk_forward(self.prices)
+        changed = self.run_walk_forward(with_trend_from(self.prices, CUT, -0.004))
+        splits = np.array([split for _, split, _ in rolling_windows(BARS, IN_SAMPLE, OUT_OF_SAMPLE)])
+        stops = splits + OUT_OF_SAMPLE
+
+        # Changing the prices from the cut on leaves the choice of every window whose in-sample part ends by then.
+        before = splits <= CUT
+        pd.testing.assert_frame_equal(changed.loc[before, IN_SAMPLE_COLUMNS], table.loc[before, IN_SAMPLE_COLUMNS])
+        pd.testing.assert_frame_equal(changed.loc[stops <= CUT], table.loc[stops <= CUT])
+
+        # The later windows see the change, so the check above could have failed.
+        self.assertFalse(changed.loc[~before, "In-Sample Profit"].equals(table.loc[~before, "In-Sample Profit"]))
+        self.assertFalse(changed.loc[before & (stops > CUT), "Out-Of-Sample Profit"].equals(table.loc[before & (stops > CUT), "Out-Of-Sample Profit"]))
+
+
+    def test_processes_match_serial(self) -> None:
+        pd.testing.assert_frame_equal(self.run_walk_forward(self.prices, max_workers=2), self.run_walk_forward(self.prices))
+
+
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
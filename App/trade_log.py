@@ -0,0 +1,106 @@
+import os
+import sqlite3
+import numpy as np
+import pandas as pd
+from engine import TradeList
+
+
+TRADE_COLUMNS = ["Ticker", "Strategy", "Trade Number", "Date Open", "Date Close", "Position", "Entry Price", "Exit Price", "Trade Profit"]
+
+# The file types a trade log can be written to, by extension, as they are described to the user.
+FILE_TYPES = {".csv": "CSV file", ".parquet": "Parquet file", ".sqlite": "SQLite results store", ".db": "SQLite results store"}
+
+
+class TradeLog:
+    """ Collects the closed trades of one or more back-tests as columns of arrays and writes them in one go.
+
+    The file type is chosen by the extension: .csv, .parquet, or .sqlite/.db for an append-only SQLite store
+    that can hold the trades of many runs. """
+
+
+    def __init__(self) -> None:
+        self.__batches = []
+
+
+    def add(self, ticker: str, strategy_name: str, trades: TradeList, dates: pd.Index) -> None:
+        """ Add the closed trades of a back-test. The dates are the index of the data the trades were found in. """
+
+        count = len(trades)
+        self.__batches.append({
+            "Ticker": np.full(count, ticker, dtype=object),
+            "Strategy": np.full(count, strategy_name, dtype=object),
+            "Trade Number": np.arange(1, count + 1),
+            "Date Open": dates[trades.entry_bars + 1],
+            "Date Close": dates[trades.exit_bars + 1],
+            "Position": np.full(count, trades.position, dtype=object),
+            "Entry Price": trades.entry_prices,
+            "Exit Price": trades.exit_prices,
+            "Trade Profit": trades.profits
+        })
+        return
+
+
+    def extend(self, other: "TradeLog") -> None:
+        """ Add all the trades collected by another trade log. """
+
+        self.__batches.extend(other.get_batches())
+        return
+
+
+    def to_frame(self) -> pd.DataFrame:
+        if len(self.__batches) == 0:
+            return pd.DataFrame(columns=TRADE_COLUMNS)
+        return pd.concat([pd.DataFrame(batch, columns=TRADE_COLUMNS) for batch in self.__batches], ignore_index=True)
+
+
+    def write(self, path: str) -> None:
+        """ Write every collected trade to the file in a single write. SQLite stores are appended to, other files are replaced. """
+
+        trades = self.to_frame()
+        extension = os.path.splitext(path)[1].lower()
+        if extension == ".csv":
+            trades.to_csv(path, index=False)
+        elif extension == ".parquet":
+            trades.to_parquet(path, index=False)
+        elif extension in (".sqlite", ".db"):
+            append_to_store(path, trades)
+        else:
+            raise ValueError("Unsupported trade log file type: " + path)
+        return
+
+
+    def clear(self) -> None:
+        self.__batches = []
+        return
+
+
+    def get_batches(self) -> list[dict]:
+        return self.__batches
+
+
+    def __len__(self) -> int:
+        return sum(len(batch["Trade Number"]) for batch in self.__batches)
+
+
+
+def append_to_store(path: str, trades: pd.DataFrame) -> None:
+    """ Append trades to the trades table of a SQLite results store, creating it if needed. """
+
+    rows = trades.astype({"Date Open": str, "Date Close": str}).itertuples(index=False, name=None)
+    with sqlite3.connect(path) as connection:
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS trades (ticker TEXT, strategy TEXT, trade_number INTEGER, date_open TEXT, date_close TEXT, "
+            "position TEXT, entry_price REAL, exit_price REAL, trade_profit REAL)"
+        )
+        connection.executemany("INSERT INTO trades VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    connection.close()
+    return
+
+
+def read_store(path: str, query: str="SELECT * FROM trades") -> pd.DataFrame:
+    """ Query a SQLite results store. """
+
+    with sqlite3.connect(path) as connection:
+        trades = pd.read_sql_query(query, connection)
+    connection.close()
+    return trades
\ No newline at end of file
@@ -0,0 +1,120 @@
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from optimizer import evaluate_pairs, parse_range, prepare_columns, valid_pairs
+from price_store import PriceStore
+from registry import create_strategy, strategy_names
+
+
+# The price columns and indicators shared by every worker process of a walk-forward run.
+_columns = None
+
+
+def rolling_windows(bars: int, in_sample: int, out_of_sample: int, step: int=None) -> list[tuple[int, int, int]]:
+    """ The (start, split, stop) bars of each window: in-sample from start to split, out-of-sample from split to stop.
+
+    Each window moves on by step bars, which defaults to the out-of-sample length so the out-of-sample parts follow on from each other. """
+
+    step = step if step is not None else out_of_sample
+    return [(start, start + in_sample, start + in_sample + out_of_sample) for start in range(0, bars - in_sample - out_of_sample + 1, step)]
+
+
+def slice_columns(columns: dict[str, np.ndarray], start: int, stop: int) -> dict[str, np.ndarray]:
+    """ Views of the bars from start to stop of every column. Nothing is copied or recalculated. """
+
+    return {name: values[start:stop] for name, values in columns.items()}
+
+
+def evaluate_window(strategy_name: str, ticker: str, position: str, pairs: list[tuple[int, int]], window: tuple[int, int, int], columns: dict[str, np.ndarray]=None) -> dict:
+    """ Find the most profitable pair on the window's in-sample bars, then back-test that pair on its out-of-sample bars. """
+
+    columns = columns if columns is not None else _columns
+    start, split, stop = window
+
+    in_sample = evaluate_pairs(strategy_name, ticker, position, pairs, slice_columns(columns, start, split))
+    best = max(in_sample, key=lambda result: (result["Profit"], result["Win %"]))
+    out_of_sample = evaluate_pairs(strategy_name, ticker, position, [(best["Lower"], best["Higher"])], slice_columns(columns, split, stop))[0]
+
+    return {
+        "Lower": best["Lower"],
+        "Higher": best["Higher"],
+        "In-Sample Profit": best["Profit"],
+        "In-Sample Win %": best["Win %"],
+        "Out-Of-Sample Profit": out_of_sample["Profit"],
+        "Out-Of-Sample Wins": out_of_sample["Wins"],
+        "Out-Of-Sample Losses": out_of_sample["Losses"],
+        "Out-Of-Sample Win %": out_of_sample["Win %"]
+    }
+
+
+def _share_columns(columns: dict[str, np.ndarray]) -> None:
+    global _columns
+    _columns = columns
+
+
+def walk_forward(strategy_name: str, ticker: str, position: str, lower_values: list[int], higher_values: list[int], in_sample: int, out_of_sample: int, step: int=None, max_workers: int=None, price_store: PriceStore=None) -> pd.DataFrame:
+    """ Optimise the parameters on each rolling in-sample window and test the winners on the out-of-sample window after it.
+
+    The price history is read once and every indicator is calculated once over all of it. As the indicators only look back,
+    each window's values are the same as if its indicators had been carried forward bar by bar, so the windows just take
+    views of the shared arrays. The windows are spread over a pool of processes. """
+
+    pairs = valid_pairs(strategy_name, lower_values, higher_values)
+    if len(pairs) == 0:
+        raise ValueError("No valid parameter pairs: the values must be within the strategy's bounds and every lower value below a higher value.")
+
+    s = create_strategy(strategy_name, ticker, position, *pairs[0])
+    if price_store is not None:
+        s.set_price_store(price_store)
+    data = s.get_price_store().get(ticker)
+    if data.empty:
+        raise ValueError("No price data for " + ticker)
+
+    windows = rolling_windows(len(data), in_sample, out_of_sample, step)
+    if len(windows) == 0:
+        raise ValueError(f"{ticker} has {len(data)} bars, too few for a {in_sample} bar in-sample and {out_of_sample} bar out-of-sample window.")
+
+    columns = prepare_columns(strategy_name, ticker, position, data, pairs)
+
+    if max_workers == 1:
+        results = [evaluate_window(strategy_name, ticker, position, pairs, window, columns) for window in windows]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_share_columns, initargs=(columns,)) as executor:
+            futures = [executor.submit(evaluate_window, strategy_name, ticker, position, pairs, window) for window in windows]
+            results = [future.result() for future in futures]
+
+    dates = data.index
+    table = pd.DataFrame(results)
+    table.insert(0, "Window", range(1, len(windows) + 1))
+    table.insert(1, "In-Sample Start", [dates[start] for start, _, _ in windows])
+    table.insert(2, "Out-Of-Sample Start", [dates[split] for _, split, _ in windows])
+    table.insert(3, "Out-Of-Sample End", [dates[stop - 1] for _, _, stop in windows])
+    return table
+
+
+def main(argv: list[str]=None) -> None:
+    parser = argparse.ArgumentParser(description="Walk-forward analysis: optimise on rolling in-sample windows and test on the out-of-sample windows that follow.")
+    parser.add_argument("strategy", choices=strategy_names(), help='Strategy name, e.g. "MA Crossover".')
+    parser.add_argument("ticker")
+    parser.add_argument("position", choices=["Long", "Short"])
+    parser.add_argument("--lower", type=parse_range, required=True, help="Lower values as start:stop[:step], e.g. 5:55.")
+    parser.add_argument("--higher", type=parse_range, required=True, help="Higher values as start:stop[:step], e.g. 50:250.")
+    parser.add_argument("--in-sample", type=int, default=756, help="Bars in each in-sample window (default: about 3 years).")
+    parser.add_argument("--out-of-sample", type=int, default=252, help="Bars in each out-of-sample window (default: about 1 year).")
+    parser.add_argument("--step", type=int, default=None, help="Bars each window moves on by (default: the out-of-sample length).")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes (default: CPU count).")
+    parser.add_argument("--output", default=None, help="CSV file to save the windows to.")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    results = walk_forward(args.strategy, args.ticker, args.position, args.lower, args.higher, args.in_sample, args.out_of_sample, args.step, args.workers)
+    print(results.to_string(index=False))
+    print(f"Out-of-sample profit {results['Out-Of-Sample Profit'].sum():.2f} against in-sample {results['In-Sample Profit'].sum():.2f} over {len(results)} windows in {time.perf_counter() - start:.1f}s.")
+    if args.output is not None:
+        results.to_csv(args.output, index=False)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file